@@ -0,0 +1,81 @@
+'''
+Compares import time of kaskader.tests.generators with lazy integrations against eager module level imports
+of optional integrations as they were imported before.
+
+    python benchmarks/import_time.py [--runs 10]
+
+uses DJANGO_SETTINGS_MODULE if set, otherwise minimal settings with auth and contenttypes apps
+'''
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules imported at module level of kaskader.tests.generators before integrations were loaded lazily
+EAGER_IMPORTS = [
+    'django.contrib.gis.db.models',
+    'django.contrib.gis.forms',
+    'django.contrib.gis.geos',
+    'django.contrib.postgres.fields',
+    'django.contrib.postgres.forms',
+    'django_filters.fields',
+    'requests',
+    'internationalflavor',
+    'pragmatic',
+    'gm2m',
+]
+
+SETUP = '''
+import os, sys, time
+sys.path.insert(0, {root!r})
+import django
+from django.conf import settings
+
+if not os.environ.get('DJANGO_SETTINGS_MODULE'):
+    settings.configure(INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes'])
+
+django.setup()
+start = time.perf_counter()
+'''
+
+MEASURE = '''
+import importlib
+for module_name in {eager!r}:
+    try:
+        importlib.import_module(module_name)
+    except Exception:
+        pass
+import kaskader.tests.generators
+print(time.perf_counter() - start)
+'''
+
+
+def measure(eager, runs):
+    code = SETUP.format(root=ROOT) + MEASURE.format(eager=EAGER_IMPORTS if eager else [])
+    timings = []
+
+    for i in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', code], env=os.environ.copy())
+        timings.append(float(output.decode().strip().splitlines()[-1]))
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    eager = measure(True, args.runs)
+    lazy = measure(False, args.runs)
+
+    print('eager integrations: median {:.1f} ms, min {:.1f} ms'.format(statistics.median(eager) * 1000, min(eager) * 1000))
+    print('lazy integrations:  median {:.1f} ms, min {:.1f} ms'.format(statistics.median(lazy) * 1000, min(lazy) * 1000))
+    print('saving:             {:.1f} ms per process'.format((statistics.median(eager) - statistics.median(lazy)) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+import ast
+import json
+import os
+import sys
+from unittest import mock
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import SimpleTestCase
+
+from example.tests.utils import TemporaryPackageMixin
+from kaskader.tests.discovery import SourceScanner, AuditManifest, StaticModuleMembers
+from kaskader.tests.missing_tests import MissingTestMixin
+
+
+SCANNED_SOURCE = """
+def check(user, obj):
+    x = get_perm(obj)
+
+    if perm in ('app.change_x',):
+        return user.has_perm('cars.view_car')
+
+    # user.has_perm('cars.delete_car')
+    return render(request, 'template.html', permission='cars.add_car')
+
+
+class View(object):
+    permission = 'cars.change_car'
+    required_permission = "cars.delete_car"
+    permissions = {'key': 'cars.view_car'}
+
+    def one_line(self): return self.request.user.is_superuser
+
+    def get(self):
+        return self.check('cars.change_car')
+"""
+
+
+class SourceScannerTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = self.create_temporary_dir()
+
+    def test_scan(self):
+        scan = SourceScanner.scan(SCANNED_SOURCE.encode('utf8'))
+
+        # string after keyword, tuple or dict is not first argument of previous call
+        self.assertEqual(scan['calls'], [[3, 'get_perm', None], [6, 'has_perm', 'cars.view_car'], [9, 'render', None],
+                                         [20, 'check', 'cars.change_car']])
+        # keyword arguments are not assignments
+        self.assertEqual(scan['assignments'], [[13, 'permission', 'cars.change_car'], [14, 'required_permission', 'cars.delete_car']])
+        self.assertEqual(scan['attributes'], [[6, 'has_perm'], [17, 'request'], [17, 'user'], [17, 'is_superuser'], [20, 'check']])
+        self.assertEqual([comment[:2] for comment in scan['comments']], [[8, "# user.has_perm('cars.delete_car')"]])
+        self.assertEqual(scan['functions'], [['check', 2, 9], ['one_line', 17, 17], ['get', 19, 20]])
+
+    def test_scans_are_persistent(self):
+        scanner = SourceScanner(self.cache_dir)
+        scan = scanner.scan_source(SCANNED_SOURCE)
+        scanner.save()
+
+        scanner = SourceScanner(self.cache_dir)
+        self.assertEqual(scanner.scan_source(SCANNED_SOURCE), scan)
+        self.assertFalse(scanner.changed)
+
+    def test_cache_of_other_version_is_ignored(self):
+        scanner = SourceScanner(self.cache_dir)
+        scanner.scan_source(SCANNED_SOURCE)
+        scanner.save()
+        file_path = os.path.join(self.cache_dir, SourceScanner.FILE_NAME)
+
+        with open(file_path) as file:
+            content = json.load(file)
+
+        self.assertEqual(content['version'], SourceScanner.VERSION)
+        content['version'] = SourceScanner.VERSION - 1
+
+        with open(file_path, 'w') as file:
+            json.dump(content, file)
+
+        self.assertEqual(SourceScanner(self.cache_dir).data, {})
+
+
+PERMISSIONS_SOURCE = """
+class CarView(object):
+    permission = 'cars.change_car'
+
+    def get(self, request):
+        if request.user.has_perm('cars.view_car'):
+            return render(request, 'cars.html', permission='cars.add_car')
+
+        # permission = 'cars.delete_car'
+        return request.user.is_superuser
+"""
+
+PERMISSION_TESTS_SOURCE = """
+class PermissionTest(object):
+    def test_audited_pkg_views(self):
+        permission = 'cars.change_car'
+        self.check(permission='cars.view_car')
+        permission_path = 'audited_pkg.views'
+
+    def test_other(self):
+        # permission = 'cars.delete_car'
+        pass
+"""
+
+
+class PermissionAuditTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.create_package({
+            'audited_pkg/__init__.py': '',
+            'audited_pkg/views.py': PERMISSIONS_SOURCE,
+            'audited_pkg/tests/__init__.py': '',
+            'audited_pkg/tests/test_permissions.py': PERMISSION_TESTS_SOURCE,
+        })
+        cache_dir = self.create_temporary_dir()
+
+        class AuditMixin(MissingTestMixin):
+            CHECK_MODULES = ['audited_pkg']
+            CACHE_DIR = cache_dir
+
+        self.audit = AuditMixin()
+
+    def test_extract_permissions(self):
+        self.assertEqual(self.audit.extract_permissions('audited_pkg.views'), [
+            ('cars.change_car', 'audited_pkg.views', 'line 3'),
+            ('cars.view_car', 'audited_pkg.views', 'line 6'),
+            ('is_superuser', 'audited_pkg.views', 'line 10'),
+        ])
+
+    def test_extract_permission_tests(self):
+        self.assertEqual(self.audit.extract_permission_tests('audited_pkg.tests.test_permissions'), [
+            ['test_audited_pkg_views', ['cars.change_car'], 'audited_pkg.views'],
+            ['test_other', [], None],
+        ])
+
+
+COMMENTED_ASSERTS_SOURCE = """
+class CarTest(object):
+    def test_car(self):
+        # self.assertEqual(1, 1)
+        pass
+"""
+
+
+class IncrementalAuditTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.package_dir = self.create_package({
+            'incremental_pkg/__init__.py': '',
+            'incremental_pkg/tests/__init__.py': '',
+            'incremental_pkg/tests/test_cars.py': COMMENTED_ASSERTS_SOURCE,
+            'incremental_pkg/base.py': 'class BaseFilterSet(object):\n    pass\n',
+            'incremental_pkg/mixins.py': 'import os\nfrom .base import BaseFilterSet\n',
+            'incremental_pkg/filters.py': 'import django_filters\nfrom incremental_pkg.mixins import *\n',
+        })
+        self.cache_dir = self.create_temporary_dir()
+        self.calls = []
+        cache_dir = self.cache_dir
+
+        class AuditMixin(MissingTestMixin):
+            CHECK_MODULES = ['incremental_pkg']
+            CACHE_DIR = cache_dir
+            INCREMENTAL_AUDITS = True
+
+        self.audit_class = AuditMixin
+
+    def extract(self, module_name):
+        self.calls.append(module_name)
+        return {'calls': len(self.calls)}
+
+    def test_result_is_reused_while_source_does_not_change(self):
+        audit = self.audit_class()
+
+        self.assertEqual(audit.get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract), {'calls': 1})
+        self.assertEqual(audit.get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract), {'calls': 1})
+        self.assertEqual(audit.get_module_audit('other', 'incremental_pkg.tests.test_cars', self.extract), {'calls': 2})
+
+        self.write_files(self.package_dir, {'incremental_pkg/tests/test_cars.py': COMMENTED_ASSERTS_SOURCE + '\n'})
+        self.assertEqual(audit.get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract), {'calls': 3})
+
+    def test_imported_project_modules(self):
+        audit = self.audit_class()
+
+        self.assertEqual(audit.get_imported_project_modules('incremental_pkg.filters'), ['incremental_pkg.base', 'incremental_pkg.mixins'])
+        self.assertEqual(audit.get_imported_project_modules('incremental_pkg.base'), [])
+        self.assertNotIn('incremental_pkg', sys.modules)
+
+    def test_result_is_computed_again_when_imported_module_changes(self):
+        audit = self.audit_class()
+
+        self.assertEqual(audit.get_module_audit('filters', 'incremental_pkg.filters', self.extract, with_imports=True), {'calls': 1})
+        self.assertEqual(audit.get_module_audit('names', 'incremental_pkg.filters', self.extract), {'calls': 2})
+        self.assertEqual(audit.get_module_audit('filters', 'incremental_pkg.filters', self.extract, with_imports=True), {'calls': 1})
+
+        self.write_files(self.package_dir, {'incremental_pkg/base.py': 'class BaseFilterSet(object):\n    pass\n\n\nclass Other(object):\n    pass\n'})
+        self.assertEqual(audit.get_module_audit('filters', 'incremental_pkg.filters', self.extract, with_imports=True), {'calls': 3})
+        self.assertEqual(audit.get_module_audit('names', 'incremental_pkg.filters', self.extract), {'calls': 2})
+
+    def test_results_are_persistent(self):
+        audit = self.audit_class()
+        audit.get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract)
+        audit.save_audits()
+
+        manifest = AuditManifest(self.cache_dir)
+        self.assertEqual(manifest.get_result('names', 'incremental_pkg.tests.test_cars', self.extract), {'calls': 1})
+        self.assertEqual(self.calls, ['incremental_pkg.tests.test_cars'])
+
+    def test_static_results_are_separate(self):
+        self.audit_class().get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract)
+        self.audit_class.STATIC_AUDITS = True
+        self.audit_class().get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract)
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_without_incremental_audits(self):
+        self.audit_class.INCREMENTAL_AUDITS = False
+        audit = self.audit_class()
+        audit.get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract)
+        audit.get_module_audit('names', 'incremental_pkg.tests.test_cars', self.extract)
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_missing_module(self):
+        with self.assertRaises(ModuleNotFoundError):
+            self.audit_class().get_module_audit('names', 'incremental_pkg.missing', self.extract)
+
+    def test_for_commented_asserts(self):
+        class AuditCase(self.audit_class, SimpleTestCase):
+            pass
+
+        for i in range(2):
+            with self.assertRaisesRegex(AssertionError, 'incremental_pkg.tests.test_cars'):
+                AuditCase('test_for_commented_asserts').test_for_commented_asserts()
+
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, AuditManifest.FILE_NAME)))
+
+
+STATIC_BASES_SOURCE = """
+import django_filters as df
+from django_filters import FilterSet as BaseSet
+from django.db.models import Manager
+from .filters import ProjectFilterSet
+from static_pkg import filters
+
+
+class AliasedFilterSet(df.FilterSet):
+    def filter_title(self, queryset, name, value):
+        return queryset
+
+
+class ImportedFilterSet(BaseSet):
+    pass
+
+
+class LocalFilterSet(ImportedFilterSet):
+    def filter_year(self, queryset, name, value):
+        return queryset
+
+
+class ProjectSubclassFilterSet(ProjectFilterSet):
+    pass
+
+
+class ModuleFilter(filters.ProjectFilter):
+    pass
+
+
+class NotFilter(Manager):
+    pass
+
+
+class TestFilter(object):
+    pass
+"""
+
+STATIC_FILTERS_SOURCE = """
+import django_filters
+
+
+class ProjectFilterSet(django_filters.FilterSet):
+    pass
+
+
+class ProjectFilter(django_filters.CharFilter):
+    pass
+"""
+
+
+class StaticModuleMembersTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.package_dir = self.create_package({
+            'static_pkg/__init__.py': 'from .filters import *\n',
+            'static_pkg/filters.py': STATIC_FILTERS_SOURCE,
+            'static_pkg/views.py': STATIC_BASES_SOURCE,
+            'static_pkg/tests/__init__.py': '',
+            'static_pkg/tests/test_views.py': 'from .. import *\n\n\nclass StarFilterSet(ProjectFilterSet):\n    pass\n',
+        })
+        self.addCleanup(StaticModuleMembers._modules.clear)
+
+    def get_members(self, path, module_name, is_package=False):
+        with open(os.path.join(self.package_dir, *path.split('/')), 'rb') as file:
+            return StaticModuleMembers(file.read(), module_name, is_package)
+
+    def test_bases_are_resolved_through_imports(self):
+        members = self.get_members('static_pkg/views.py', 'static_pkg.views')
+
+        self.assertEqual(members.filtersets, {
+            'AliasedFilterSet': ['filter_title'],
+            'ImportedFilterSet': [],
+            'LocalFilterSet': ['filter_year'],
+            'ProjectSubclassFilterSet': [],
+        })
+        self.assertEqual(members.filters, {'ModuleFilter'})
+
+    def test_star_imports(self):
+        members = self.get_members('static_pkg/tests/test_views.py', 'static_pkg.tests.test_views')
+        self.assertEqual(set(members.filtersets.keys()), {'StarFilterSet'})
+
+    def test_get_import_module(self):
+        node = ast.parse('from ..filters import ProjectFilterSet').body[0]
+
+        self.assertEqual(StaticModuleMembers.get_import_module(node, 'static_pkg.tests.test_views'), 'static_pkg.filters')
+        self.assertEqual(StaticModuleMembers.get_import_module(node, 'static_pkg.tests', is_package=True), 'static_pkg.filters')
+        self.assertEqual(StaticModuleMembers.get_import_module(ast.parse('from . import views').body[0], 'static_pkg.filters'), 'static_pkg')
+
+    def test_audited_module_is_not_imported(self):
+        self.get_members('static_pkg/filters.py', 'static_pkg.filters')
+        self.assertNotIn('static_pkg.filters', sys.modules)
+
+    def test_modules_of_bases_are_not_imported(self):
+        self.get_members('static_pkg/views.py', 'static_pkg.views')
+        self.get_members('static_pkg/tests/test_views.py', 'static_pkg.tests.test_views')
+
+        self.assertNotIn('static_pkg', sys.modules)
+        self.assertNotIn('static_pkg.filters', sys.modules)
+
+    def test_modules_of_bases_are_parsed_again_when_changed(self):
+        self.assertEqual(self.get_members('static_pkg/views.py', 'static_pkg.views').filters, {'ModuleFilter'})
+
+        self.write_files(self.package_dir, {'static_pkg/filters.py': STATIC_FILTERS_SOURCE.replace('django_filters.CharFilter', 'object') + '\n'})
+        self.assertEqual(self.get_members('static_pkg/views.py', 'static_pkg.views').filters, set())
+
+    def test_unknown_bases(self):
+        source = 'from static_pkg.missing import MissingFilterSet\nfrom static_pkg import *\n\n\n' \
+                 'class A(MissingFilterSet):\n    pass\n\n\nclass B(UnknownFilterSet):\n    pass\n\n\nclass C(ProjectFilterSet):\n    pass\n'
+        members = StaticModuleMembers(source, 'static_pkg.other')
+
+        self.assertEqual(set(members.filtersets.keys()), {'C'})
+        self.assertEqual(members.filters, set())
+
+    def test_members_are_keyed_by_source(self):
+        class AuditMixin(MissingTestMixin):
+            STATIC_AUDITS = True
+
+        audit = AuditMixin()
+        members = audit.get_static_module_members('static_pkg.filters')
+        self.assertIs(audit.get_static_module_members('static_pkg.filters'), members)
+
+        self.write_files(self.package_dir, {'static_pkg/filters.py': STATIC_FILTERS_SOURCE + '\n\ndef helper():\n    pass\n'})
+        changed_members = audit.get_static_module_members('static_pkg.filters')
+        self.assertIsNot(changed_members, members)
+        self.assertEqual(changed_members.functions, {'helper'})
+
+
+class AuditCommandTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.create_package({
+            'command_pkg/__init__.py': '',
+            'command_pkg/tests/__init__.py': '',
+            'command_pkg/tests/test_cars.py': COMMENTED_ASSERTS_SOURCE,
+        })
+        self.cache_dir = self.create_temporary_dir()
+
+    def call_audit(self, *args):
+        stdout = StringIO()
+        call_command('kaskader_audit', 'command_pkg', '--cache-dir', self.cache_dir, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_failed_audit(self):
+        with self.assertRaisesRegex(CommandError, '1 audits failed: commented_asserts'):
+            self.call_audit('--audit', 'commented_asserts')
+
+    def test_passed_audit(self):
+        self.assertIn('signals: OK', self.call_audit('--audit', 'signals'))
+
+    def test_class_is_set_up_and_torn_down(self):
+        calls = []
+
+        with mock.patch.object(MissingTestMixin, 'setUpClass', classmethod(lambda cls: calls.append('setUpClass')), create=True), \
+                mock.patch.object(MissingTestMixin, 'tearDownClass', classmethod(lambda cls: calls.append('tearDownClass')), create=True):
+            self.call_audit('--audit', 'signals')
+
+        self.assertEqual(calls, ['setUpClass', 'tearDownClass'])
@@ -0,0 +1,167 @@
+from django.test import SimpleTestCase
+
+from cars.models import CarBrand, BrandModel, Car
+from kaskader.tests.dependency import sort_dependency, find_cycle, get_dependency_closure
+from kaskader.tests.generators import GenericBaseMixin
+
+
+def node(required=(), not_required=()):
+    return {'required': set(required), 'not_required': set(not_required)}
+
+
+class FindCycleTest(SimpleTestCase):
+    def test_without_cycle(self):
+        self.assertIsNone(find_cycle(['a', 'b', 'c'], {'a': ['b'], 'b': ['c'], 'c': []}))
+
+    def test_cycle_path(self):
+        edges = {'a': ['b'], 'b': ['c'], 'c': ['d'], 'd': ['b']}
+        self.assertEqual(find_cycle(['a', 'b', 'c', 'd'], edges), ['b', 'c', 'd', 'b'])
+
+    def test_self_cycle(self):
+        self.assertEqual(find_cycle(['a'], {'a': ['a']}), ['a', 'a'])
+
+    def test_nodes_outside_graph_are_ignored(self):
+        self.assertIsNone(find_cycle(['a'], {'a': ['b']}))
+
+
+class DependencyClosureTest(SimpleTestCase):
+    def test_transitive_dependencies(self):
+        closure = get_dependency_closure({
+            'car': {'model': 'model'},
+            'model': {'brand': 'brand'},
+            'brand': {},
+        })
+
+        self.assertEqual(closure['car'], {'model': ('model',), 'brand': ('model', 'brand')})
+        self.assertEqual(closure['model'], {'brand': ('brand',)})
+        self.assertEqual(closure['brand'], {})
+
+    def test_shortest_chain(self):
+        closure = get_dependency_closure({
+            'car': {'model': 'model', 'brand': 'brand'},
+            'model': {'brand': 'model_brand'},
+            'brand': {},
+        })
+
+        self.assertEqual(closure['car']['brand'], ('brand',))
+
+    def test_cycle_contains_node(self):
+        closure = get_dependency_closure({
+            'a': {'b': 'b'},
+            'b': {'a': 'a'},
+            'c': {'a': 'a'},
+        })
+
+        self.assertEqual(closure['a'], {'b': ('b',), 'a': ('b', 'a')})
+        self.assertEqual(closure['c'], {'a': ('a',), 'b': ('a', 'b')})
+        self.assertNotIn('c', closure['c'])
+
+    def test_missing_nodes(self):
+        # dependencies without own entry have no further dependencies
+        self.assertEqual(get_dependency_closure({'a': {'b': None}}), {'a': {'b': (None,)}})
+
+
+class SortDependencyTest(SimpleTestCase):
+    def sort(self, dependency):
+        return list(sort_dependency(dependency, key=str).keys())
+
+    def test_dependencies_first(self):
+        dependency = {
+            'car': node(required=['model']),
+            'model': node(required=['brand']),
+            'brand': node(),
+            'accessory': node(),
+        }
+
+        self.assertEqual(self.sort(dependency), ['accessory', 'brand', 'model', 'car'])
+
+    def test_independent_nodes_are_sorted_by_key(self):
+        self.assertEqual(self.sort({'c': node(), 'a': node(), 'b': node()}), ['a', 'b', 'c'])
+
+    def test_optional_dependencies_are_respected(self):
+        dependency = {
+            'a': node(not_required=['b']),
+            'b': node(),
+        }
+
+        self.assertEqual(self.sort(dependency), ['b', 'a'])
+
+    def test_optional_cycle_is_broken(self):
+        dependency = {
+            'a': node(not_required=['b']),
+            'b': node(not_required=['a']),
+            'c': node(required=['a']),
+        }
+
+        self.assertEqual(self.sort(dependency), ['a', 'b', 'c'])
+
+    def test_optional_cycle_is_broken_at_node_without_required_dependency(self):
+        dependency = {
+            'a': node(required=['c'], not_required=['b']),
+            'b': node(not_required=['a']),
+            'c': node(),
+        }
+
+        self.assertEqual(self.sort(dependency), ['c', 'a', 'b'])
+
+    def test_self_dependency_is_ignored(self):
+        self.assertEqual(self.sort({'a': node(required=['a'], not_required=['a'])}), ['a'])
+
+    def test_unknown_dependencies_are_ignored(self):
+        self.assertEqual(self.sort({'a': node(required=['missing'])}), ['a'])
+
+    def test_required_cycle(self):
+        dependency = {
+            'a': node(),
+            'b': node(required=['c']),
+            'c': node(required=['d']),
+            'd': node(required=['b']),
+        }
+
+        with self.assertRaisesRegex(ValueError, r'^Circular dependency of models b -> c -> d -> b$'):
+            self.sort(dependency)
+
+    def test_required_cycle_path_uses_direct_dependencies(self):
+        # transitive dependencies are part of required, cycle path is built only from chains of length 1
+        dependency = {
+            'b': dict(node(required=['b', 'c']), required_chains={'c': ('field_c',), 'b': ('field_c', 'field_b')}),
+            'c': dict(node(required=['b', 'c']), required_chains={'b': ('field_b',), 'c': ('field_b', 'field_c')}),
+        }
+
+        with self.assertRaisesRegex(ValueError, r'^Circular dependency of models b -> c -> b$'):
+            self.sort(dependency)
+
+
+class DependencyMixin(GenericBaseMixin):
+    @classmethod
+    def get_models(cls):
+        return [Car, CarBrand, BrandModel]
+
+
+class SortedModelsDependencyTest(SimpleTestCase):
+    def test_required_chains(self):
+        dependency = DependencyMixin.get_models_dependency()
+
+        self.assertEqual(dependency[Car]['required_chains'][BrandModel], (Car._meta.get_field('model'),))
+        self.assertEqual(dependency[Car]['required_chains'][CarBrand], (Car._meta.get_field('model'), BrandModel._meta.get_field('brand')))
+        self.assertEqual(dependency[Car]['required'], set(dependency[Car]['required_chains'].keys()))
+
+    def test_manual_dependency(self):
+        class ManualDependencyMixin(DependencyMixin):
+            @classmethod
+            def manual_model_dependency(cls):
+                return {CarBrand: [Car]}
+
+        dependency = ManualDependencyMixin.get_models_dependency()
+        self.assertEqual(dependency[CarBrand]['required_chains'][Car], (None,))
+
+        with self.assertRaisesRegex(ValueError, 'Circular dependency of models'):
+            ManualDependencyMixin.get_sorted_models_dependency(required_only=True)
+
+    def test_models_order(self):
+        models = list(DependencyMixin.get_sorted_models_dependency(required_only=True).keys())
+        self.assertLess(models.index(CarBrand), models.index(BrandModel))
+        self.assertLess(models.index(BrandModel), models.index(Car))
+
+        reversed_models = list(DependencyMixin.get_sorted_models_dependency(required_only=True, reverse=True).keys())
+        self.assertEqual(reversed_models, list(reversed(models)))
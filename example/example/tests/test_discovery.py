@@ -0,0 +1,237 @@
+import importlib
+import os
+import sys
+
+from django.test import SimpleTestCase
+
+from example.tests.utils import TemporaryPackageMixin
+from django.urls import path
+
+from cars.models import CarBrand, BrandModel, Car
+from cars.views import CarListView
+from kaskader.tests.discovery import ModuleIndex, ModuleMembers, IntrospectionIndex, DiscoveryRegistry, IdentityKey
+from kaskader.tests.generators import GenericBaseMixin
+
+
+class ModuleIndexTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.package_dir = self.create_package({
+            'indexed_pkg/__init__.py': '',
+            'indexed_pkg/models.py': '',
+            'indexed_pkg/views.py': '',
+            'indexed_pkg/sub/__init__.py': '',
+            'indexed_pkg/sub/models.py': '',
+            'indexed_pkg/tests/__init__.py': '',
+            'indexed_pkg/tests/test_models.py': '',
+        })
+        self.cache_dir = self.create_temporary_dir()
+
+    def test_get_submodule_names(self):
+        module_index = ModuleIndex(self.cache_dir)
+
+        self.assertEqual(module_index.get_submodule_names(['indexed_pkg'], ['models'], ['tests']),
+                         {'indexed_pkg.models', 'indexed_pkg.sub.models'})
+        self.assertEqual(module_index.get_submodule_names(['indexed_pkg'], ['models'], []),
+                         {'indexed_pkg.models', 'indexed_pkg.sub.models', 'indexed_pkg.tests.test_models'})
+
+    def test_package_is_not_imported(self):
+        ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg'], ['views'], [])
+        self.assertNotIn('indexed_pkg', sys.modules)
+
+    def test_index_is_persistent(self):
+        ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg'], ['models'], [])
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, ModuleIndex.FILE_NAME)))
+
+        module_index = ModuleIndex(self.cache_dir)
+        self.assertIn('indexed_pkg', module_index.packages)
+        self.assertEqual(module_index.get_submodule_names(['indexed_pkg'], ['views'], []), {'indexed_pkg.views'})
+        self.assertFalse(module_index.changed)
+
+    def test_changed_directory_is_listed_again(self):
+        ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg'], ['models'], [])
+
+        sub_dir = os.path.join(self.package_dir, 'indexed_pkg', 'sub')
+        self.write_files(self.package_dir, {'indexed_pkg/sub/views.py': ''})
+        stat = os.stat(sub_dir)
+        os.utime(sub_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertEqual(ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg'], ['views'], []),
+                         {'indexed_pkg.views', 'indexed_pkg.sub.views'})
+
+    def test_removed_package_is_forgotten(self):
+        ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg'], ['models'], [])
+
+        for file_name in os.listdir(os.path.join(self.package_dir, 'indexed_pkg', 'sub')):
+            os.remove(os.path.join(self.package_dir, 'indexed_pkg', 'sub', file_name))
+
+        os.rmdir(os.path.join(self.package_dir, 'indexed_pkg', 'sub'))
+        package_dir = os.path.join(self.package_dir, 'indexed_pkg')
+        stat = os.stat(package_dir)
+        os.utime(package_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertEqual(ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg'], ['models'], []),
+                         {'indexed_pkg.models', 'indexed_pkg.tests.test_models'})
+
+    def test_unknown_package(self):
+        module_index = ModuleIndex(self.cache_dir)
+
+        with self.assertRaisesRegex(ModuleNotFoundError, 'missing_pkg'):
+            module_index.get_submodule_names(['missing_pkg'], ['models'], [])
+
+    def test_removed_package_is_dropped_from_index(self):
+        ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg'], ['models'], [])
+        os.rename(os.path.join(self.package_dir, 'indexed_pkg'), os.path.join(self.package_dir, 'renamed_pkg'))
+        importlib.invalidate_caches()
+        module_index = ModuleIndex(self.cache_dir)
+
+        with self.assertRaisesRegex(ModuleNotFoundError, 'indexed_pkg'):
+            module_index.get_submodule_names(['indexed_pkg'], ['models'], [])
+
+        self.assertNotIn('indexed_pkg', ModuleIndex(self.cache_dir).packages)
+
+    def test_module_which_is_not_package(self):
+        self.assertEqual(ModuleIndex(self.cache_dir).get_submodule_names(['indexed_pkg.views'], ['models'], []), set())
+
+
+MEMBERS_SOURCE = '''
+import django_filters
+from django.db.models import Manager
+from os.path import join
+
+
+class CarFilter(django_filters.CharFilter):
+    pass
+
+
+class CarFilterSet(django_filters.FilterSet):
+    def filter_title(self, queryset, name, value):
+        return queryset
+
+
+class CarManager(Manager):
+    pass
+
+
+class CarTest(object):
+    def test_first(self):
+        pass
+
+    def helper(self):
+        pass
+
+
+def local_function():
+    pass
+'''
+
+
+class ModuleMembersTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.create_package({'members_pkg/__init__.py': '', 'members_pkg/module.py': MEMBERS_SOURCE})
+        self.module = importlib.import_module('members_pkg.module')
+        self.addCleanup(IntrospectionIndex.clear)
+
+    def test_members(self):
+        members = ModuleMembers(self.module)
+
+        self.assertEqual({klass.__name__ for klass in members.classes}, {'CarFilter', 'CarFilterSet', 'CarManager', 'CarTest'})
+        self.assertEqual({function.__name__ for function in members.functions}, {'local_function'})
+        self.assertEqual({klass.__name__ for klass in members.filtersets}, {'CarFilterSet'})
+        self.assertEqual({klass.__name__ for klass in members.filters}, {'CarFilter'})
+        self.assertEqual({test.__name__ for test in members.tests}, {'test_first'})
+        self.assertIn('Manager', members.namespace_classes)
+        self.assertNotIn('join', {function.__name__ for function in members.functions})
+
+    def test_members_are_shared(self):
+        members = IntrospectionIndex.get_module_members(self.module)
+        self.assertIs(IntrospectionIndex.get_module_members(self.module), members)
+
+        IntrospectionIndex.clear()
+        self.assertIsNot(IntrospectionIndex.get_module_members(self.module), members)
+
+
+class DiscoveryMixin(GenericBaseMixin):
+    CHECK_MODULES = ['cars']
+    EXCLUDE_MODULES = ['migrations', 'tests']
+    _models = None
+    _urls = None
+
+
+class DiscoveryRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(DiscoveryRegistry.clear)
+        DiscoveryRegistry.clear()
+
+    def test_make_key(self):
+        urls = [path('cars/', CarListView.as_view())]
+
+        self.assertEqual(DiscoveryRegistry.make_key(['a', ['b'], {'c': {1, 2}}]), ('a', ('b',), (('c', frozenset({1, 2})),)))
+        value = bytearray(b'a')
+        self.assertEqual(DiscoveryRegistry.make_key(value), IdentityKey(value))
+        self.assertNotEqual(DiscoveryRegistry.make_key(value), IdentityKey(bytearray(b'a')))
+        self.assertEqual(IdentityKey(urls), IdentityKey(urls))
+        self.assertNotEqual(IdentityKey(urls), IdentityKey(list(urls)))
+
+    def test_models_are_shared(self):
+        class FirstMixin(DiscoveryMixin):
+            pass
+
+        class SecondMixin(DiscoveryMixin):
+            pass
+
+        calls = []
+
+        def collect():
+            calls.append(True)
+            return [CarBrand, BrandModel, Car]
+
+        self.assertEqual(FirstMixin.get_discovered('_models', collect), [CarBrand, BrandModel, Car])
+        self.assertEqual(SecondMixin.get_discovered('_models', collect), [CarBrand, BrandModel, Car])
+        self.assertEqual(len(calls), 1)
+
+    def test_copies_are_returned(self):
+        class FirstMixin(DiscoveryMixin):
+            pass
+
+        class SecondMixin(DiscoveryMixin):
+            pass
+
+        FirstMixin.get_models().append(None)
+
+        self.assertNotIn(None, SecondMixin.get_models())
+        self.assertIsNot(FirstMixin.get_models(), SecondMixin.get_models())
+
+    def test_overridden_discovery_methods_are_part_of_key(self):
+        class DefaultMixin(DiscoveryMixin):
+            pass
+
+        class AppsMixin(DiscoveryMixin):
+            @classmethod
+            def apps_to_check(cls):
+                return []
+
+        class ModelsMixin(DiscoveryMixin):
+            @classmethod
+            def collect_models(cls, target_attr='_models'):
+                return [Car]
+
+        self.assertIn(Car, DefaultMixin.get_models())
+        self.assertNotEqual(AppsMixin.get_discovery_key(), DefaultMixin.get_discovery_key())
+        self.assertEqual(ModelsMixin.get_models(), [Car])
+
+    def test_get_urls_key(self):
+        first_urls = [path('cars/', CarListView.as_view(), name='first')]
+        second_urls = [path('cars/', CarListView.as_view(), name='second')]
+
+        class FirstMixin(DiscoveryMixin):
+            pass
+
+        class SecondMixin(DiscoveryMixin):
+            pass
+
+        # list of namespaces is not hashable
+        first = FirstMixin.get_urls(urls=first_urls, exclude_namespace=['admin'])
+        second = SecondMixin.get_urls(urls=second_urls, exclude_namespace=['admin'])
+
+        self.assertEqual([url['url_name'] for url in first], ['first'])
+        self.assertEqual([url['url_name'] for url in second], ['second'])
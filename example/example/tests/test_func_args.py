@@ -0,0 +1,63 @@
+from django.test import SimpleTestCase
+
+from kaskader.tests.generators import BaseMixin
+
+
+class Subject(object):
+    def method(self, car, color='BLACK', *args, owner, note=None, **kwargs):
+        pass
+
+    @classmethod
+    def class_method(cls, car, *, owner):
+        pass
+
+
+def function(car, color='BLACK'):
+    pass
+
+
+class FuncArgsMixin(BaseMixin):
+    @classmethod
+    def get_models_by_name(cls):
+        return {'owner': 'owner model', 'note': 'note model'}
+
+    @classmethod
+    def get_generated_obj(cls, model=None, obj_name=None):
+        return 'generated {}'.format(model)
+
+
+class FuncArgsPlanTest(SimpleTestCase):
+    def setUp(self):
+        self.plans = dict(BaseMixin._func_args_plans)
+        BaseMixin._func_args_plans.clear()
+
+    def tearDown(self):
+        BaseMixin._func_args_plans.clear()
+        BaseMixin._func_args_plans.update(self.plans)
+
+    def test_function(self):
+        self.assertEqual(FuncArgsMixin.get_func_args_plan(function), (('car',), (), ('color',)))
+
+    def test_keyword_only_parameters(self):
+        self.assertEqual(FuncArgsMixin.get_func_args_plan(Subject.method), (('self', 'car'), ('owner',), ('color', 'note')))
+
+    def test_bound_method_after_function(self):
+        FuncArgsMixin.get_func_args_plan(Subject.method)
+        self.assertEqual(FuncArgsMixin.get_func_args_plan(Subject().method), (('car',), ('owner',), ('color', 'note')))
+
+    def test_function_after_bound_method(self):
+        FuncArgsMixin.get_func_args_plan(Subject().method)
+        self.assertEqual(FuncArgsMixin.get_func_args_plan(Subject.method), (('self', 'car'), ('owner',), ('color', 'note')))
+
+    def test_class_method(self):
+        self.assertEqual(FuncArgsMixin.get_func_args_plan(Subject.class_method), (('car',), ('owner',), ()))
+
+    def test_plan_is_cached_per_function(self):
+        FuncArgsMixin.get_func_args_plan(Subject().method)
+        FuncArgsMixin.get_func_args_plan(Subject().method)
+        self.assertEqual(list(BaseMixin._func_args_plans.keys()), [Subject.method])
+
+    def test_generate_func_args(self):
+        self.assertEqual(FuncArgsMixin.generate_func_args(Subject().method, {'car': 1}),
+                         {'car': 1, 'owner': 'generated owner model', 'note': 'generated note model'})
+        self.assertEqual(FuncArgsMixin.generate_func_args(Subject.class_method), {'owner': 'generated owner model'})
@@ -0,0 +1,377 @@
+import json
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User, Group
+from django.core import serializers
+from django.core.files.storage import default_storage, storages, InMemoryStorage
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.test import TestCase, SimpleTestCase
+
+from cars.models import CarBrand, BrandModel, Car
+from example.tests.utils import TemporaryPackageMixin
+import kaskader
+from kaskader.tests.generators import GenericBaseMixin
+from kaskader.tests.tracking import sequences, row_counter, get_savepoint, rollback_to_savepoint, ObjsSnapshot
+
+
+def get_snapshot_brand_title():
+    return 'Snapshot'
+
+
+class GenerationMixin(GenericBaseMixin):
+    CHECK_MODULES = ['cars']
+    EXCLUDE_MODULES = ['commands', 'migrations', 'settings', 'tests', 'cars.kaskader']
+    IGNORE_MODEL_FIELDS = {
+        Car: ['created', 'modified'],
+    }
+
+
+class GenerationTestCase(TestCase):
+    def setUp(self):
+        # generated objects and counted rows are forgotten with rolled back test transaction
+        self.addCleanup(rollback_to_savepoint, get_savepoint())
+
+        class Mixin(GenerationMixin):
+            objs = OrderedDict()
+
+        self.mixin = Mixin
+
+
+class BulkCreateTest(GenerationTestCase):
+    def test_can_bulk_create(self):
+        self.assertTrue(self.mixin.can_bulk_create(CarBrand))
+        self.assertFalse(self.mixin.can_bulk_create(User))
+
+        self.mixin.BULK_CREATE_OBJS = False
+        self.assertFalse(self.mixin.can_bulk_create(CarBrand))
+
+    def test_custom_generate_obj_disables_bulk_create(self):
+        class CustomMixin(self.mixin):
+            @classmethod
+            def generate_obj(cls, model, field_values=None, **kwargs):
+                return super().generate_obj(model, field_values, **kwargs)
+
+        self.assertFalse(CustomMixin.can_bulk_create(CarBrand))
+
+    def test_bulk_generate_objs(self):
+        objs = self.mixin.bulk_generate_objs(CarBrand, [({}, False), ({}, False), ({'title': 'Skoda'}, False)])
+
+        self.assertEqual(len(objs), 3)
+        self.assertTrue(all([obj.pk for obj in objs]))
+        self.assertEqual(len({obj.title for obj in objs}), 3)
+        self.assertEqual(objs[2].title, 'Skoda')
+        self.assertEqual(CarBrand.objects.count(), 3)
+        self.assertEqual(row_counter.get(CarBrand), 3)
+
+    def test_generate_model_objs(self):
+        with mock.patch.object(self.mixin, 'bulk_generate_objs', wraps=self.mixin.bulk_generate_objs) as bulk_generate_objs:
+            objs = self.mixin.generate_model_objs(CarBrand)
+
+        bulk_generate_objs.assert_called_once()
+        self.assertEqual(self.mixin.objs['carbrand'], objs[0])
+
+    def test_unique_relations_get_own_related_objects(self):
+        # brand is part of unique_together of BrandModel, every object of batch gets its own brand
+        self.mixin.generate_model_objs(CarBrand)
+        objs = self.mixin.bulk_generate_objs(BrandModel, [({}, False), ({}, False), ({}, False)])
+
+        self.assertEqual(len({obj.brand_id for obj in objs}), 3)
+        self.assertEqual(BrandModel.objects.count(), 3)
+
+    def test_database_error_falls_back_to_generate_obj(self):
+        stdout = StringIO()
+
+        with mock.patch.object(CarBrand._default_manager, 'bulk_create', side_effect=IntegrityError('duplicate title')), \
+                redirect_stdout(stdout):
+            objs = self.mixin.bulk_generate_objs(CarBrand, [({}, False), ({}, False)])
+
+        self.assertIn('Bulk create of cars.CarBrand failed, generating objects one by one: duplicate title', stdout.getvalue())
+        self.assertEqual(CarBrand.objects.count(), 2)
+        self.assertEqual([obj.pk for obj in objs], list(CarBrand.objects.order_by('pk').values_list('pk', flat=True)))
+
+    def test_other_errors_are_raised(self):
+        with mock.patch.object(CarBrand._default_manager, 'bulk_create', side_effect=ValueError('bug')):
+            with self.assertRaisesRegex(ValueError, 'bug'):
+                self.mixin.bulk_generate_objs(CarBrand, [({}, False)])
+
+
+class InMemoryStorageTest(SimpleTestCase):
+    def setUp(self):
+        class StorageCase(GenerationMixin, SimpleTestCase):
+            IN_MEMORY_STORAGE = True
+
+        self.case_class = StorageCase
+
+    def get_default_storage_class(self):
+        # default_storage is lazy object, storages are reset by setting_changed signal
+        return type(storages['default'])
+
+    def test_default_storage_is_in_memory_during_class(self):
+        self.case_class.setUpClass()
+
+        try:
+            self.assertIs(self.get_default_storage_class(), InMemoryStorage)
+            name = default_storage.save('kaskader/test.pdf', self.case_class.get_pdf_file_mock())
+            self.assertTrue(default_storage.exists(name))
+        finally:
+            self.case_class.tearDownClass()
+
+        self.assertIsNot(self.get_default_storage_class(), InMemoryStorage)
+        self.assertFalse(default_storage.exists(name))
+        self.assertIsNone(self.case_class.storage_override)
+
+    def test_default_storage_without_flag(self):
+        self.case_class.IN_MEMORY_STORAGE = False
+        self.case_class.setUpClass()
+
+        try:
+            self.assertIsNot(self.get_default_storage_class(), InMemoryStorage)
+        finally:
+            self.case_class.tearDownClass()
+
+    def test_other_storages_are_kept(self):
+        storage_settings = self.case_class.get_in_memory_storage_settings()
+
+        self.assertEqual(storage_settings['STORAGES']['default'], {'BACKEND': 'django.core.files.storage.InMemoryStorage'})
+        self.assertEqual(storage_settings['STORAGES']['staticfiles'], settings.STORAGES['staticfiles'])
+
+    def test_override_is_disabled_when_set_up_fails(self):
+        with mock.patch.object(SimpleTestCase, 'setUpClass', side_effect=RuntimeError('set up failed')):
+            with self.assertRaisesRegex(RuntimeError, 'set up failed'):
+                self.case_class.setUpClass()
+
+        self.assertIsNot(self.get_default_storage_class(), InMemoryStorage)
+
+    def test_file_mock_content_is_read_once(self):
+        self.case_class._file_mock_contents = {}
+        first = self.case_class.get_pdf_file_mock()
+
+        with mock.patch('builtins.open', side_effect=AssertionError('file is read again')):
+            second = self.case_class.get_pdf_file_mock()
+
+        self.assertEqual(first.read(), second.read())
+        self.assertIsNot(first, second)
+
+
+class SnapshotTest(TemporaryPackageMixin, TestCase):
+    def setUp(self):
+        self.addCleanup(rollback_to_savepoint, get_savepoint())
+        cache_dir = self.create_temporary_dir()
+
+        class SnapshotCase(GenerationMixin, TestCase):
+            SNAPSHOT_OBJS = True
+            CACHE_DIR = cache_dir
+            objs = OrderedDict()
+
+        self.case_class = SnapshotCase
+        self.existing_brand = CarBrand.objects.create(title='Existing')
+
+    def get_snapshot(self):
+        return ObjsSnapshot.get(self.case_class.CACHE_DIR).get_snapshot(self.case_class.get_snapshot_name(), self.case_class.get_snapshot_key())
+
+    def generate_and_rollback(self):
+        # generates objects and saves snapshot, then generated rows are removed like by rollback of test class transaction
+        savepoint = transaction.savepoint()
+        tracking_savepoint = get_savepoint()
+        self.case_class.setUpTestData()
+        generated = {obj_name: (type(obj), obj.pk) for obj_name, obj in self.case_class.objs.items()}
+
+        transaction.savepoint_rollback(savepoint)
+        rollback_to_savepoint(tracking_savepoint)
+        self.case_class.objs.clear()
+        return generated
+
+    def test_round_trip(self):
+        generated = self.generate_and_rollback()
+        snapshot = self.get_snapshot()
+
+        self.assertTrue(generated)
+        self.assertNotIn(['cars.carbrand', self.existing_brand.pk], [[obj['model'], obj['pk']] for obj in snapshot['objects']])
+        self.assertFalse(Car.objects.exists())
+
+        with mock.patch.object(self.case_class, 'generate_objs') as generate_objs:
+            self.case_class.setUpTestData()
+
+        generate_objs.assert_not_called()
+        self.assertEqual({obj_name: (type(obj), obj.pk) for obj_name, obj in self.case_class.objs.items()}, generated)
+        self.assertEqual(CarBrand.objects.count(), len([obj for obj in snapshot['objects'] if obj['model'] == 'cars.carbrand']) + 1)
+
+    def test_sequences_are_advanced_for_all_models(self):
+        # unnamed volume objects have higher pks than named objects
+        self.case_class.VOLUME_OBJS = {CarBrand: 3}
+        self.generate_and_rollback()
+        snapshot = self.get_snapshot()
+
+        # ids are read before snapshot is loaded
+        sequences.clear()
+        brand_id = sequences.get(CarBrand)
+        self.case_class.load_objs_snapshot()
+
+        brand_pks = [obj['pk'] for obj in snapshot['objects'] if obj['model'] == 'cars.carbrand']
+        self.assertEqual(len(brand_pks), len([obj_name for obj_name, (label, pk) in snapshot['objs'].items() if label == 'cars.CarBrand']) + 3)
+        self.assertLess(brand_id, max(brand_pks))
+        self.assertEqual(sequences.get(CarBrand), max(brand_pks) + 1)
+
+    def test_rows_created_by_generate_obj_are_saved(self):
+        # rows saved one by one are recorded by post_save, bulk inserted rows by generator
+        self.case_class.BULK_CREATE_OBJS = False
+        self.generate_and_rollback()
+        labels = {obj['model'] for obj in self.get_snapshot()['objects']}
+
+        self.assertEqual(labels, {'cars.carbrand', 'cars.brandmodel', 'cars.car'})
+
+    def test_snapshot_is_disabled_without_sources(self):
+        stdout = StringIO()
+
+        with mock.patch('inspect.getsource', side_effect=OSError('could not get source code')), redirect_stdout(stdout):
+            self.assertIsNone(self.case_class.get_snapshot_key())
+
+            with mock.patch.object(self.case_class, 'generate_objs') as generate_objs:
+                self.case_class.setUpTestData()
+
+        generate_objs.assert_called_once()
+        self.assertIn('Snapshot of generated objects is disabled', stdout.getvalue())
+        self.assertEqual(ObjsSnapshot.get(self.case_class.CACHE_DIR).data, {})
+
+    def test_invalid_snapshot_is_reported(self):
+        snapshot = ObjsSnapshot.get(self.case_class.CACHE_DIR)
+        snapshot.set_snapshot(self.case_class.get_snapshot_name(), self.case_class.get_snapshot_key(),
+                              [{'model': 'cars.missing', 'pk': 1, 'fields': {}}], {})
+        stdout = StringIO()
+
+        with redirect_stdout(stdout):
+            self.assertFalse(self.case_class.load_objs_snapshot())
+
+        self.assertIn('Failed to load snapshot of generated objects', stdout.getvalue())
+
+    def test_rows_are_loaded_without_signals(self):
+        generated = self.generate_and_rollback()
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=CarBrand, dispatch_uid='snapshot_test')
+        self.addCleanup(post_save.disconnect, sender=CarBrand, dispatch_uid='snapshot_test')
+
+        self.assertTrue(self.case_class.load_objs_snapshot())
+
+        receiver.assert_not_called()
+        self.assertEqual({obj_name: (type(obj), obj.pk) for obj_name, obj in self.case_class.objs.items()}, generated)
+        self.assertEqual(row_counter.get(CarBrand), CarBrand.objects.count())
+
+    def test_m2m_values_are_loaded(self):
+        group = Group.objects.create(name='Drivers')
+        user = User.objects.create(username='driver')
+        user.groups.add(group)
+        objects = json.loads(serializers.serialize('json', [group, user]))
+        user_pk = user.pk
+        user.delete()
+        group.delete()
+
+        snapshot = ObjsSnapshot.get(self.case_class.CACHE_DIR)
+        snapshot.set_snapshot(self.case_class.get_snapshot_name(), self.case_class.get_snapshot_key(), objects, {'driver': ['auth.User', user_pk]})
+
+        self.assertTrue(self.case_class.load_objs_snapshot())
+        self.assertEqual([group.name for group in self.case_class.objs['driver'].groups.all()], ['Drivers'])
+
+    def test_key_contains_sources_of_helpers(self):
+        class HelperCase(self.case_class):
+            @classmethod
+            def model_field_values_map(cls):
+                return {CarBrand: {'brand': lambda cls: {'title': cls.get_brand_title()}}}
+
+            @classmethod
+            def get_brand_title(cls):
+                return get_snapshot_brand_title()
+
+        sources = HelperCase.get_generating_sources()
+
+        self.assertTrue(any(['def get_brand_title' in source for source in sources]))
+        self.assertTrue(any(['def get_snapshot_brand_title' in source for source in sources]))
+        # helpers of kaskader are part of its version
+        self.assertFalse(any(['def get_models' in source for source in sources]))
+
+    def test_key_contains_fixtures_and_version(self):
+        fixture_dir = self.create_temporary_dir()
+        self.write_files(fixture_dir, {'brands.json': '[]'})
+        self.case_class.fixtures = ['brands']
+
+        def get_key():
+            self.case_class._snapshot_key = None
+            return self.case_class.get_snapshot_key()
+
+        with self.settings(FIXTURE_DIRS=[fixture_dir]):
+            key = get_key()
+            self.assertEqual(get_key(), key)
+
+            self.write_files(fixture_dir, {'brands.json': '[ ]'})
+            fixture_key = get_key()
+            self.assertNotEqual(fixture_key, key)
+
+            with mock.patch.object(kaskader, 'VERSION', 'other'):
+                self.assertNotEqual(get_key(), fixture_key)
+
+    def test_other_errors_are_raised(self):
+        self.generate_and_rollback()
+
+        with mock.patch('django.core.serializers.python.Deserializer', side_effect=RuntimeError('bug')):
+            with self.assertRaisesRegex(RuntimeError, 'bug'):
+                self.case_class.load_objs_snapshot()
+
+
+class VolumeObjsTest(GenerationTestCase):
+    def create_brands(self, count):
+        return [CarBrand.objects.create(title='Brand {}'.format(i)) for i in range(count)]
+
+    def test_number_of_objects(self):
+        self.mixin.VOLUME_OBJS = {CarBrand: 5}
+        self.mixin.VOLUME_BATCH_SIZE = 2
+
+        with mock.patch.object(self.mixin, 'bulk_generate_objs', wraps=self.mixin.bulk_generate_objs) as bulk_generate_objs:
+            objs = self.mixin.generate_volume_objs(CarBrand)
+
+        self.assertEqual(len(objs), 5)
+        self.assertEqual(CarBrand.objects.count(), 5)
+        self.assertEqual([len(call.args[1]) for call in bulk_generate_objs.call_args_list], [2, 2, 1])
+
+    def test_ratio_per_related_object(self):
+        brands = self.create_brands(3)
+        self.mixin.VOLUME_OBJS = {BrandModel: {'brand': 2}}
+        self.mixin.VOLUME_BATCH_SIZE = 2
+
+        objs = self.mixin.generate_volume_objs(BrandModel)
+
+        self.assertEqual([obj.brand_id for obj in objs], [brand.pk for brand in brands] * 2)
+        self.assertEqual(objs[0].brand.title, 'Brand 0')
+
+    def test_related_objects_are_read_in_batches(self):
+        self.create_brands(3)
+        self.mixin.VOLUME_OBJS = {BrandModel: {'brand': 1}}
+        self.mixin.VOLUME_BATCH_SIZE = 2
+
+        with mock.patch('django.db.models.query.QuerySet.iterator', autospec=True,
+                        side_effect=lambda queryset, chunk_size=None: iter(list(queryset))) as iterator:
+            field_values = list(self.mixin.get_volume_field_values(BrandModel))
+
+        self.assertEqual(len(field_values), 3)
+        self.assertEqual(iterator.call_args.kwargs, {'chunk_size': 2})
+
+    def test_missing_related_objects(self):
+        self.mixin.VOLUME_OBJS = {BrandModel: {'brand': 3}}
+        message = "No cars.CarBrand objects for field brand of volume objects of cars.BrandModel, VOLUME_OBJS[cars.BrandModel] is {'brand': 3}"
+
+        with self.assertRaisesMessage(ValueError, message):
+            self.mixin.get_volume_field_values(BrandModel)
+
+    def test_fallback_to_generate_obj_is_reported(self):
+        self.mixin.VOLUME_OBJS = {CarBrand: 2}
+        self.mixin.BULK_CREATE_OBJS = False
+        stdout = StringIO()
+
+        with redirect_stdout(stdout):
+            objs = self.mixin.generate_volume_objs(CarBrand)
+
+        self.assertEqual(len(objs), 2)
+        self.assertIn('Volume objects of cars.CarBrand are generated one by one by generate_obj', stdout.getvalue())
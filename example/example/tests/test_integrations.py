@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.db.models import ManyToManyField, CharField, IntegerField, AutoField, BigAutoField, JSONField, Field
+from django.db.models.fields.related import RelatedField
+from django.test import SimpleTestCase
+
+from kaskader.tests.generators import GenericBaseMixin
+from kaskader.tests.integrations import IntegrationRegistry, registry, get_related_field_classes, get_m2m_field_classes, \
+    FieldMapResolver
+
+
+class IntegrationRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = IntegrationRegistry()
+        self.calls = []
+
+    def register_loaders(self, field_map, form_field_map, app=None):
+        @self.registry.register_field_map('library', app=app)
+        def field_map_loader(cls):
+            self.calls.append('field_map')
+            return field_map()
+
+        @self.registry.register_form_field_map('library', app=app)
+        def form_field_map_loader(cls):
+            self.calls.append('form_field_map')
+            return form_field_map()
+
+    def test_loaders_are_called_on_first_use(self):
+        self.register_loaders(lambda: {'field': 1}, lambda: {'form_field': 2})
+        self.assertEqual(self.calls, [])
+
+        self.assertEqual(self.registry.get_field_map(None), {'field': 1})
+        self.assertEqual(self.registry.get_form_field_map(None), {'form_field': 2})
+        self.assertEqual(self.calls, ['field_map', 'form_field_map'])
+
+    def test_failing_loader_is_skipped_alone(self):
+        def form_field_map():
+            import kaskader_missing_library
+            return {}
+
+        self.register_loaders(lambda: {'field': 1}, form_field_map)
+
+        self.assertEqual(self.registry.get_form_field_map(None), {})
+        self.assertEqual(self.registry.get_form_field_map(None), {})
+        self.assertEqual(self.registry.get_field_map(None), {'field': 1})
+        self.assertEqual(self.calls, ['form_field_map', 'field_map'])
+        self.assertTrue(self.registry.is_available('library'))
+
+    def test_errors_of_loaders_are_not_hidden(self):
+        def field_map():
+            return {}.missing_attribute
+
+        self.register_loaders(field_map, lambda: {})
+
+        with self.assertRaises(AttributeError):
+            self.registry.get_field_map(None)
+
+    def test_not_installed_app(self):
+        self.register_loaders(lambda: {'field': 1}, lambda: {'form_field': 2}, app='kaskader_missing_app')
+
+        self.assertEqual(self.registry.get_field_map(None), {})
+        self.assertFalse(self.registry.is_available('library'))
+        self.assertEqual(self.calls, [])
+
+    def test_registered_modules(self):
+        self.registry.register('present', modules=['json'])
+        self.registry.register('missing', modules=['kaskader_missing_library'])
+
+        self.assertTrue(self.registry.is_available('present'))
+        self.assertFalse(self.registry.is_available('missing'))
+        self.assertFalse(self.registry.is_available('unknown'))
+
+
+class RelatedFieldClassesTest(SimpleTestCase):
+    def test_without_gm2m(self):
+        self.assertFalse(registry.is_available('gm2m'))
+        self.assertEqual(get_related_field_classes(), (RelatedField,))
+        self.assertEqual(get_m2m_field_classes(), (ManyToManyField,))
+
+
+class CustomCharField(CharField):
+    pass
+
+
+class CustomAutoField(BigAutoField):
+    pass
+
+
+class FieldMapResolverTest(SimpleTestCase):
+    def test_nearest_class_in_mro(self):
+        resolver = FieldMapResolver({Field: 'field', CharField: 'char'})
+
+        self.assertEqual(resolver[CustomCharField], 'char')
+        self.assertEqual(resolver[IntegerField], 'field')
+        self.assertIn(CustomCharField, resolver)
+
+    def test_missing_class(self):
+        resolver = FieldMapResolver({CharField: 'char'})
+
+        self.assertNotIn(IntegerField, resolver)
+        self.assertIsNone(resolver.get(IntegerField))
+
+        with self.assertRaises(KeyError):
+            resolver[IntegerField]
+
+    def test_exact_classes(self):
+        resolver = FieldMapResolver({IntegerField: 'integer', CustomAutoField: 'custom'}, exact_classes=(AutoField,))
+
+        self.assertEqual(resolver[IntegerField], 'integer')
+        self.assertEqual(resolver[CustomAutoField], 'custom')
+        self.assertNotIn(AutoField, resolver)
+        self.assertNotIn(BigAutoField, resolver)
+
+
+class FieldMapTest(SimpleTestCase):
+    def setUp(self):
+        class FieldMapMixin(GenericBaseMixin):
+            pass
+
+        self.mixin = FieldMapMixin
+
+    def test_auto_fields_are_not_generated(self):
+        resolver = self.mixin.get_field_map_resolver()
+
+        self.assertNotIn(AutoField, resolver)
+        self.assertNotIn(BigAutoField, resolver)
+        self.assertIn(IntegerField, resolver)
+
+    def test_mutable_values_are_not_shared(self):
+        field = JSONField()
+        value = self.mixin.get_field_map_resolver()[JSONField](field)
+
+        self.assertEqual(value, {})
+        self.assertIsNot(self.mixin.get_field_map_resolver()[JSONField](field), value)
+
+    def test_field_name_map_is_built_once_per_class(self):
+        with mock.patch.object(GenericBaseMixin, 'default_field_name_map', return_value={'year': 2000}) as default_field_name_map:
+            self.assertEqual(self.mixin.get_field_name_map(), {'year': 2000})
+            self.assertEqual(self.mixin.get_field_name_map(), {'year': 2000})
+            self.assertEqual(default_field_name_map.call_count, 1)
+
+            class OtherMixin(self.mixin):
+                pass
+
+            OtherMixin.get_field_name_map()
+            self.assertEqual(default_field_name_map.call_count, 2)
@@ -0,0 +1,86 @@
+import importlib
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+
+from django.test import SimpleTestCase
+
+from example.tests.utils import TemporaryPackageMixin
+from kaskader.tests.generators import BaseMixin
+from kaskader.tests.profiling import ImportProfiler, ProfilingFinder
+
+
+class ImportProfilerTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.create_package({
+            'profiled_pkg/__init__.py': '',
+            'profiled_pkg/parent.py': 'from profiled_pkg import child\nPARENT_DATA = [object() for i in range(1000)]\n',
+            'profiled_pkg/child.py': 'CHILD_DATA = [object() for i in range(10000)]\n',
+        })
+
+    def test_records(self):
+        with ImportProfiler() as profiler:
+            module = importlib.import_module('profiled_pkg.parent')
+
+        self.assertEqual(list(profiler.records.keys()), ['profiled_pkg', 'profiled_pkg.child', 'profiled_pkg.parent'])
+        parent = profiler.records['profiled_pkg.parent']
+        child = profiler.records['profiled_pkg.child']
+
+        self.assertIsNone(profiler.records['profiled_pkg']['imported_by'])
+        self.assertEqual(child['imported_by'], 'profiled_pkg.parent')
+        self.assertGreaterEqual(parent['cumulative_time'], child['cumulative_time'])
+        self.assertAlmostEqual(parent['self_time'], parent['cumulative_time'] - child['cumulative_time'])
+        self.assertGreater(child['self_memory'], parent['self_memory'])
+        self.assertEqual(parent['cumulative_memory'], parent['self_memory'] + child['cumulative_memory'])
+
+        # module doesn't keep profiling wrapper
+        self.assertIs(type(module.__loader__), type(sys.modules['json'].__loader__))
+        self.assertNotIn(profiler.finder, sys.meta_path)
+        self.assertFalse(any([isinstance(finder, ProfilingFinder) for finder in sys.meta_path]))
+
+    def test_already_imported_modules_are_not_recorded(self):
+        importlib.import_module('profiled_pkg.child')
+
+        with ImportProfiler() as profiler:
+            importlib.import_module('profiled_pkg.parent')
+
+        self.assertEqual(list(profiler.records.keys()), ['profiled_pkg.parent'])
+
+    def test_report_and_save(self):
+        with ImportProfiler() as profiler:
+            importlib.import_module('profiled_pkg.parent')
+
+        report = profiler.report(limit=2)
+        self.assertEqual(len(report.splitlines()), 3)
+        self.assertIn('profiled_pkg', report.splitlines()[1])
+
+        file_path = os.path.join(self.create_temporary_dir(), 'profile', 'import_profile.json')
+        profiler.save(file_path, key='self_memory')
+
+        with open(file_path) as file:
+            records = json.load(file)
+
+        self.assertEqual(records[0]['module'], 'profiled_pkg.child')
+        self.assertEqual(len(records), 3)
+
+    def test_import_modules_if_needed(self):
+        cache_dir = self.create_temporary_dir()
+
+        class ProfiledMixin(BaseMixin):
+            CHECK_MODULES = ['profiled_pkg']
+            EXCLUDE_MODULES = []
+            CACHE_DIR = cache_dir
+            PROFILE_IMPORTS = True
+
+        output = io.StringIO()
+
+        with redirect_stdout(output):
+            ProfiledMixin.import_modules_if_needed()
+
+        self.assertIn('profiled_pkg.parent', output.getvalue())
+        self.assertIn('profiled_pkg.child', sys.modules)
+
+        with open(os.path.join(cache_dir, 'import_profile.json')) as file:
+            self.assertEqual({record['module'] for record in json.load(file)}, {'profiled_pkg', 'profiled_pkg.child', 'profiled_pkg.parent'})
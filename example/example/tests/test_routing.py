@@ -0,0 +1,299 @@
+import re
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+from django.urls import path, include
+from django.views.generic import View
+
+from cars.models import CarBrand, BrandModel, Car
+
+from kaskader.tests.generators import GenericBaseMixin
+from kaskader.tests.routing import UrlTable, UrlNameMatcher, UrlSelector, ModelNameIndex, UrlArgIndex
+
+
+class ListView(View):
+    pass
+
+
+class DetailView(View):
+    extra = None
+
+
+def function_view(request):
+    return HttpResponse()
+
+
+part_patterns = [
+    path('', ListView.as_view(), name='part_list'),
+]
+
+car_patterns = [
+    path('', ListView.as_view(), name='car_list'),
+    path('<int:pk>/', DetailView.as_view(extra='value'), name='car_detail'),
+    path('parts/', include((part_patterns, 'parts'), namespace='parts')),
+]
+
+urlpatterns = [
+    path('', function_view, name='home'),
+    path('cars/', include((car_patterns, 'cars'), namespace='cars')),
+    path('plain/', include([path('list/', ListView.as_view(), name='plain_list')])),
+    path('used/', include((car_patterns, 'cars'), namespace='used_cars')),
+]
+
+
+class UrlTableTest(SimpleTestCase):
+    def setUp(self):
+        self.table = UrlTable(urlpatterns)
+
+    def test_flatten(self):
+        self.assertEqual([(entry.pattern, entry.url_name, entry.namespace, entry.app_name) for entry in self.table.entries], [
+            ('', 'home', '', ''),
+            ('cars/', 'cars:car_list', ':cars', ':cars'),
+            ('cars/<int:pk>/', 'cars:car_detail', ':cars', ':cars'),
+            ('cars/parts/', 'cars:parts:part_list', ':cars:parts', ':cars:parts'),
+            ('plain/list/', 'plain_list', ':', ':'),
+            ('used/', 'used_cars:car_list', ':used_cars', ':cars'),
+            ('used/<int:pk>/', 'used_cars:car_detail', ':used_cars', ':cars'),
+            ('used/parts/', 'used_cars:parts:part_list', ':used_cars:parts', ':cars:parts'),
+        ])
+
+        detail = self.table.entries[2]
+        self.assertIs(detail.view_class, DetailView)
+        self.assertEqual(detail.view_initkwargs, {'extra': 'value'})
+        self.assertEqual(detail.namespaces, ('cars',))
+        self.assertIsNone(self.table.entries[0].view_class)
+
+    def test_get_entries(self):
+        url_names = lambda entries: [entry.url_name for entry in entries]
+
+        self.assertEqual(url_names(self.table.get_entries(namespace='cars')), ['cars:car_list', 'cars:car_detail', 'cars:parts:part_list'])
+        self.assertEqual(url_names(self.table.get_entries(namespace='cars', exact=True)), ['cars:car_list', 'cars:car_detail'])
+        self.assertEqual(url_names(self.table.get_entries(namespace='cars:parts')), ['cars:parts:part_list'])
+        self.assertEqual(url_names(self.table.get_entries(app_name='cars:parts')), ['cars:parts:part_list', 'used_cars:parts:part_list'])
+        self.assertEqual(url_names(self.table.get_entries(namespace='used_cars', app_name='cars', exact=True)),
+                         ['used_cars:car_list', 'used_cars:car_detail'])
+        self.assertEqual(self.table.get_entries(namespace='missing'), [])
+        self.assertEqual(len(self.table.get_entries()), len(self.table.entries))
+
+    def test_get_namespaces(self):
+        self.assertEqual(list(self.table.namespace_index.get_namespaces().keys()),
+                         ['', 'cars', 'used_cars', 'cars:parts', 'used_cars:parts'])
+
+    def test_table_is_shared(self):
+        self.addCleanup(UrlTable.clear)
+        table = UrlTable.get(urlpatterns)
+
+        self.assertIs(UrlTable.get(urlpatterns), table)
+        self.assertIsNot(UrlTable.get(car_patterns), table)
+
+        UrlTable.clear()
+        self.assertIsNot(UrlTable.get(urlpatterns), table)
+
+    def test_filter(self):
+        url_names = lambda **kwargs: [url_name for entry, pattern, url_name in self.table.filter(**kwargs)]
+
+        # namespace and app name filters match any part of namespaces chain
+        self.assertEqual(url_names(filter_namespace='parts'), ['cars:parts:part_list', 'used_cars:parts:part_list'])
+        self.assertEqual(url_names(filter_namespace='cars:parts'), ['cars:parts:part_list', 'used_cars:parts:part_list'])
+        self.assertEqual(url_names(filter_namespace='used'), ['used_cars:car_list', 'used_cars:car_detail', 'used_cars:parts:part_list'])
+        self.assertEqual(url_names(filter_app_name=':cars:parts'), ['cars:parts:part_list', 'used_cars:parts:part_list'])
+        self.assertEqual(url_names(filter_namespace='used', filter_app_name='parts'), ['used_cars:parts:part_list'])
+        self.assertEqual(url_names(filter_namespace='missing'), [])
+
+        # excluded namespace skips whole resolver
+        self.assertEqual(url_names(exclude_namespace='parts'), [
+            'home', 'cars:car_list', 'cars:car_detail', 'plain_list', 'used_cars:car_list', 'used_cars:car_detail'])
+        self.assertEqual(url_names(exclude_app_name='cars'), ['home', 'plain_list'])
+
+    def test_filter_with_parent(self):
+        urls = [(pattern, url_name) for entry, pattern, url_name in self.table.filter('root/', ':root', ':root', filter_namespace='root:cars')]
+        self.assertEqual(urls, [('root/cars/', 'root:cars:car_list'), ('root/cars/<int:pk>/', 'root:cars:car_detail'),
+                                ('root/cars/parts/', 'root:cars:parts:part_list')])
+
+    def test_filter_by_namespace_path(self):
+        url_names = lambda **kwargs: [url_name for entry, pattern, url_name in self.table.filter(**kwargs)]
+
+        # full namespace path with nested namespaces, or without them if exact
+        self.assertEqual(url_names(filter_namespace='cars', namespace_match='subtree'), ['cars:car_list', 'cars:car_detail', 'cars:parts:part_list'])
+        self.assertEqual(url_names(filter_namespace='cars', namespace_match='exact'), ['cars:car_list', 'cars:car_detail'])
+        self.assertEqual(url_names(filter_namespace='parts', namespace_match='subtree'), [])
+        self.assertEqual(url_names(filter_app_name='cars:parts', namespace_match='exact'), ['cars:parts:part_list', 'used_cars:parts:part_list'])
+        self.assertEqual(url_names(filter_namespace='used_cars', filter_app_name='cars', exclude_namespace='parts', namespace_match='subtree'),
+                         ['used_cars:car_list', 'used_cars:car_detail'])
+
+        with self.assertRaisesRegex(ValueError, 'Unknown namespace_match'):
+            url_names(filter_namespace='cars', namespace_match='prefix')
+
+    def test_filter_by_namespace_path_with_parent(self):
+        urls = lambda namespace: [url_name for entry, pattern, url_name in self.table.filter(
+            'root/', ':root', ':root', filter_namespace=namespace, namespace_match='exact')]
+
+        self.assertEqual(urls('root:cars:parts'), ['root:cars:parts:part_list'])
+        self.assertEqual(urls('cars:parts'), [])
+
+
+class UrlCollectorsTest(SimpleTestCase):
+    def test_crawl_urls_with_action(self):
+        urls = []
+
+        def action(url, pattern, url_name, target_attr):
+            urls.append((pattern, url_name, target_attr))
+
+        GenericBaseMixin.crawl_urls_with_action(urlpatterns, action, filter_namespace='cars', exclude_namespace='parts', target_attr='_test')
+
+        self.assertEqual(urls, [
+            ('cars/', 'cars:car_list', '_test'),
+            ('cars/<int:pk>/', 'cars:car_detail', '_test'),
+            ('used/', 'used_cars:car_list', '_test'),
+            ('used/<int:pk>/', 'used_cars:car_detail', '_test'),
+        ])
+
+        urls = []
+        GenericBaseMixin.crawl_urls_with_action(urlpatterns, action, filter_namespace='cars', target_attr='_test', namespace_match='exact')
+        self.assertEqual([url_name for pattern, url_name, target_attr in urls], ['cars:car_list', 'cars:car_detail'])
+
+    def test_get_url_namespace_map(self):
+        namespace_map = GenericBaseMixin.get_url_namespace_map()
+        self.assertEqual(namespace_map['cars'], ['car_create', 'car_delete', 'car_list'])
+
+
+class UrlNameMatcherTest(SimpleTestCase):
+    def test_match(self):
+        export = re.compile(r'export$')
+        matcher = UrlNameMatcher(['admin', 'exact:accounts:logout', 'glob:*:*_delete', 're:^api:.*_v1$', export])
+
+        self.assertEqual(matcher.match('admin:index'), 'admin')
+        self.assertEqual(matcher.match('cars:admin_list'), 'admin')
+        self.assertEqual(matcher.match('accounts:logout'), 'exact:accounts:logout')
+        self.assertIsNone(matcher.match('accounts:logout_done'))
+        self.assertEqual(matcher.match('cars:car_delete'), 'glob:*:*_delete')
+        self.assertIsNone(matcher.match('car_delete'))
+        self.assertEqual(matcher.match('api:car_list_v1'), 're:^api:.*_v1$')
+        self.assertIs(matcher.match('cars:export'), export)
+        self.assertIsNone(matcher.match('cars:car_list'))
+
+    def test_empty(self):
+        self.assertFalse(UrlNameMatcher([]))
+        self.assertTrue(UrlNameMatcher(['']))
+        self.assertEqual(UrlNameMatcher(['']).match('cars:car_list'), '')
+
+
+class UrlSelectorTest(SimpleTestCase):
+    def test_get_skip_reason(self):
+        selector = UrlSelector(run_only_containing=['cars:'], ignore_containing=['glob:*_delete'], exclude_names=['cars:car_create'])
+
+        self.assertIsNone(selector.get_skip_reason('cars:car_list'))
+        self.assertEqual(selector.get_skip_reason('home'), 'RUN_ONLY_URL_NAMES_CONTAINING')
+        self.assertEqual(selector.get_skip_reason('cars:car_delete'), 'IGNORE_URL_NAMES_CONTAINING: glob:*_delete')
+        self.assertIsNone(selector.get_skip_reason('cars:car_create'))
+        self.assertEqual(selector.get_skip_reason('cars:car_create', exclude=True), 'EXCLUDE_MODULES')
+        self.assertEqual(selector.get_skipped(), {
+            'home': 'RUN_ONLY_URL_NAMES_CONTAINING',
+            'cars:car_delete': 'IGNORE_URL_NAMES_CONTAINING: glob:*_delete',
+            'cars:car_create': 'EXCLUDE_MODULES',
+        })
+
+    def test_run_only_names(self):
+        selector = UrlSelector(run_only_names=['cars:car_list'])
+
+        self.assertIsNone(selector.get_skip_reason('cars:car_list'))
+        self.assertEqual(selector.get_skip_reason('cars:car_create'), 'RUN_ONLY_THESE_URL_NAMES')
+
+
+class UrlSelectorMixinTest(SimpleTestCase):
+    def test_selector_is_stored_per_class(self):
+        class ParentMixin(GenericBaseMixin):
+            IGNORE_URL_NAMES_CONTAINING = ['admin']
+            EXCLUDE_MODULES = []
+
+        class ChildMixin(ParentMixin):
+            EXCLUDE_MODULES = ['cars']
+
+        parent_selector = ParentMixin.get_url_selector()
+        parent_selector.exclude_names = set()
+
+        self.assertIs(ParentMixin.get_url_selector(), parent_selector)
+        self.assertIsNot(ChildMixin.get_url_selector(), parent_selector)
+        self.assertIsNone(ChildMixin.get_url_selector().exclude_names)
+
+    def test_selector_is_compiled_again_when_rules_change(self):
+        class SelectorMixin(GenericBaseMixin):
+            IGNORE_URL_NAMES_CONTAINING = ['admin']
+
+        self.assertEqual(SelectorMixin.get_skipped_urls(), {})
+        self.assertTrue(SelectorMixin.skip_url('admin:index'))
+        self.assertEqual(SelectorMixin.get_skipped_urls(), {'admin:index': 'IGNORE_URL_NAMES_CONTAINING: admin'})
+
+        SelectorMixin.IGNORE_URL_NAMES_CONTAINING = ['exact:cars:car_list']
+        self.assertFalse(SelectorMixin.skip_url('admin:index'))
+        self.assertTrue(SelectorMixin.skip_url('cars:car_list'))
+
+
+class ModelNameIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = ModelNameIndex([CarBrand, BrandModel, Car])
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup('car_list'), [Car])
+        self.assertEqual(self.index.lookup('carbrand_list'), [CarBrand])
+        self.assertEqual(self.index.lookup('car_brand_list'), [CarBrand])
+        self.assertEqual(self.index.lookup('brand_model_detail'), [BrandModel])
+        self.assertEqual(self.index.lookup('car'), [Car])
+        self.assertEqual(self.index.lookup('ca'), [])
+        self.assertEqual(self.index.lookup('home'), [])
+
+    def test_ambiguous_lookup(self):
+        self.index.add('car', CarBrand)
+        self.assertEqual(self.index.lookup('car_list'), [Car, CarBrand])
+
+    def test_get_view_model(self):
+        class ModelsMixin(GenericBaseMixin):
+            @classmethod
+            def get_models(cls):
+                return [CarBrand, BrandModel, Car]
+
+        class ModelView(View):
+            model = Car
+
+        self.assertIs(ModelsMixin.get_view_model('cars:car_brand_list', View), CarBrand)
+        self.assertIs(ModelsMixin.get_view_model('cars:car_brand_list', ModelView), Car)
+        self.assertIsNone(ModelsMixin.get_view_model('home', View))
+
+
+class UrlArgIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.models = [CarBrand, BrandModel, Car]
+        self.addCleanup(UrlArgIndex.clear)
+
+    def test_resolve(self):
+        index = UrlArgIndex.get(self.models)
+        field = lambda model, name: model._meta.get_field(name)
+
+        self.assertEqual(index.resolve('int:pk', Car), [('pk', Car)])
+        self.assertEqual(index.resolve('carbrand_pk', Car), [('pk', CarBrand)])
+        self.assertEqual(index.resolve('car_brand_pk', Car), [('pk', CarBrand)])
+        self.assertEqual(index.resolve('str:numberplate', None), [(field(Car, 'numberplate'), Car)])
+        self.assertEqual(index.resolve('str:title', BrandModel), [(field(BrandModel, 'title'), BrandModel)])
+        self.assertEqual(index.resolve('str:brandmodel_title', None), [(field(BrandModel, 'title'), BrandModel)])
+        self.assertEqual(index.resolve('int:brand', None), [(field(BrandModel, 'brand'), BrandModel)])
+        self.assertEqual(index.resolve('str:bran', Car), [('brand', Car)])
+        self.assertEqual(index.resolve('str:missing', None), [])
+
+    def test_resolution_is_cached(self):
+        index = UrlArgIndex.get(self.models)
+        self.assertIs(index.resolve('str:title', CarBrand), index.resolve('str:title', CarBrand))
+
+    def test_index_is_shared(self):
+        index = UrlArgIndex.get(self.models)
+
+        self.assertIs(UrlArgIndex.get(self.models), index)
+        self.assertIs(UrlArgIndex.get(self.models, index.fields), index)
+        self.assertIsNot(UrlArgIndex.get(list(self.models)), index)
+
+    def test_index_of_custom_fields_is_shared(self):
+        fields = [(field, model) for field, model in UrlArgIndex.get(self.models).fields if model is not BrandModel]
+        index = UrlArgIndex.get(self.models, fields)
+
+        self.assertIs(UrlArgIndex.get(self.models, list(fields)), index)
+        self.assertIsNot(UrlArgIndex.get(self.models, fields[1:]), index)
+        self.assertEqual(index.resolve('str:title', None), [(CarBrand._meta.get_field('title'), CarBrand)])
@@ -0,0 +1,190 @@
+from unittest import mock
+
+from django.db.models import Manager
+from django.test import TestCase
+
+from cars.models import CarBrand, BrandModel
+from kaskader.tests.tracking import SequenceAllocator, identity_map, row_counter, created_rows, get_savepoint, \
+    rollback_to_savepoint
+
+
+class HiddenRowsManager(Manager):
+    def get_queryset(self):
+        return super(HiddenRowsManager, self).get_queryset().none()
+
+
+class SequenceAllocatorTest(TestCase):
+    def setUp(self):
+        self.sequences = SequenceAllocator()
+
+    def create_brands(self, *titles):
+        return [CarBrand.objects.create(title=title) for title in titles]
+
+    def test_read(self):
+        self.assertEqual(self.sequences.read(CarBrand), 0)
+
+        brands = self.create_brands('Audi', 'Skoda')
+        self.assertEqual(self.sequences.read(CarBrand), brands[-1].pk + 1)
+
+    def test_read_uses_base_manager(self):
+        brands = self.create_brands('Audi', 'Skoda')
+        manager = HiddenRowsManager()
+        manager.model = CarBrand
+
+        with mock.patch.object(CarBrand._meta, 'default_manager', manager):
+            self.assertFalse(CarBrand._default_manager.exists())
+            self.assertEqual(self.sequences.read(CarBrand), brands[-1].pk + 1)
+
+    def test_database_is_read_once(self):
+        brand = self.create_brands('Audi')[0]
+        self.assertEqual(self.sequences.get(CarBrand), brand.pk + 1)
+
+        self.create_brands('Skoda')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.sequences.get(CarBrand), brand.pk + 1)
+
+    def test_advance(self):
+        self.assertEqual(self.sequences.get(CarBrand), 0)
+
+        self.sequences.advance(CarBrand)
+        self.assertEqual(self.sequences.get(CarBrand), 1)
+
+        self.sequences.advance(CarBrand, 10)
+        self.assertEqual(self.sequences.get(CarBrand), 11)
+
+        # ids never go back
+        self.sequences.advance(CarBrand, 5)
+        self.assertEqual(self.sequences.get(CarBrand), 12)
+
+    def test_ids_do_not_go_back_after_delete(self):
+        brands = self.create_brands('Audi', 'Skoda')
+        self.sequences.get(CarBrand)
+        CarBrand.objects.all().delete()
+
+        self.assertEqual(self.sequences.get(CarBrand), brands[-1].pk + 1)
+
+    def test_clear(self):
+        self.sequences.advance(CarBrand, self.sequences.get(CarBrand) + 10)
+        self.sequences.clear(CarBrand)
+
+        self.assertEqual(self.sequences.get(CarBrand), 0)
+
+
+class IdentityMapTest(TestCase):
+    def setUp(self):
+        # receivers are connected once by dispatch_uid, so shared tracker is tested, its state is rolled back with test
+        self.addCleanup(rollback_to_savepoint, get_savepoint())
+        self.identity_map = identity_map
+        self.brand = CarBrand.objects.create(title='Audi')
+        self.identity_map.mark_fresh(self.brand)
+
+    def test_mark_fresh(self):
+        self.assertTrue(self.identity_map.is_fresh(self.brand))
+        self.assertFalse(self.identity_map.is_fresh(CarBrand(title='Skoda')))
+
+    def test_save_marks_stale(self):
+        CarBrand.objects.get(pk=self.brand.pk).save()
+        self.assertFalse(self.identity_map.is_fresh(self.brand))
+
+    def test_delete_marks_stale(self):
+        CarBrand.objects.get(pk=self.brand.pk).delete()
+        self.assertFalse(self.identity_map.is_fresh(self.brand))
+
+    def test_queryset_delete_marks_stale(self):
+        # receivers of tracker disable fast delete, so queryset delete sends post_delete
+        CarBrand.objects.filter(pk=self.brand.pk).delete()
+        self.assertFalse(self.identity_map.is_fresh(self.brand))
+
+    def test_rollback(self):
+        savepoint = self.identity_map.savepoint()
+        model = BrandModel.objects.create(brand=self.brand, title='A4')
+        self.identity_map.mark_fresh(model)
+
+        self.identity_map.rollback(savepoint)
+        self.assertTrue(self.identity_map.is_fresh(self.brand))
+        self.assertFalse(self.identity_map.is_fresh(model))
+
+    def test_changes_without_signals_are_not_detected(self):
+        CarBrand.objects.filter(pk=self.brand.pk).update(title='Skoda')
+        CarBrand.objects.bulk_update([CarBrand(pk=self.brand.pk, title='Seat')], ['title'])
+
+        self.assertTrue(self.identity_map.is_fresh(self.brand))
+
+
+class RowCounterTest(TestCase):
+    def setUp(self):
+        self.addCleanup(rollback_to_savepoint, get_savepoint())
+        row_counter.clear()
+
+    def test_exists_does_not_count(self):
+        CarBrand.objects.create(title='Audi')
+
+        with self.assertNumQueries(1) as context:
+            self.assertTrue(row_counter.exists(CarBrand))
+            self.assertTrue(row_counter.exists(CarBrand))
+
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+
+    def test_count_is_read_only_when_needed(self):
+        CarBrand.objects.bulk_create([CarBrand(title='Audi'), CarBrand(title='Skoda')])
+        row_counter.exists(CarBrand)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(row_counter.get(CarBrand), 2)
+            self.assertEqual(row_counter.get(CarBrand), 2)
+
+    def test_signals_and_generator_update_counts(self):
+        self.assertFalse(row_counter.exists(CarBrand))
+        self.assertEqual(row_counter.get(CarBrand), 0)
+
+        with self.assertNumQueries(0):
+            row_counter.add(CarBrand, 2)
+
+        brand = CarBrand.objects.create(title='Audi')
+        self.assertEqual(row_counter.get(CarBrand), 3)
+
+        brand.delete()
+        self.assertEqual(row_counter.get(CarBrand), 2)
+
+    def test_delete_of_lower_bound_checks_existence_again(self):
+        brand = CarBrand.objects.create(title='Audi')
+        self.assertTrue(row_counter.exists(CarBrand))
+
+        CarBrand.objects.filter(pk=brand.pk).delete()
+        self.assertFalse(row_counter.exists(CarBrand))
+
+    def test_rollback(self):
+        savepoint = get_savepoint()
+        self.assertFalse(row_counter.exists(CarBrand))
+        row_counter.add(CarBrand)
+        self.assertTrue(row_counter.exists(CarBrand))
+
+        rollback_to_savepoint(savepoint)
+        self.assertFalse(row_counter.exists(CarBrand))
+
+    def test_bulk_create_of_tests_is_not_tracked(self):
+        self.assertFalse(row_counter.exists(CarBrand))
+        CarBrand.objects.bulk_create([CarBrand(title='Audi')])
+
+        self.assertFalse(row_counter.exists(CarBrand))
+
+
+class CreatedRowsTest(TestCase):
+    def test_recording(self):
+        CarBrand.objects.create(title='Before')
+        created_rows.start([CarBrand, BrandModel])
+
+        try:
+            brand = CarBrand.objects.create(title='Audi')
+            deleted_brand = CarBrand.objects.create(title='Skoda')
+            deleted_brand.delete()
+            brand.save()
+            created_rows.add(BrandModel, [10, 11])
+        finally:
+            pks = created_rows.stop()
+
+        self.assertEqual(pks, {CarBrand: {brand.pk}, BrandModel: {10, 11}})
+        CarBrand.objects.create(title='After')
+        created_rows.add(CarBrand, [20])
+        self.assertIsNone(created_rows.pks)
@@ -0,0 +1,85 @@
+import os
+
+from django.test import SimpleTestCase
+
+from cars.views import CarCreateView, CarListView
+from example.tests.utils import TemporaryPackageMixin
+from kaskader.tests.discovery import UrlconfParser
+from kaskader.tests.generators import GenericBaseMixin
+
+
+URLS_SOURCE = '''
+from django.urls import path, re_path, include
+from django.utils.translation import pgettext_lazy, gettext_lazy as _
+
+from shop import views
+
+app_name = 'shop'
+
+urlpatterns = [
+    path(
+        pgettext_lazy('url', 'products/'),
+        views.ProductListView.as_view(),
+        name='product_list'
+    ),
+    re_path(r'^products/(?P<pk>\\d+)/$', views.ProductDetailView.as_view(template_name='detail.html'), name='product_detail'),
+    path(_('about/'), views.about, name='about'),
+    path('unnamed/', views.ProductListView.as_view()),
+    path('api/', include('shop.api.urls', namespace='api')),
+    path('legacy/', include(('shop.legacy.urls', 'legacy'))),
+]
+'''
+
+
+class UrlconfParserTest(TemporaryPackageMixin, SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = self.create_temporary_dir()
+
+    def test_extract(self):
+        urlconf = UrlconfParser(self.cache_dir).parse_source(URLS_SOURCE)
+
+        self.assertEqual(urlconf['app_name'], 'shop')
+        self.assertEqual([(path['path_name'], path['url_pattern'], path['view_class']) for path in urlconf['paths']], [
+            ('product_list', 'products/', 'views.ProductListView'),
+            ('product_detail', 'products/(?P<pk>\\d+)/', 'views.ProductDetailView'),
+        ])
+        self.assertEqual(urlconf['paths'][1]['view_params'], [[], {'template_name': "'detail.html'"}])
+        self.assertEqual(urlconf['includes'], [
+            {'url_pattern': 'api/', 'module': 'shop.api.urls', 'app_name': None, 'namespace': 'api'},
+            {'url_pattern': 'legacy/', 'module': 'shop.legacy.urls', 'app_name': 'legacy', 'namespace': None},
+        ])
+
+    def test_results_are_persistent(self):
+        parser = UrlconfParser(self.cache_dir)
+        urlconf = parser.parse_source(URLS_SOURCE)
+        self.assertTrue(parser.changed)
+        parser.save()
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, UrlconfParser.FILE_NAME)))
+
+        parser = UrlconfParser(self.cache_dir)
+        self.assertEqual(parser.parse_source(URLS_SOURCE), urlconf)
+        self.assertFalse(parser.changed)
+
+    def test_changed_source_is_parsed_again(self):
+        parser = UrlconfParser(self.cache_dir)
+        parser.parse_source(URLS_SOURCE)
+
+        urlconf = parser.parse_source(URLS_SOURCE.replace("name='product_list'", "name='products'"))
+        self.assertEqual(urlconf['paths'][0]['path_name'], 'products')
+
+
+class UrlViewsByModuleTest(SimpleTestCase):
+    def test_get_url_views_by_module(self):
+        class UrlsMixin(GenericBaseMixin):
+            CHECK_MODULES = ['cars']
+            EXCLUDE_MODULES = ['migrations', 'tests']
+
+        paths = UrlsMixin.get_url_views_by_module()['cars.urls']
+
+        self.assertEqual([(path['app_name'], path['path_name'], path['url_pattern']) for path in paths], [
+            ('cars', 'car_create', 'cars/create/'),
+            ('cars', 'car_delete', 'cars/<pk>/delete/'),
+            ('cars', 'car_list', 'cars/'),
+        ])
+        self.assertIs(paths[0]['view_class'], CarCreateView)
+        self.assertIs(paths[2]['view_class'], CarListView)
@@ -0,0 +1,39 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+
+class TemporaryPackageMixin(object):
+    '''
+    creates python packages from {relative file path: source} in temporary directory added to sys.path,
+    directory and imported modules of packages are removed after test
+    '''
+    def create_temporary_dir(self):
+        temp_dir = tempfile.mkdtemp(prefix='kaskader_')
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        return temp_dir
+
+    def create_package(self, files):
+        temp_dir = self.create_temporary_dir()
+        self.write_files(temp_dir, files)
+
+        sys.path.insert(0, temp_dir)
+        self.addCleanup(sys.path.remove, temp_dir)
+        self.addCleanup(self.unload_modules, {path.split('/')[0] for path in files.keys()})
+        importlib.invalidate_caches()
+        return temp_dir
+
+    def write_files(self, temp_dir, files):
+        for path, source in files.items():
+            file_path = os.path.join(temp_dir, *path.split('/'))
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            with open(file_path, 'w') as file:
+                file.write(source)
+
+    def unload_modules(self, package_names):
+        for module_name in list(sys.modules.keys()):
+            if module_name.split('.')[0] in package_names:
+                del sys.modules[module_name]
@@ -0,0 +1,72 @@
+import time
+import unittest
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kaskader.tests.missing_tests import MissingTestMixin
+
+
+class AuditCase(MissingTestMixin, unittest.TestCase):
+    '''
+    audits of MissingTestMixin run by command without test runner, so class set up and tear down are called explicitly,
+    audits don't use database
+    '''
+    def runTest(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Checks missing tests of filters, managers, signals, permissions and commented asserts without running test suite'
+    requires_system_checks = []
+
+    AUDITS = {
+        'filters': 'test_for_missing_filters',
+        'managers': 'test_for_missing_managers',
+        'signals': 'test_for_missing_signals',
+        'commented_asserts': 'test_for_commented_asserts',
+        'permissions': 'test_for_missing_permissions',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='+', help='modules to check, same as MissingTestMixin.CHECK_MODULES')
+        parser.add_argument('--exclude', nargs='*', default=MissingTestMixin.EXCLUDE_MODULES,
+                            help='modules to exclude, same as MissingTestMixin.EXCLUDE_MODULES')
+        parser.add_argument('--audit', nargs='*', choices=list(self.AUDITS.keys()), default=list(self.AUDITS.keys()),
+                            help='audits to run, all by default')
+        parser.add_argument('--import-modules', action='store_true', default=False,
+                            help='import audited modules instead of static analysis')
+        parser.add_argument('--incremental', action='store_true', default=False,
+                            help='reuse results of modules which did not change since last run')
+        parser.add_argument('--cache-dir', default=MissingTestMixin.CACHE_DIR, help='directory of persistent caches')
+
+    def handle(self, *args, **options):
+        class CommandAuditCase(AuditCase):
+            CHECK_MODULES = options['modules']
+            EXCLUDE_MODULES = options['exclude']
+            STATIC_AUDITS = not options['import_modules']
+            INCREMENTAL_AUDITS = options['incremental']
+            CACHE_DIR = options['cache_dir']
+
+        failed = []
+        start = time.perf_counter()
+        CommandAuditCase.setUpClass()
+
+        try:
+            for audit in options['audit']:
+                method_name = self.AUDITS[audit]
+
+                try:
+                    getattr(CommandAuditCase(), method_name)()
+                except AssertionError as e:
+                    failed.append(audit)
+                    self.stdout.write(self.style.ERROR(f'{audit}: FAILED'))
+                    self.stdout.write(str(e))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'{audit}: OK'))
+        finally:
+            CommandAuditCase.tearDownClass()
+
+        self.stdout.write(f'{len(options["audit"])} audits in {time.perf_counter() - start:.3f}s')
+
+        if failed:
+            raise CommandError(f'{len(failed)} audits failed: {", ".join(failed)}')
@@ -0,0 +1,149 @@
+import heapq
+from collections import OrderedDict, deque
+
+
+def find_cycle(nodes, edges):
+    '''
+    returns cycle [a, b, ..., a] in graph of nodes with edges {node: dependencies}, None if there is no cycle
+    '''
+    visited = set()
+
+    for start in nodes:
+        if start in visited:
+            continue
+
+        # iterative depth first search, path holds current chain of dependencies
+        path = [start]
+        on_path = {start}
+        stack = [iter(edges.get(start, ()))]
+        visited.add(start)
+
+        while stack:
+            node = next(stack[-1], None)
+
+            if node is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+
+            if node not in edges:
+                continue
+
+            if node in on_path:
+                return path[path.index(node):] + [node]
+
+            if node not in visited:
+                visited.add(node)
+                path.append(node)
+                on_path.add(node)
+                stack.append(iter(edges.get(node, ())))
+
+    return None
+
+
+def get_dependency_closure(direct_dependency):
+    '''
+    exact transitive closure of direct_dependency {node: {dependency: reason}},
+    returns {node: {dependency: (reason, ...)}} with shortest chain of reasons (for example fields) leading to every dependency,
+    node itself is included only if it is part of cycle
+    '''
+    closure = OrderedDict()
+
+    for node in direct_dependency:
+        # breadth first traversal, every dependency is reached by its shortest chain
+        chains = {}
+        queue = deque([(node, ())])
+
+        while queue:
+            current, chain = queue.popleft()
+
+            for dependency, reason in direct_dependency.get(current, {}).items():
+                if dependency not in chains:
+                    chains[dependency] = chain + (reason,)
+
+                    if dependency != node:
+                        queue.append((dependency, chains[dependency]))
+
+        closure[node] = chains
+
+    return closure
+
+
+def get_direct_dependency(dependency, node):
+    '''
+    required dependencies of node without transitive ones if chains are known
+    '''
+    if 'required_chains' in dependency[node]:
+        return {model for model, chain in dependency[node]['required_chains'].items() if len(chain) == 1}
+
+    return dependency[node]['required']
+
+
+def sort_dependency(dependency, key):
+    '''
+    topological order of dependency {node: {'required': dependencies, 'not_required': dependencies}}, dependencies first,
+    nodes which are not ordered by dependencies are sorted by key,
+    optional dependencies are respected unless they form cycle, required cycle raises ValueError with full cycle path,
+    runs in O(V log V + E)
+    '''
+    nodes = sorted(dependency.keys(), key=key)
+    index = {node: i for i, node in enumerate(nodes)}
+    dependants = {node: [] for node in nodes}  # node: [(dependant node, required)]
+    required_count = {node: 0 for node in nodes}
+    optional_count = {node: 0 for node in nodes}
+
+    for node in nodes:
+        required = {model for model in dependency[node]['required'] if model in index and model != node}
+        optional = {model for model in dependency[node]['not_required'] if model in index and model != node} - required
+
+        for model in sorted(required, key=key):
+            dependants[model].append((node, True))
+            required_count[node] += 1
+
+        for model in sorted(optional, key=key):
+            dependants[model].append((node, False))
+            optional_count[node] += 1
+
+    # heaps of node indexes, ready nodes have no pending dependency, required_ready only no pending required dependency
+    ready = [index[node] for node in nodes if not required_count[node] and not optional_count[node]]
+    required_ready = [index[node] for node in nodes if not required_count[node]]
+    heapq.heapify(ready)
+    heapq.heapify(required_ready)
+    emitted = set()
+    order = []
+
+    while len(order) < len(nodes):
+        while ready and nodes[ready[0]] in emitted:
+            heapq.heappop(ready)
+
+        while required_ready and nodes[required_ready[0]] in emitted:
+            heapq.heappop(required_ready)
+
+        if ready:
+            node = nodes[heapq.heappop(ready)]
+        elif required_ready:
+            # only cycles of optional dependencies are left, break them at first node without required dependencies
+            node = nodes[heapq.heappop(required_ready)]
+        else:
+            remaining = {node for node in nodes if node not in emitted}
+            edges = {node: sorted([model for model in get_direct_dependency(dependency, node) if model in remaining and model != node], key=key)
+                     for node in sorted(remaining, key=key)}
+            cycle = find_cycle(list(edges.keys()), edges)
+            raise ValueError('Circular dependency of models {}'.format(' -> '.join([str(key(model)) for model in cycle or sorted(remaining, key=key)])))
+
+        emitted.add(node)
+        order.append(node)
+
+        for dependant, required in dependants[node]:
+            if required:
+                required_count[dependant] -= 1
+
+                if not required_count[dependant]:
+                    heapq.heappush(required_ready, index[dependant])
+            else:
+                optional_count[dependant] -= 1
+
+            if not required_count[dependant] and not optional_count[dependant] and dependant not in emitted:
+                heapq.heappush(ready, index[dependant])
+
+    return OrderedDict((node, dependency[node]) for node in order)
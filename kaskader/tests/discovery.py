@@ -0,0 +1,871 @@
+import ast
+import hashlib
+import importlib.machinery
+import importlib.util
+import inspect
+import io
+import json
+import keyword
+import os
+import pkgutil
+import sys
+import tokenize
+
+
+class PersistentCache(object):
+    '''
+    json file in cache_dir shared by all tests of process, one instance per cache_dir,
+    without cache_dir data are kept only in memory, file of other VERSION is ignored and rebuilt
+    '''
+    FILE_NAME = None
+    VERSION = 1  # increase when format or meaning of cached data changes
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.changed = False
+        self.data = self.load()
+
+    @classmethod
+    def get(cls, cache_dir=None):
+        '''
+        returns shared instance for cache_dir
+        '''
+        if '_instances' not in cls.__dict__:
+            cls._instances = {}
+
+        if cache_dir not in cls._instances:
+            cls._instances[cache_dir] = cls(cache_dir)
+
+        return cls._instances[cache_dir]
+
+    @property
+    def file_path(self):
+        if not self.cache_dir:
+            return None
+
+        return os.path.join(self.cache_dir, self.FILE_NAME)
+
+    def load(self):
+        if not self.file_path or not os.path.exists(self.file_path):
+            return {}
+
+        try:
+            with open(self.file_path) as file:
+                content = json.load(file)
+        except (ValueError, OSError):
+            # corrupted or unreadable cache, rebuild
+            return {}
+
+        if not isinstance(content, dict) or content.get('version', None) != self.VERSION:
+            return {}
+
+        return content.get('data', {})
+
+    def save(self):
+        if not self.file_path or not self.changed:
+            return
+
+        tmp_path = '{}.{}.tmp'.format(self.file_path, os.getpid())
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            with open(tmp_path, 'w') as file:
+                json.dump({'version': self.VERSION, 'data': self.data}, file)
+
+            # atomic replace, parallel test workers may write at the same time
+            os.replace(tmp_path, self.file_path)
+        except OSError as e:
+            print('Failed to save {}: {}'.format(self.file_path, e))
+        else:
+            self.changed = False
+
+
+class ModuleIndex(PersistentCache):
+    '''
+    persistent index of submodules of checked packages, replaces repeated pkgutil.walk_packages calls,
+    index is stored as json in cache_dir and validated against package paths and directory mtimes,
+    only directories which changed since last run are listed again
+    '''
+    FILE_NAME = 'modules.json'
+
+    def __init__(self, cache_dir=None):
+        super(ModuleIndex, self).__init__(cache_dir)
+        self.validated = set()  # parent module names already checked in this process
+        self.lookups = {}  # memoized get_submodule_names results
+
+    @property
+    def packages(self):
+        # parent module name: {'path': [...], 'dirs': {dir: {'mtime': ..., 'prefix': ..., 'modules': [[name, ispkg], ...]}}}
+        return self.data
+
+    def get_submodule_names(self, parent_module_names, submodule_names, exclude_names):
+        key = (tuple(parent_module_names), tuple(submodule_names), tuple(exclude_names))
+
+        if key not in self.lookups:
+            module_names = set()
+
+            for parent_module_name in parent_module_names:
+                for modname, ispkg in self.walk(parent_module_name):
+                    if ispkg:
+                        continue
+
+                    for submodule_name in submodule_names:
+                        if submodule_name in modname and not any([exclude_name in modname for exclude_name in exclude_names]):
+                            module_names.add(modname)
+
+            self.lookups[key] = frozenset(module_names)
+
+        return set(self.lookups[key])
+
+    def walk(self, parent_module_name):
+        '''
+        returns (modname, ispkg) of all submodules of parent module, same as pkgutil.walk_packages without importing packages
+        '''
+        if parent_module_name not in self.validated:
+            self.validate(parent_module_name)
+            self.validated.add(parent_module_name)
+            self.save()
+
+        for dir_entry in self.packages[parent_module_name]['dirs'].values():
+            for modname, ispkg in dir_entry['modules']:
+                yield modname, ispkg
+
+    def validate(self, parent_module_name):
+        '''
+        raises ModuleNotFoundError for unknown or removed package, module which is not package has no submodules
+        '''
+        if parent_module_name in sys.modules:
+            path = list(getattr(sys.modules[parent_module_name], '__path__', []))
+        else:
+            # package is not imported, find its path without executing it
+            spec = importlib.util.find_spec(parent_module_name)
+
+            if spec is None:
+                if self.packages.pop(parent_module_name, None) is not None:
+                    self.changed = True
+                    self.save()
+
+                raise ModuleNotFoundError('No module named {!r}'.format(parent_module_name), name=parent_module_name)
+
+            path = list(spec.submodule_search_locations or [])
+
+        package = self.packages.get(parent_module_name, None)
+
+        if package is None or package['path'] != path:
+            # unknown package or it was moved, build from scratch
+            package = {'path': path, 'dirs': {}}
+            self.packages[parent_module_name] = package
+            self.changed = True
+
+        dirs = package['dirs']
+        visited = set()
+        to_visit = [(dir, parent_module_name + '.') for dir in path]
+
+        while to_visit:
+            dir, prefix = to_visit.pop()
+            visited.add(dir)
+
+            try:
+                mtime = os.stat(dir).st_mtime_ns
+            except OSError:
+                if dirs.pop(dir, None) is not None:
+                    self.changed = True
+                continue
+
+            dir_entry = dirs.get(dir, None)
+
+            if dir_entry is None or dir_entry['mtime'] != mtime or dir_entry['prefix'] != prefix:
+                # files were added, removed or renamed in directory
+                dir_entry = {
+                    'mtime': mtime,
+                    'prefix': prefix,
+                    'modules': [[modname, ispkg] for importer, modname, ispkg in pkgutil.iter_modules([dir], prefix)],
+                }
+                dirs[dir] = dir_entry
+                self.changed = True
+
+            for modname, ispkg in dir_entry['modules']:
+                if ispkg:
+                    to_visit.append((os.path.join(dir, modname[len(prefix):]), modname + '.'))
+
+        for dir in set(dirs.keys()) - visited:
+            # removed packages
+            del dirs[dir]
+            self.changed = True
+
+
+class ModuleMembers(object):
+    '''
+    members of single module collected in one pass over module namespace
+    '''
+    def __init__(self, module):
+        try:
+            from django_filters import Filter, FilterSet
+        except ImportError:
+            Filter = FilterSet = None
+
+        self.module_name = module.__name__
+        self.namespace_classes = {}  # all classes available in module by name, including imported ones
+        self.classes = set()  # only not imported classes defined in module
+        self.functions = set()  # only not imported functions defined in module
+        self.filtersets = set()
+        self.filters = set()
+        self.class_methods = set()  # callables defined in local classes
+        self.tests = set()  # test_* methods of local classes
+
+        for name, value in list(vars(module).items()):
+            if inspect.isclass(value):
+                self.namespace_classes[name] = value
+
+                if value.__module__ == self.module_name:
+                    self.classes.add(value)
+            elif inspect.isfunction(value):
+                if value.__module__ == self.module_name:
+                    self.functions.add(value)
+
+        for klass in self.classes:
+            if FilterSet is not None:
+                if issubclass(klass, FilterSet):
+                    self.filtersets.add(klass)
+                elif issubclass(klass, Filter):
+                    self.filters.add(klass)
+
+            self.class_methods |= {value for name, value in IntrospectionIndex.get_class_callables(klass)}
+
+        self.tests = {method for method in self.class_methods if getattr(method, '__name__', '').startswith('test_')}
+
+
+class StaticModuleMembers(object):
+    '''
+    members of single module found by ast without importing it, names of bases are resolved through imports of module
+    and local classes are followed to their bases, bases from django_filters are recognized by name
+    (CarFilterSet(FilterSet) is filterset), other imported bases are followed by parsing source of their module,
+    so no module is imported
+    '''
+    FILTERS_MODULE = 'django_filters'
+    SKIPPED_MODULES = ('builtins', 'django', 'typing', 'abc')  # modules without filter classes, never parsed
+    _modules = {}  # module name: (stamp of source file, StaticModuleMembers) of parsed modules of bases
+    _parsing = set()  # names of modules being parsed
+
+    def __init__(self, source, module_name, is_package=False):
+        tree = ast.parse(source)
+        imports = {}  # local name: full dotted name of imported module or object
+        star_modules = []  # modules imported by from module import *
+        bases = {}  # local class name: base names as written in source
+
+        self.module_name = module_name
+        self.imports = imports
+        self.star_modules = star_modules
+        self.classes = {}  # class name: ast.ClassDef
+        self.functions = set()
+        self.filtersets = {}  # class name: filter_* method names
+        self.filters = set()
+        self.tests = {}  # test method name: [(first line, last line), ...]
+        self.class_tests = {}  # class name: test method names
+
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        imports[alias.asname] = alias.name
+                    else:
+                        # import a.b binds a
+                        imports[alias.name.split('.')[0]] = alias.name.split('.')[0]
+            elif isinstance(node, ast.ImportFrom):
+                module = self.get_import_module(node, module_name, is_package)
+
+                for alias in node.names:
+                    if alias.name == '*':
+                        star_modules.append(module)
+                    else:
+                        imports[alias.asname or alias.name] = f'{module}.{alias.name}'
+            elif isinstance(node, ast.ClassDef):
+                self.classes[node.name] = node
+                bases[node.name] = [UrlconfParser.get_name(base) for base in node.bases]
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.functions.add(node.name)
+
+        def resolve(base):
+            # full name of imported base, None for builtins and unknown names
+            parts = base.split('.')
+
+            if parts[0] in imports:
+                return '.'.join([imports[parts[0]]] + parts[1:])
+
+            for star_module in star_modules:
+                if self.get_imported_kind(f'{star_module}.{base}', check_exists=True) is not False:
+                    return f'{star_module}.{base}'
+
+            return None
+
+        def get_kinds(class_name, visited):
+            # kinds of all bases, local classes are followed to their bases
+            kinds = set()
+
+            for base in bases.get(class_name, []):
+                if base in bases:
+                    if base not in visited:
+                        visited.add(base)
+                        kinds |= get_kinds(base, visited)
+                elif base:
+                    full_name = resolve(base)
+                    kinds.add(self.get_imported_kind(full_name) if full_name else None)
+
+            return kinds
+
+        for class_name, node in self.classes.items():
+            kinds = get_kinds(class_name, {class_name})
+            methods = [item for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+            if 'filterset' in kinds:
+                self.filtersets[class_name] = sorted([method.name for method in methods if method.name.startswith('filter')])
+            elif 'filter' in kinds:
+                self.filters.add(class_name)
+
+            self.class_tests[class_name] = [method.name for method in methods if method.name.startswith('test_')]
+
+            for method in methods:
+                if method.name.startswith('test_'):
+                    self.tests.setdefault(method.name, []).append((method.lineno, method.end_lineno))
+
+    @classmethod
+    def get_import_module(cls, node, module_name, is_package=False):
+        '''
+        absolute name of module of from ... import statement, relative imports are resolved from module_name
+        '''
+        if not node.level:
+            return node.module
+
+        package = module_name.split('.') if is_package else module_name.split('.')[:-1]
+        package = package[:len(package) - node.level + 1]
+        return '.'.join(package + ([node.module] if node.module else []))
+
+    @classmethod
+    def get_imported_kind(cls, full_name, check_exists=False):
+        '''
+        returns 'filterset', 'filter' or None for imported class, classes of django_filters are recognized by name,
+        others are found by parsing source of their module, with check_exists False is returned for missing names
+        '''
+        if full_name.split('.')[0] == cls.FILTERS_MODULE and not check_exists:
+            name = full_name.split('.')[-1]
+            return 'filterset' if name.endswith('FilterSet') else 'filter' if name.endswith('Filter') else None
+
+        if full_name.split('.')[0] in cls.SKIPPED_MODULES and not check_exists:
+            return None
+
+        return cls.find_kind(full_name, check_exists)
+
+    @classmethod
+    def find_kind(cls, full_name, check_exists=False):
+        '''
+        kind of class 'app.filters.CarFilterSet' from parsed source of its module, names imported by module
+        (including star imports) are followed to module which defines them
+        '''
+        missing = False if check_exists else None
+        specs = get_module_specs(full_name)
+
+        if not specs:
+            return missing
+
+        module_name = specs[-1].name
+
+        if module_name == full_name:
+            # module is not class
+            return None
+
+        members = cls.get_module_members(specs[-1])
+        name = full_name[len(module_name) + 1:]
+
+        if members is None or '.' in name:
+            # source not available or nested class
+            return missing
+
+        if name in members.filtersets:
+            return 'filterset'
+
+        if name in members.filters:
+            return 'filter'
+
+        if name in members.classes or name in members.functions:
+            return None
+
+        if name in members.imports:
+            return cls.get_imported_kind(members.imports[name], check_exists)
+
+        for star_module in members.star_modules:
+            if cls.get_imported_kind(f'{star_module}.{name}', check_exists=True) is not False:
+                return cls.get_imported_kind(f'{star_module}.{name}', check_exists)
+
+        return missing
+
+    @classmethod
+    def get_module_members(cls, spec):
+        '''
+        StaticModuleMembers of module with python source, parsed again only if source file changed,
+        None if source is not available or module is being parsed (import cycle)
+        '''
+        if not spec.has_location or not spec.origin.endswith('.py') or spec.name in cls._parsing:
+            return None
+
+        try:
+            stat = os.stat(spec.origin)
+            stamp = [spec.origin, stat.st_mtime_ns, stat.st_size]
+
+            if spec.name in cls._modules and cls._modules[spec.name][0] == stamp:
+                return cls._modules[spec.name][1]
+
+            with open(spec.origin, 'rb') as file:
+                source = file.read()
+        except OSError:
+            return None
+
+        cls._parsing.add(spec.name)
+
+        try:
+            members = cls(source, spec.name, os.path.basename(spec.origin) == '__init__.py')
+        except (SyntaxError, ValueError):
+            members = None
+        finally:
+            cls._parsing.discard(spec.name)
+
+        cls._modules[spec.name] = (stamp, members)
+        return members
+
+
+class IntrospectionIndex(object):
+    '''
+    process wide index of module members, every module is inspected only once and shared by all tests
+    '''
+    _modules = {}
+    _classes = {}
+
+    @classmethod
+    def get_module_members(cls, module):
+        key = (module.__name__, id(module))
+
+        if key not in cls._modules:
+            cls._modules[key] = ModuleMembers(module)
+
+        return cls._modules[key]
+
+    @classmethod
+    def get_class_callables(cls, klass):
+        '''
+        (name, value) of callables defined directly in class body (not inherited)
+        '''
+        if klass not in cls._classes:
+            cls._classes[klass] = tuple((name, value) for name, value in list(vars(klass).items()) if callable(value))
+
+        return cls._classes[klass]
+
+    @classmethod
+    def get_class_functions(cls, klass):
+        '''
+        (name, function) of public plain functions defined directly in class body
+        '''
+        return [(name, value) for name, value in cls.get_class_callables(klass)
+                if not name.startswith('_') and name != 'mro' and inspect.isfunction(value)]
+
+    @classmethod
+    def clear(cls):
+        cls._modules = {}
+        cls._classes = {}
+
+
+def get_module_specs(full_name):
+    '''
+    specs of longest chain of existing modules in dotted name, 'app.filters.CarFilter' -> [spec of app, spec of app.filters],
+    modules are found by path without importing them or their parent packages
+    '''
+    parts = full_name.split('.')
+    specs = []
+    path = None
+
+    for index in range(len(parts)):
+        name = '.'.join(parts[:index + 1])
+
+        if index and path is None:
+            # parent is not package
+            break
+
+        try:
+            if name in sys.modules:
+                spec = sys.modules[name].__spec__
+            elif index:
+                spec = importlib.machinery.PathFinder.find_spec(name, path)
+            else:
+                spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError, AttributeError):
+            spec = None
+
+        if spec is None:
+            break
+
+        specs.append(spec)
+        path = spec.submodule_search_locations
+
+    return specs
+
+
+def get_module_file(module_name):
+    '''
+    returns source file of module without importing module or its parent packages, raises ModuleNotFoundError
+    '''
+    module = sys.modules.get(module_name, None)
+
+    if module is not None and getattr(module, '__file__', None):
+        return module.__file__
+
+    specs = get_module_specs(module_name)
+
+    if len(specs) != len(module_name.split('.')) or not specs[-1].has_location:
+        raise ModuleNotFoundError(f"No module named '{module_name}'", name=module_name)
+
+    return specs[-1].origin
+
+
+class AuditManifest(PersistentCache):
+    '''
+    json serializable results of per module audits keyed by audit name and module name, result is reused
+    while hash of module source doesn't change, so only changed modules are imported and inspected again
+    '''
+    FILE_NAME = 'audits.json'
+    VERSION = 2
+
+    def get_result(self, audit_name, module_name, extract, dependencies=()):
+        '''
+        returns extract(module_name) of module, computed again only if source of module or of its dependencies
+        (names of modules result depends on, eg. modules with base classes) changed
+        '''
+        key = self.get_source_hash(module_name)
+
+        if dependencies:
+            key = hashlib.sha1(' '.join([key] + [f'{name}:{self.get_source_hash(name)}' for name in sorted(dependencies)]).encode()).hexdigest()
+
+        results = self.data.setdefault(audit_name, {})
+        entry = results.get(module_name, None)
+
+        if entry is None or entry['hash'] != key:
+            # round trip through json, result is same as loaded from file in next run
+            entry = {'hash': key, 'result': json.loads(json.dumps(extract(module_name)))}
+            results[module_name] = entry
+            self.changed = True
+
+        return entry['result']
+
+    @classmethod
+    def get_source_hash(cls, module_name):
+        with open(get_module_file(module_name), 'rb') as file:
+            return hashlib.sha1(file.read()).hexdigest()
+
+
+class IdentityKey(object):
+    '''
+    part of discovery key compared by identity of value, value is referenced by key so its id can't be reused
+    '''
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        return id(self.value)
+
+    def __eq__(self, other):
+        return isinstance(other, IdentityKey) and other.value is self.value
+
+
+class DiscoveryRegistry(object):
+    '''
+    process wide results of model and url discovery keyed by discovery configuration (CHECK_MODULES, EXCLUDE_MODULES, ...),
+    test cases with same configuration share one result instead of collecting it again
+    '''
+    _results = {}
+
+    @classmethod
+    def get(cls, key, collect):
+        if key not in cls._results:
+            cls._results[key] = collect()
+
+        return cls._results[key]
+
+    @classmethod
+    def make_key(cls, value):
+        '''
+        hashable key part of value, lists and dicts are converted to tuples, other unhashable values are compared by identity
+        '''
+        if isinstance(value, (list, tuple)):
+            return tuple([cls.make_key(item) for item in value])
+
+        if isinstance(value, dict):
+            return tuple(sorted([(key, cls.make_key(item)) for key, item in value.items()], key=lambda item: repr(item[0])))
+
+        if isinstance(value, set):
+            return frozenset(value)
+
+        try:
+            hash(value)
+        except TypeError:
+            return IdentityKey(value)
+
+        return value
+
+    @classmethod
+    def clear(cls):
+        cls._results = {}
+
+
+class UrlconfParser(PersistentCache):
+    '''
+    extracts path/re_path/url/include calls from urls module source using ast, results are cached by file content hash,
+    in memory and in cache_dir, so unchanged urls modules are not parsed again
+    '''
+    FILE_NAME = 'urlconfs.json'
+    PATH_FUNCTIONS = ('path', 're_path', 'url')
+
+    def parse_module(self, module):
+        '''
+        returns {'app_name': str or None, 'paths': [...], 'includes': [...]} for urls module
+        '''
+        with open(module.__file__, 'rb') as file:
+            source = file.read()
+
+        return self.parse_source(source)
+
+    def parse_source(self, source):
+        if isinstance(source, str):
+            source = source.encode('utf8')
+
+        key = hashlib.sha1(source).hexdigest()
+
+        if key not in self.data:
+            self.data[key] = self.extract(ast.parse(source))
+            self.changed = True
+
+        return self.data[key]
+
+    @classmethod
+    def extract(cls, tree):
+        app_name = None
+        paths = []
+        includes = []
+
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any([isinstance(target, ast.Name) and target.id == 'app_name' for target in node.targets]):
+                app_name = cls.get_string(node.value)
+
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or cls.get_name(node.func).split('.')[-1] not in cls.PATH_FUNCTIONS or len(node.args) < 2:
+                continue
+
+            function = cls.get_name(node.func).split('.')[-1]
+            url_pattern = cls.get_string(node.args[0])
+
+            if url_pattern is not None and function != 'path':
+                # regex pattern r'^pattern$'
+                url_pattern = url_pattern[1:] if url_pattern.startswith('^') else url_pattern
+                url_pattern = url_pattern[:-1] if url_pattern.endswith('$') else url_pattern
+
+            view = node.args[1]
+            keywords = {keyword.arg: keyword.value for keyword in node.keywords if keyword.arg is not None}
+
+            if isinstance(view, ast.Call) and cls.get_name(view.func).split('.')[-1] == 'include':
+                include_keywords = {keyword.arg: keyword.value for keyword in view.keywords if keyword.arg is not None}
+                included = view.args[0] if view.args else None
+                included_app_name = None
+
+                if isinstance(included, ast.Tuple) and included.elts:
+                    # include((patterns, app_name), namespace=...)
+                    included_app_name = cls.get_string(included.elts[1]) if len(included.elts) > 1 else None
+                    included = included.elts[0]
+
+                includes.append({
+                    'url_pattern': url_pattern,
+                    'module': cls.get_string(included) if included is not None else None,
+                    'app_name': included_app_name,
+                    'namespace': cls.get_string(include_keywords['namespace']) if 'namespace' in include_keywords else None,
+                })
+                continue
+
+            if not isinstance(view, ast.Call) or not isinstance(view.func, ast.Attribute) or view.func.attr != 'as_view':
+                # only class based views
+                continue
+
+            if 'name' not in keywords or cls.get_string(keywords['name']) is None:
+                continue
+
+            paths.append({
+                'path_name': cls.get_string(keywords['name']),
+                'url_pattern': url_pattern,
+                'view_class': cls.get_name(view.func.value),
+                # list instead of tuple, same as when loaded from json cache
+                'view_params': [
+                    [ast.unparse(arg) for arg in view.args if ast.unparse(arg) != '*args'],
+                    {keyword.arg: ast.unparse(keyword.value) for keyword in view.keywords if keyword.arg is not None},
+                ],
+                'line': node.lineno,
+            })
+
+        return {'app_name': app_name, 'paths': sorted(paths, key=lambda path: path['line']), 'includes': includes}
+
+    @classmethod
+    def get_name(cls, node):
+        '''
+        dotted name of Name/Attribute node, empty string for anything else
+        '''
+        if isinstance(node, ast.Name):
+            return node.id
+
+        if isinstance(node, ast.Attribute):
+            parent = cls.get_name(node.value)
+            return '{}.{}'.format(parent, node.attr) if parent else ''
+
+        return ''
+
+    @classmethod
+    def get_string(cls, node):
+        '''
+        string constant, also wrapped in translation function as pgettext_lazy('url', 'pattern') or _('pattern')
+        '''
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+
+        if isinstance(node, ast.Call) and node.args:
+            return cls.get_string(node.args[-1])
+
+        return None
+
+
+class SourceScanner(PersistentCache):
+    '''
+    reads and tokenizes source file once and collects comments, string assignments, call sites, attribute names
+    and function line ranges for all source scanners, results are cached by file content hash in memory and in cache_dir
+    '''
+    FILE_NAME = 'sources.json'
+    VERSION = 2
+    SKIPPED_TOKENS = (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT,
+                      tokenize.ENCODING, tokenize.ENDMARKER)
+
+    def scan_file(self, file_path):
+        '''
+        returns {
+            'comments': [[line, comment, source line], ...],
+            'assignments': [[line, name, string], ...],  # name = 'string' statements, not keyword arguments
+            'calls': [[line, name, first argument if string literal else None], ...],
+            'attributes': [[line, name], ...],  # .name
+            'functions': [[name, first line, last line], ...],
+        }
+        '''
+        with open(file_path, 'rb') as file:
+            source = file.read()
+
+        return self.scan_source(source)
+
+    def scan_source(self, source):
+        if isinstance(source, str):
+            source = source.encode('utf8')
+
+        key = hashlib.sha1(source).hexdigest()
+
+        if key not in self.data:
+            self.data[key] = self.scan(source)
+            self.changed = True
+
+        return self.data[key]
+
+    @classmethod
+    def scan(cls, source):
+        result = {'comments': [], 'assignments': [], 'calls': [], 'attributes': [], 'functions': []}
+        previous = [None, None]  # last two significant tokens
+        functions = []  # open functions [name, first line, depth, has indented body]
+        depth = 0
+        brackets = 0  # nesting of (), [], {}
+        last_line = 0  # last line of code before current token
+        statement_start = False
+        pending_call = False  # previous token is '(' of call appended to result
+
+        def close_functions(min_depth):
+            while functions and functions[-1][2] >= min_depth:
+                name, first_line, function_depth, indented = functions.pop()
+                result['functions'].append([name, first_line, last_line])
+
+        for token in tokenize.tokenize(io.BytesIO(source).readline):
+            line = token.start[0]
+
+            if token.type == tokenize.COMMENT:
+                result['comments'].append([line, token.string, token.line])
+                continue
+
+            if token.type == tokenize.INDENT:
+                depth += 1
+
+                if functions and not functions[-1][3]:
+                    functions[-1][3] = True
+
+                continue
+
+            if token.type == tokenize.DEDENT:
+                depth -= 1
+                close_functions(depth)
+                continue
+
+            if token.type in cls.SKIPPED_TOKENS:
+                if token.type == tokenize.NEWLINE:
+                    statement_start = True
+                    last_line = token.end[0]
+                elif token.type == tokenize.ENDMARKER:
+                    close_functions(0)
+
+                continue
+
+            if statement_start and functions and not functions[-1][3]:
+                # one line function def name(): ... ended with previous statement
+                close_functions(functions[-1][2])
+
+            statement_start = False
+            prev_2, prev_1 = previous
+            call_opened = False
+
+            if token.type == tokenize.STRING and prev_1 is not None and prev_2 is not None and prev_2.type == tokenize.NAME:
+                try:
+                    value = ast.literal_eval(token.string)
+                except (ValueError, SyntaxError):
+                    value = None
+
+                if isinstance(value, str):
+                    if prev_1.string == '=' and brackets == 0:
+                        result['assignments'].append([line, prev_2.string, value])
+                    elif pending_call:
+                        # first argument of call appended with previous '('
+                        result['calls'][-1][2] = value
+
+            elif token.type == tokenize.OP and token.string in ('(', '[', '{'):
+                brackets += 1
+
+                if token.string == '(' and prev_1 is not None and prev_1.type == tokenize.NAME and not keyword.iskeyword(prev_1.string) \
+                        and (prev_2 is None or prev_2.string not in ('def', 'class')):
+                    result['calls'].append([line, prev_1.string, None])
+                    call_opened = True
+
+            elif token.type == tokenize.OP and token.string in (')', ']', '}'):
+                brackets = max(brackets - 1, 0)
+
+            elif token.type == tokenize.NAME:
+                if prev_1 is not None and prev_1.type == tokenize.OP and prev_1.string == '.':
+                    result['attributes'].append([line, token.string])
+                elif prev_1 is not None and prev_1.type == tokenize.NAME and prev_1.string == 'def':
+                    functions.append([token.string, line, depth, False])
+
+            pending_call = call_opened
+            previous = [prev_1, token]
+
+        result['functions'].sort(key=lambda function: function[1])
+        return result
+
+    @classmethod
+    def get_function_lines(cls, scan, function):
+        '''
+        returns (first line, last line) of function in scanned source or None
+        '''
+        first_line = function.__code__.co_firstlineno
+        ranges = [(start, end) for name, start, end in scan['functions'] if name == function.__name__ and start >= first_line]
+        return min(ranges) if ranges else None
@@ -1,14 +1,16 @@
 import ast
-import functools
+import copy
+import glob
+import hashlib
 import importlib
 import inspect
 import itertools
+import json
 import os
-import pkgutil
 import random
 import re
+import textwrap
 import traceback
-from datetime import timedelta
 from pprint import pformat, pprint
 
 import sys
@@ -20,34 +22,27 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.gis.db import models as gis_models
-from django.contrib.gis import forms as gis_forms
-from django.contrib.gis.geos import Point, MultiPoint
 from django.contrib.messages.storage.fallback import FallbackStorage
-from django.contrib.postgres import fields as postgres_fields
-from django.contrib.postgres import forms as postgres_forms
+from django.core import serializers
+from django.core.serializers.base import DeserializationError
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.color import no_style
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import transaction, IntegrityError
+from django.db import transaction, IntegrityError, DatabaseError, connections, router
+from django.db import models as django_models
 from django.db.models import NOT_PROVIDED, BooleanField, TextField, CharField, SlugField, EmailField, DateTimeField, \
     DateField, FileField, PositiveSmallIntegerField, DecimalField, IntegerField, QuerySet, PositiveIntegerField, \
-    SmallIntegerField, BigIntegerField, FloatField, ImageField, GenericIPAddressField, URLField
+    SmallIntegerField, BigIntegerField, FloatField, ImageField, GenericIPAddressField, URLField, Model
+from django.db.migrations.loader import MigrationLoader
 from django.db.models.fields.related import RelatedField, ManyToManyField, ForeignKey, OneToOneField
-from django_filters import fields as django_filter_fields, FilterSet
+from django.db.models.signals import pre_save, post_save, m2m_changed
 from django.forms import fields as django_form_fields
 from django.forms import models as django_form_models
 from django.http import QueryDict
-from django.test import RequestFactory
-from django.urls import reverse, URLResolver, URLPattern, get_resolver
+from django.test import RequestFactory, override_settings
+from django.urls import reverse, get_resolver
 from django.utils.timezone import now
-from requests import Response
-
-try:
-    from django.db.models import JSONField
-except ImportError:
-    # older django
-    from django.contrib.postgres.fields import JSONField
 
 try:
     # older Django
@@ -58,18 +53,23 @@ except ImportError:
 
 from django.views.generic import CreateView, UpdateView, DeleteView
 
-# TODO: refactor: apps below are optional
-if 'internationalflavor' in getattr(settings, 'INSTALLED_APPS'):
-    from internationalflavor import iban as intflavor_iban, countries as intflavor_countries, vat_number as intflavor_vat
+import kaskader
+from kaskader.tests.dependency import sort_dependency, get_dependency_closure
+from kaskader.tests.discovery import ModuleIndex, IntrospectionIndex, UrlconfParser, DiscoveryRegistry, IdentityKey
+from kaskader.tests.integrations import registry as integrations, get_related_field_classes, get_m2m_field_classes, \
+    FieldMapResolver
+from kaskader.tests.profiling import ImportProfiler
+from kaskader.tests.routing import UrlTable, UrlSelector, ModelNameIndex, UrlArgIndex, get_url_name, get_view_class
+from kaskader.tests.tracking import sequences, identity_map, row_counter, created_rows, has_receivers, get_savepoint, \
+    rollback_to_savepoint, ObjsSnapshot
 
-if 'pragmatic' in getattr(settings, 'INSTALLED_APPS'):
-    import pragmatic
 
-if 'gm2m' in getattr(settings, 'INSTALLED_APPS'):
-    from gm2m import GM2MField
-    RELATED_FIELDS = (RelatedField, GM2MField)
-else:
-    RELATED_FIELDS = (RelatedField)
+class EmptyResponse(object):
+    '''
+    stands for GET response of urls which are not tested by GET, same as empty requests.Response it has no status code
+    '''
+    status_code = None
+
 
 class InputMixin(object):
     # USER_MODEL = User # there is possibility to manualy specify user model to be used, see user_model()
@@ -79,6 +79,16 @@ class InputMixin(object):
     IGNORE_MODEL_FIELDS = {}  # values for these model fields will not be generated, use for fields with automatically assigned values, for example {MPTTModel: ['lft', 'rght', 'tree_id', 'level']}
     PRINT_SORTED_MODEL_DEPENDENCY = False   # print models dependency for debug purposes
     PRINT_TEST_SUBJECT = False # print url params/filter class/queryset being tested
+    CACHE_DIR = '.kaskader_cache'  # directory for persistent discovery caches (module index, ...), None keeps caches in memory only
+    PROFILE_IMPORTS = False  # print time and memory of modules imported by import_modules_if_needed, report is saved to CACHE_DIR/import_profile.json
+    BULK_CREATE_OBJS = True  # generate objects of models without custom save and save signal receivers by bulk_create
+    IN_MEMORY_STORAGE = False  # store files of generated objects and posted forms in memory instead of default storage (django 4.2+)
+    VOLUME_OBJS = {}  # extra objects for performance testing, number per model or ratio per related object of fk, for example {CarBrand: 10, Car: {'brand': 100}}
+    VOLUME_BATCH_SIZE = 1000  # volume objects are generated and inserted in batches of this size
+    SNAPSHOT_OBJS = False  # save generated objects to CACHE_DIR/snapshots.json and load them in next runs, generated again when migrations or generator configuration change
+    _field_name_map = None
+    _field_map_resolver = None
+    _form_field_map_resolver = None
 
     # params for GenericTestMixin.test_urls
     RUN_ONLY_THESE_URL_NAMES = []  # if not empty will run tests only for provided urls, for debug purposes to save time
@@ -127,7 +137,8 @@ class InputMixin(object):
     def default_field_name_map(cls):
         '''
         field values by field name used to generate objects, this has priority before default_field_map,
-        values can be callables with field variable, extend in subclass as needed
+        values can be callables with field variable, extend in subclass as needed,
+        map is built once per test class, so mutable values should be returned by callables
         '''
         return {
             'year': now().year,
@@ -138,7 +149,7 @@ class InputMixin(object):
     def default_field_map(cls):
         '''
         field values by field class used to generate objects, values can be callables with field variable,
-        extend in subclass as needed
+        extend in subclass as needed, map is built once per test class, so mutable values should be returned by callables
         '''
 
         map = {
@@ -149,12 +160,8 @@ class InputMixin(object):
             CharField: lambda f: cls.get_char_field_mock_value(f),
             SlugField: lambda f: '{}_{}'.format(f.name, cls.next_id(f.model)),
             EmailField: lambda f: '{}.{}@example.com'.format(f.model._meta.label_lower, cls.next_id(f.model)),
-            gis_models.PointField: Point(0.1276, 51.5072),
-            gis_models.MultiPointField: MultiPoint(Point(0.1276, 51.5072), Point(0.1276, 51.5072)),
             DateTimeField: lambda f: now(),
             DateField: lambda f: now().date(),
-            postgres_fields.DateTimeRangeField: (now(), now() + timedelta(days=1)),
-            postgres_fields.DateRangeField: (now().date(), now() + timedelta(days=1)),
             FileField: lambda f: cls.get_pdf_file_mock(),
             IntegerField: lambda f: cls.get_num_field_mock_value(f),
             PositiveSmallIntegerField: lambda f: cls.get_num_field_mock_value(f),
@@ -165,22 +172,17 @@ class InputMixin(object):
             FloatField: lambda f: cls.get_num_field_mock_value(f),
             ImageField: lambda f: cls.get_image_file_mock(),
             GenericIPAddressField: '127.0.0.1',
-            postgres_fields.JSONField: {'key': 'value'},
-            postgres_fields.HStoreField: {'key': 'value'},
-            postgres_fields.ArrayField: lambda f: [cls.default_field_map()[f.base_field.__class__](f.base_field)],
-            JSONField: {},
             URLField: lambda f: 'www.google.com',
         }
 
         try:
-            map.update({
-                intflavor_countries.CountryField: 'LU',
-                intflavor_iban.IBANField: 'LU28 0019 4006 4475 0000',
-                intflavor_vat.VATNumberField: lambda f: 'LU{}'.format(random.randint(10000000, 99999999)),  # 'GB904447273',
-            })
-        except NameError:
+            map.update({django_models.JSONField: lambda f: {}})
+        except AttributeError:
+            # older django, postgres JSONField is provided by postgres integration
             pass
 
+        # optional integrations (gis, postgres, internationalflavor, ...) are imported on first use
+        map.update(integrations.get_field_map(cls))
         return map
 
     @classmethod
@@ -190,12 +192,6 @@ class InputMixin(object):
         extend in subclass as needed
         '''
         map = {
-            django_filter_fields.ModelChoiceField: lambda f: f.queryset.first().id,
-            django_filter_fields.ModelMultipleChoiceField: lambda f: f.queryset.first().id,
-            django_filter_fields.MultipleChoiceField: lambda f: [list(f.choices)[-1][0]] if f.choices else ['{}'.format(f.label)],
-            django_filter_fields.ChoiceField: lambda f: list(f.choices)[-1][0],
-            django_filter_fields.RangeField: lambda f: [1, 100],
-            django_filter_fields.DateRangeField: lambda f: (now().date(), now() + timedelta(days=1)),
             django_form_fields.EmailField: lambda f: cls.get_new_email(),
             django_form_fields.CharField: lambda f: '{}_{}'.format(f.label.encode('utf8') if f.label else f.label, random.randint(1, 999))[:f.max_length],
             django_form_fields.TypedChoiceField: lambda f: list(f.choices)[-1][1][0][0] if f.choices and isinstance(list(f.choices)[-1][1], list) else list(f.choices)[-1][0] if f.choices else '{}'.format(f.label)[:f.max_length],
@@ -216,42 +212,48 @@ class InputMixin(object):
             django_form_fields.SplitDateTimeField: lambda f: [now().date(), now().time()],
             django_form_fields.GenericIPAddressField: '127.0.0.1',
             django_form_fields.FloatField: lambda f: cls.get_num_field_mock_value(f),
-            gis_forms.PointField: 'POINT (0.1276 51.5072)',
-            postgres_forms.HStoreField: '',
-            postgres_forms.SimpleArrayField: lambda f: [cls.default_form_field_map()[f.base_field.__class__](f.base_field)],
-            postgres_forms.DateTimeRangeField: lambda f: [now().strftime(list(f.input_formats)[-1]) if hasattr(f, 'input_formats') else now(), now().strftime(list(f.input_formats)[-1]) if hasattr(f, 'input_formats') else now()],
         }
 
-        try:
-            map.update({
-                intflavor_countries.CountryFormField: 'LU',  # random.choice(UN_RECOGNIZED_COUNTRIES),
-                intflavor_iban.IBANFormField: 'LU28 0019 4006 4475 0000',
-                intflavor_vat.VATNumberFormField: lambda f: 'LU{}'.format(random.randint(10000000, 99999999)),  # 'GB904447273',
-            })
-        except NameError:
-            pass
-
         try:
             map.update({django_form_fields.JSONField: ''})
         except AttributeError:
             # older django
             pass
 
-        try:
-            map.update({
-                pragmatic.fields.AlwaysValidChoiceField: lambda f: list(f.choices)[-1][0] if f.choices else '{}'.format(f.label),
-                pragmatic.fields.AlwaysValidMultipleChoiceField: lambda f: str(list(f.choices)[-1][0]) if f.choices else str(f.label),
-                pragmatic.fields.SliderField: lambda f: '{},{}'.format(f.min, f.max) if f.has_range else str(f.min),
-            })
-        except NameError:
-            # pragmatic not installed
-            pass
-        except AttributeError:
-            # older django
-            pass
+        # optional integrations (django_filters, gis, postgres, pragmatic, ...) are imported on first use
+        map.update(integrations.get_form_field_map(cls))
+        return map
 
+    @classmethod
+    def get_field_name_map(cls):
+        '''
+        returns default_field_name_map, map is built once per test class
+        '''
+        if cls._field_name_map is None or cls._field_name_map[0] is not cls:
+            cls._field_name_map = (cls, cls.default_field_name_map())
 
-        return map
+        return cls._field_name_map[1]
+
+    @classmethod
+    def get_field_map_resolver(cls):
+        '''
+        returns FieldMapResolver of default_field_map, map is built once per test class,
+        auto fields are not generated, they are matched only if their own class is mapped
+        '''
+        if cls._field_map_resolver is None or cls._field_map_resolver[0] is not cls:
+            cls._field_map_resolver = (cls, FieldMapResolver(cls.default_field_map(), exact_classes=(django_models.AutoField,)))
+
+        return cls._field_map_resolver[1]
+
+    @classmethod
+    def get_form_field_map_resolver(cls):
+        '''
+        returns FieldMapResolver of default_form_field_map, map is built once per test class
+        '''
+        if cls._form_field_map_resolver is None or cls._form_field_map_resolver[0] is not cls:
+            cls._form_field_map_resolver = (cls, FieldMapResolver(cls.default_form_field_map()))
+
+        return cls._form_field_map_resolver[1]
 
     @property
     def url_params_map(self):
@@ -294,13 +296,33 @@ class InputMixin(object):
 
 
 class BaseMixin(object):
+    _func_args_plans = {}  # function: (first positional, args, keyword_args, kwargs) names, shared by all subclasses
+
     @classmethod
     def import_modules_if_needed(cls):
         '''
-        import all modules encountered if some where not yet imported, for example when searching for models dependency or urls in source code
+        import all modules encountered if some where not yet imported, for example when searching for models dependency or urls in source code,
+        with PROFILE_IMPORTS time and memory of imported modules is reported
         '''
         module_names = cls.get_submodule_names(cls.CHECK_MODULES, cls.CHECK_MODULES, cls.EXCLUDE_MODULES)
+        module_names = sorted([module_name for module_name in module_names if module_name not in sys.modules.keys()])
+
+        if not getattr(cls, 'PROFILE_IMPORTS', False) or not module_names:
+            cls.import_modules(module_names)
+            return
+
+        with ImportProfiler() as profiler:
+            cls.import_modules(module_names)
 
+        print(profiler.report())
+
+        if getattr(cls, 'CACHE_DIR', None):
+            file_path = os.path.join(cls.CACHE_DIR, 'import_profile.json')
+            profiler.save(file_path)
+            print('Import profile saved to {}'.format(file_path))
+
+    @classmethod
+    def import_modules(cls, module_names):
         for module_name in module_names:
             try:
                 if module_name not in sys.modules.keys():
@@ -327,37 +349,56 @@ class BaseMixin(object):
         return [app for app in apps.get_app_configs() if app.name.startswith(tuple(cls.CHECK_MODULES))]
 
     @classmethod
-    def get_module_class_methods(cls, module):
-        classes = cls.get_module_classes(module)  # get not imported classes defined in module
-        methods = set()
+    def get_module(cls, module_name):
+        '''
+        returns module, imports it if it was not imported yet
+        '''
+        try:
+            if module_name not in sys.modules.keys():
+                importlib.import_module(module_name)
+        except Exception as e:
+            print('Failed to import module: {}'.format(module_name))
+            raise e
+
+        return sys.modules[module_name]
+
+    @classmethod
+    def get_module_members(cls, module):
+        '''
+        returns ModuleMembers of module (classes, functions, class methods, filters, filtersets and tests) collected once per process
+        '''
+        if isinstance(module, str):
+            module = cls.get_module(module)
 
-        for cls in classes:
-            methods |= {value for value in cls.__dict__.values() if callable(value)}
+        return IntrospectionIndex.get_module_members(module)
 
-        return methods
+    @classmethod
+    def get_module_class_methods(cls, module):
+        '''
+        returns callables defined in not imported classes of module
+        '''
+        return set(cls.get_module_members(module).class_methods)
 
     @classmethod
     def get_module_classes(cls, module):
         '''
         returns only not imported classes defined in module
         '''
-        return {m[1] for m in inspect.getmembers(module, inspect.isclass) if m[1].__module__ == module.__name__}
+        return set(cls.get_module_members(module).classes)
 
     @classmethod
     def get_module_functions(cls, module):
         '''
         returns only not imported functions defined in module
         '''
-        return {m[1] for m in inspect.getmembers(module, inspect.isfunction) if m[1].__module__ == module.__name__}
+        return set(cls.get_module_members(module).functions)
 
     @classmethod
     def get_submodule_names(cls, parent_module_names, submodule_names, exclude_names=[]):
         '''
         looks for submodules of parent_module containing submodule_name and not containing any of exclude_names,
-        which are not package (files, not dirs)
+        which are not package (files, not dirs), answered from persistent ModuleIndex
         '''
-        module_names = set()
-
         if isinstance(parent_module_names, str):
             parent_module_names = [parent_module_names]
 
@@ -367,19 +408,8 @@ class BaseMixin(object):
         if isinstance(exclude_names, str):
             exclude_names = [exclude_names]
 
-        for parent_module_name in parent_module_names:
-            parent_module = sys.modules[parent_module_name]
-
-            for importer, modname, ispkg in pkgutil.walk_packages(path=parent_module.__path__,
-                                                                  prefix=parent_module.__name__ + '.',
-                                                                  onerror=lambda x: None):
-
-                for submodule_name in submodule_names:
-                    if submodule_name in modname and not ispkg:
-                        if not any([exclude_name in modname for exclude_name in exclude_names]):
-                            module_names.add(modname)
-
-        return (module_names)
+        module_index = ModuleIndex.get(getattr(cls, 'CACHE_DIR', None))
+        return module_index.get_submodule_names(parent_module_names, submodule_names, exclude_names)
 
     @classmethod
     def parse_args(cls, args, eval_args=True, eval_kwargs=True):
@@ -419,87 +449,88 @@ class BaseMixin(object):
         # maching kwarg names with
         # 1. model names and assigns generated objs acordingly,
         # 2. field names of instance.model if exists such that instance.func
-        models = {model._meta.label_lower.split('.')[-1]: model for model in cls.get_models()}
+        models_by_name = cls.get_models_by_name()
         result_kwargs = dict(default)
 
-        try:
-            for name, value in kwargs.items():
-                if name in default:
-                    # result_kwargs[name] = default[name]
-                    pass
-                elif name == 'email':
-                    result_kwargs[name] = cls.get_generated_email()
-                else:
-                    matching_models = [model for model_name, model in models.items() if model_name == name]
+        for name in itertools.chain(kwargs, args):
+            if name in ['self', '*args', '**kwargs'] or name in default:
+                continue
 
-                    if len(matching_models) == 1:
-                        result_kwargs[name] = cls.get_generated_obj(matching_models[0])
-                    elif not func is None:
-                        model = None
+            if name == 'email':
+                result_kwargs[name] = cls.get_generated_email()
+            elif name in models_by_name:
+                result_kwargs[name] = cls.get_generated_obj(models_by_name[name])
+            elif not func is None:
+                model = None
 
-                        if hasattr(func, 'im_self') and hasattr(func.im_self, 'model'):
-                            model = func.im_self.model
+                if hasattr(func, 'im_self') and hasattr(func.im_self, 'model'):
+                    model = func.im_self.model
 
-                        if not model is None:
-                            try:
-                                result_kwargs[name] = getattr(cls.get_generated_obj(model), name)
-                            except AttributeError:
-                                pass
+                if not model is None:
+                    try:
+                        result_kwargs[name] = getattr(cls.get_generated_obj(model), name)
+                    except AttributeError:
+                        pass
 
-        except:
-            raise
-            kwargs = {}
+        return result_kwargs
 
-        for arg in args:
-            if arg in ['self', '*args', '**kwargs']:
-                continue
+    @classmethod
+    def get_func_args_plan(cls, func):
+        '''
+        returns names of func parameters as (args, keyword_args, kwargs), positional and keyword only parameters
+        without default value and parameters with default value, built from inspect.signature of underlying function
+        once per function, first parameter of bound method is skipped
+        '''
+        function = getattr(func, '__func__', func)
 
-            if arg in default:
-                result_kwargs[arg] = default[arg]
-            elif arg == 'email':
-                result_kwargs[arg] = cls.get_generated_email()
-            else:
-                matching_models = [model for name, model in models.items() if name == arg]
+        if function not in BaseMixin._func_args_plans:
+            first = None
+            args = []
+            keyword_args = []
+            kwargs = []
 
-                if len(matching_models) == 1:
-                    result_kwargs[arg] = cls.get_generated_obj(matching_models[0])
-                elif not func is None:
-                    model = None
+            for name, parameter in inspect.signature(function).parameters.items():
+                if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+                    continue
 
-                    if hasattr(func, 'im_self') and hasattr(func.im_self, 'model'):
-                        model = func.im_self.model
+                if first is None and parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+                    first = name
 
-                    if not model is None:
-                        try:
-                            result_kwargs[arg] = getattr(cls.get_generated_obj(model), arg)
-                        except AttributeError:
-                            pass
+                if parameter.default is not parameter.empty:
+                    kwargs.append(name)
+                elif parameter.kind == parameter.KEYWORD_ONLY:
+                    keyword_args.append(name)
+                else:
+                    args.append(name)
 
-        return result_kwargs
+            BaseMixin._func_args_plans[function] = (first, tuple(args), tuple(keyword_args), tuple(kwargs))
+
+        first, args, keyword_args, kwargs = BaseMixin._func_args_plans[function]
+
+        if function is not func and getattr(func, '__self__', None) is not None:
+            # self or cls is already bound
+            args = tuple([name for name in args if name != first])
+            kwargs = tuple([name for name in kwargs if name != first])
+
+        return args, keyword_args, kwargs
 
     @classmethod
     def generate_func_args(cls, func, default={}):
-        source = inspect.getsource(func)
-        args = r'([^\)]*)'
-        args = re.findall('def {}\({}\):'.format(func.__name__, args), source)
-        args = [args[0].replace(' *,', '')] # dont really get why would someone use this but it happened
-        return cls.generate_kwargs(*cls.parse_args(args[0], eval_args=False, eval_kwargs=False), func=func, default=default)
+        args, keyword_args, kwargs = cls.get_func_args_plan(func)
+        # keyword only parameters without default value are required same as positional ones
+        return cls.generate_kwargs(args + keyword_args, kwargs, func=func, default=default)
 
     @classmethod
     def get_url_namespace_map(cls):
-        resolver = urls.get_resolver(urls.get_urlconf())
-        namespaces = {'': [key for key in resolver.reverse_dict.keys() if not callable(key)]}
-        for key_1, resolver_1 in resolver.namespace_dict.items():
-            namespaces[key_1] = [key for key in resolver_1[1].reverse_dict.keys() if not callable(key)]
-
-            for key_2, resolver_2 in resolver_1[1].namespace_dict.items():
-                namespaces['{}:{}'.format(key_1, key_2)] = [key for key in resolver_2[1].reverse_dict.keys() if not callable(key)]
-
-                for key_3, resolver_3 in resolver_2[1].namespace_dict.items():
-                    namespaces['{}:{}:{}'.format(key_1, key_2, key_3)] = [key for key in resolver_3[1].reverse_dict.keys() if
-                                                              not callable(key)]
+        '''
+        returns {namespace: url names} for namespaces of any depth, 'ns_1:ns_2'
+        '''
+        table = UrlTable.get(urls.get_resolver(urls.get_urlconf()))
 
-        return namespaces
+        return {
+            namespace: [table.entries[index].url.name for index in node.entries if table.entries[index].url.name]
+            for namespace, node in table.namespace_index.get_namespaces().items()
+        }
 
     @classmethod
     def get_url_namespaces(cls):
@@ -513,35 +544,44 @@ class BaseMixin(object):
 
     @classmethod
     def get_url_views_by_module(cls):
-        source_by_module = cls.get_source_code(['urls'], lines=False)
+        '''
+        class based views used in urls modules, parsed from source by UrlconfParser, any formatting of path/re_path/url is supported
+        '''
+        module_names = sorted(cls.get_submodule_names(cls.CHECK_MODULES, ['urls'], cls.EXCLUDE_MODULES))
+        urlconf_parser = UrlconfParser.get(getattr(cls, 'CACHE_DIR', None))
         paths_by_module = OrderedDict()
 
-        skip_comments = r'([ \t]*#*[ \t]*)'
-        pgettext_str = r'(?:pgettext_lazy\(["\']url["\'],)? ?'
-        url_pattern_1 = r'["\'](.*)["\']'
-        url_pattern_2 = r'r["\']\^(.*)\$["\']'
-        url_pattern = '(?:{}|{})'.format(url_pattern_1, url_pattern_2)
-        view_class = r'(\w+)'
-        view_params = r'([^\)]*)'
-        path_name = r'["\']([\w-]+)["\']'
+        for module_name in module_names:
+            module = cls.get_module(module_name)
+            urlconf = urlconf_parser.parse_module(module)
+            imported_classes = cls.get_module_members(module).namespace_classes
+            app_name = urlconf['app_name'] or module_name.replace('.urls', '').split('.')[-1]
 
-        for module_name, source_code in source_by_module.items():
-            regex_paths = re.findall('{}(?:path|url)\({}{}\)?, ?{}.as_view\({}\), ?name={}'.format(skip_comments, pgettext_str, url_pattern, view_class, view_params, path_name), source_code)
-            imported_classes = dict(inspect.getmembers(sys.modules[module_name], inspect.isclass))
-            app_name = re.findall('app_name *= *\'(\w+)\'', source_code)
+            paths_by_module[module_name] = [{
+                'app_name': app_name,
+                'path_name': path['path_name'],
+                'url_pattern': path['url_pattern'],
+                'view_class': cls.get_view_class_by_name(module, imported_classes, path['view_class']),
+                'view_params': tuple(path['view_params']),
+            } for path in urlconf['paths']]
+
+        urlconf_parser.save()
+        return paths_by_module
 
-            if not app_name:
-                app_name = [module_name.replace('.urls', '').split('.')[-1]]
+    @classmethod
+    def get_view_class_by_name(cls, module, imported_classes, view_name):
+        '''
+        resolves view class name from urls module namespace, also dotted as views.MyView
+        '''
+        if '.' not in view_name:
+            return imported_classes.get(view_name, None)
 
-            paths_by_module[module_name] = [{
-                'app_name': app_name[0],
-                'path_name': regex_path[5],
-                'url_pattern': regex_path[1] if regex_path[1] else regex_path[2],
-                'view_class': imported_classes.get(regex_path[3], None),
-                'view_params': cls.parse_args(regex_path[4], eval_args=False, eval_kwargs=False),
-            } for regex_path in regex_paths if '#' not in regex_path[0]]
+        obj = module
 
-        return paths_by_module
+        for attr in view_name.split('.'):
+            obj = getattr(obj, attr, None)
+
+        return obj if inspect.isclass(obj) else None
 
     @classmethod
     def get_apps_by_name(cls, app_name=[]):
@@ -572,109 +612,62 @@ class BaseMixin(object):
         })
 
     @classmethod
-    def get_models_dependency(cls, required_only=True):
-        models = cls.get_models()
-
-        # find direct dependencies
-        dependency = OrderedDict({
-            model: {
-                'required': {f.related_model for f in model._meta.get_fields()
-                             if not getattr(f, 'blank', False) and isinstance(f,
-                                                                              RelatedField) and f.concrete and not f.auto_created},
-                'not_required': {} if required_only else {f.related_model for f in model._meta.get_fields()
-                                                          if getattr(f, 'blank', False) and isinstance(f,
-                                                                                                       RelatedField) and f.concrete and not f.auto_created},
-            } for model in cls.get_models()
-        })
-
-        missing_models = set()
-
-        for model, relations in dependency.items():
-            missing_models |= relations['required']
-
-        missing_models -= set(dependency.keys())
-        missing_models -= {ContentType}
-
-        # add missing models
-        dependency.update({
-            model: {
-                'required': {f.related_model for f in model._meta.get_fields()
-                             if not getattr(f, 'blank', False) and isinstance(f,
-                                                                              RelatedField) and f.concrete and not f.auto_created},
-                'not_required': {} if required_only else {f.related_model for f in model._meta.get_fields()
-                                                          if getattr(f, 'blank', False) and isinstance(f,
-                                                                                                       RelatedField) and f.concrete and not f.auto_created},
-            } for model in missing_models
-        })
-
-        # add manualy set dependencies
-        for model, relations in cls.manual_model_dependency().items():
-            if relations:
-                dependency[model]['required'] |= relations
+    def get_model_direct_dependency(cls, model, required=True):
+        '''
+        returns {related model: field} of concrete related fields of model which are required (not blank) or not required
+        '''
+        dependency = OrderedDict()
 
-        # add deeper level dependencies
-        for i in range(2):
-            # include 2nd and 3rd level dependencies, increase range to increase depth level
-            for model in dependency.keys():
-                for necesary_model in set(dependency[model]['required']):
-                    if necesary_model in dependency.keys():
-                        dependency[model]['required'] |= dependency[necesary_model]['required']
+        for f in model._meta.get_fields():
+            if isinstance(f, RelatedField) and f.concrete and not f.auto_created and bool(getattr(f, 'blank', False)) != required:
+                dependency.setdefault(f.related_model, f)
 
         return dependency
 
     @classmethod
-    def get_sorted_models_dependency(cls, required_only=False, reverse=False):
-        def compare_models_dependency(x, y):
-            # less dependent first
-            if x[0] in y[1]['required'] and y[0] in x[1]['required']:
-                # circular required dependency should not happen
-                raise ValueError('Circular dependency of models {}, {}'.format(x[0], y[0]))
-
-            if x[0] in y[1]['required'] and y[0] not in x[1]['required']:
-                # model y depends on x through required field, x < y
-                return -1
-
-            if x[0] not in y[1]['required'] and y[0] in x[1]['required']:
-                # model x depends on y through required field, x > y
-                return +1
-
-            if x[0] in y[1]['not_required'] and y[0] not in x[1]['not_required']:
-                # model y depends on x, x < y
-                return -1
+    def get_models_dependency(cls, required_only=True):
+        '''
+        returns {model: {'required': models, 'not_required': models, 'required_chains': {model: (field, ...)}}},
+        required models are full transitive closure of required relations and required_chains contain fields
+        (None for manual dependency) through which model depends on each of them
+        '''
+        direct_dependency = OrderedDict((model, cls.get_model_direct_dependency(model)) for model in cls.get_models())
 
-            if x[0] not in y[1]['not_required'] and y[0] in x[1]['not_required']:
-                # model x depends on y, x > y
-                return +1
+        # add missing models, also required by other missing models
+        missing_models = [model for relations in direct_dependency.values() for model in relations]
 
-            if len(x[1]['required']) < len(y[1]['required']):
-                # model x doesnt require any model, y does
-                return -1
+        while missing_models:
+            model = missing_models.pop(0)
 
-            if len(x[1]['required']) > len(y[1]['required']):
-                # model y doesnt require any model, x does
-                return +1
+            if model in direct_dependency or model is ContentType:
+                continue
 
-            if len(x[1]['not_required']) < len(y[1]['not_required']):
-                # model x  doesnt depend on any model, y does
-                return -1
+            direct_dependency[model] = cls.get_model_direct_dependency(model)
+            missing_models.extend(direct_dependency[model].keys())
 
-            if len(x[1]['not_required']) > len(y[1]['not_required']):
-                # model y  doesnt depend on any model, x does
-                return +1
+        # add manualy set dependencies
+        for model, relations in cls.manual_model_dependency().items():
+            for relation in relations or []:
+                direct_dependency.setdefault(model, OrderedDict()).setdefault(relation, None)
 
-            return 0
+        closure = get_dependency_closure(direct_dependency)
 
-        # sort alphabetically for consistent initial order
-        sorted_models = OrderedDict(sorted(cls.get_models_dependency(required_only).items(), key=lambda x: x[0]._meta.label, reverse=reverse))
+        return OrderedDict((model, {
+            'required': set(closure[model].keys()),
+            'not_required': set() if required_only else set(cls.get_model_direct_dependency(model, required=False).keys()),
+            'required_chains': closure[model],
+        }) for model in direct_dependency)
 
-        if sys.version_info[0] >= 3:
-            # move manual dependencies to the beggining to force correct order (sort by dependencies is too ambiguous)
-            for model, dependcies in cls.manual_model_dependency().items():
-                for dependency in dependcies:
-                    sorted_models.move_to_end(dependency, last=reverse)
+    @classmethod
+    def get_sorted_models_dependency(cls, required_only=False, reverse=False):
+        '''
+        models in topological order of their dependencies, less dependent first (or last if reverse),
+        independent models are sorted alphabetically, raises ValueError with cycle path for circular required dependency
+        '''
+        sorted_models = sort_dependency(cls.get_models_dependency(required_only), key=lambda model: model._meta.label)
 
-        # sort by dependencies
-        sorted_models = OrderedDict(sorted(sorted_models.items(), key=functools.cmp_to_key(compare_models_dependency), reverse=reverse))
+        if reverse:
+            sorted_models = OrderedDict(reversed(list(sorted_models.items())))
 
         if cls.PRINT_SORTED_MODEL_DEPENDENCY:
             pprint(sorted_models)
@@ -684,8 +677,9 @@ class BaseMixin(object):
     @classmethod
     def get_models_fields(cls, model, required=None, related=None):
         is_required = lambda f: True if required is None else cls.is_required_field(f) == required
-        is_related = lambda f: isinstance(f, RELATED_FIELDS) if related is True else not isinstance(f, RELATED_FIELDS) if related is False else True
-        is_gm2m = lambda f: isinstance(f, GM2MField) if 'gm2m' in getattr(settings, 'INSTALLED_APPS') and related is True else False
+        related_fields = get_related_field_classes()
+        is_related = lambda f: isinstance(f, related_fields) if related is True else not isinstance(f, related_fields) if related is False else True
+        is_gm2m = lambda f: isinstance(f, related_fields[1:]) if related is True else False
         return [f for f in model._meta.get_fields() if (is_required(f) and is_related(f) and f.concrete and not f.auto_created) or (is_required(f) and is_gm2m(f))]
 
     @classmethod
@@ -699,6 +693,9 @@ class BaseMixin(object):
 class CollectMixin(object):
     # collect models and urls
     _models = None
+    _models_by_name = None
+    _model_name_index = None
+    _url_selector = None
     _urls = None
     _test_urls = None
     _exclude_urls = None
@@ -715,82 +712,102 @@ class CollectMixin(object):
 
         return False
 
+    @classmethod
+    def get_discovery_key(cls):
+        '''
+        configuration which determines collected models and urls, classes with equal key share them,
+        overridden discovery methods are part of key
+        '''
+        methods = ['manual_model_dependency', 'apps_to_check', 'collect_models', 'get_url_views_by_module']
+        methods = [getattr(cls, method, None) for method in methods]
+
+        return (
+            DiscoveryRegistry.make_key(cls.CHECK_MODULES),
+            DiscoveryRegistry.make_key(cls.EXCLUDE_MODULES),
+            DiscoveryRegistry.make_key(cls.RUN_ONLY_THESE_URL_NAMES),
+            DiscoveryRegistry.make_key(cls.RUN_ONLY_URL_NAMES_CONTAINING),
+            DiscoveryRegistry.make_key(cls.IGNORE_URL_NAMES_CONTAINING),
+        ) + tuple([getattr(method, '__func__', method) for method in methods])
+
+    @classmethod
+    def get_discovered(cls, target_attr, collect, key=()):
+        '''
+        returns result of collect shared by all classes with same discovery key and sets its copy as target_attr,
+        so changes of class attribute don't leak to other classes
+        '''
+        result = DiscoveryRegistry.get((target_attr, cls.get_discovery_key()) + tuple(key), collect)
+        setattr(cls, target_attr, copy.copy(result))
+        return getattr(cls, target_attr)
+
     @classmethod
     def get_models(cls):
         if not cls.attr_empty('_models'):
             return cls._models
 
-        return cls.collect_models()
+        return cls.get_discovered('_models', cls.collect_models)
+
+    @classmethod
+    def get_models_by_name(cls):
+        '''
+        returns {model name: model} of collected models, built once per collected models
+        '''
+        models = cls.get_models()
+
+        if cls._models_by_name is None or cls._models_by_name[0] is not models:
+            cls._models_by_name = (models, {model._meta.label_lower.split('.')[-1]: model for model in models})
+
+        return cls._models_by_name[1]
 
     @classmethod
     def collect_models(cls, target_attr='_models'):
-        models = [model for app in cls.apps_to_check() for model in app.get_models()]
+        # insertion ordered set
+        models = OrderedDict((model, None) for app in cls.apps_to_check() for model in app.get_models())
 
         for module_name, module_params in cls.get_url_views_by_module().items():
             for path_params in module_params:
                 model = getattr(path_params['view_class'], 'model', None)
-                if model and model not in models:
-                    models.append(model)
+                if model:
+                    models.setdefault(model, None)
 
         proxied_models = [model._meta.concrete_model for model in models if model._meta.proxy]
         proxied_apps = {apps.get_app_config(model._meta.app_label) for model in proxied_models}
 
         for app in proxied_apps:
-            models.extend([model for model in app.get_models() if model not in models])
+            for model in app.get_models():
+                models.setdefault(model, None)
 
         # add missing models manually provided
         if hasattr(cls, 'manual_model_dependency'):
             for model, dependencies in cls.manual_model_dependency().items():
-                if model not in models:
-                    models.append(model)
+                models.setdefault(model, None)
 
                 for dependency in dependencies:
-                    if dependency not in models:
-                        models.append(dependency)
+                    models.setdefault(dependency, None)
 
-        setattr(cls, target_attr, models)
+        setattr(cls, target_attr, list(models))
         return getattr(cls, target_attr)
 
     @classmethod
     def crawl_urls_with_action(cls, urls, action, parent_pattern='', parent_namespace='', parent_app_name='',
                                filter_namespace=None, exclude_namespace=None, filter_app_name=None,
-                               exclude_app_name=None, target_attr='_urls'):
-        if isinstance(urls, URLResolver):
-            urls = urls.url_patterns
-
-        for url in urls:
-            if isinstance(url, URLResolver):
-                if (exclude_namespace is not None and exclude_namespace == url.namespace) or (
-                        exclude_app_name is not None and exclude_app_name == url.app_name):
-                    continue
-
-                # if cls.PRINT_TEST_SUBJECT and (filter_namespace is None or filter_namespace == url.namespace) and (
-                #         filter_app_name is None or filter_app_name == url.app_name):
-                #     print('NAMESPACE', url.namespace, type(url.namespace), 'APP_NAME', url.app_name)
-
-                cls.crawl_urls_with_action(url, action, f'{parent_pattern}{url.pattern}',
-                                           f"{parent_namespace}:{url.namespace or ''}",
-                                           f"{parent_app_name}:{url.app_name or ''}",
-                                           filter_namespace, exclude_namespace, filter_app_name, exclude_app_name,
-                                           target_attr)
-
-            elif isinstance(url, URLPattern):
-                # print(if_none(parent_pattern) + str(url.pattern))
-                if (filter_namespace is None or filter_namespace in parent_namespace) and (
-                        filter_app_name is None or filter_app_name in parent_app_name):
-                    # print(url.__dict__.keys(), url.callback.__dict__)
-                    action(
-                        url=url,
-                        pattern=f'{parent_pattern}{url.pattern}',
-                        url_name=cls.get_url_name(url, parent_namespace.strip(':')),
-                        target_attr=target_attr,
-                    )
+                               exclude_app_name=None, target_attr='_urls', namespace_match='contains'):
+        '''
+        calls action for every url pattern of urls matching filters, urls are taken from flattened UrlTable
+        so resolver is traversed only once per process
+        '''
+        for entry, pattern, url_name in UrlTable.get(urls).filter(parent_pattern, parent_namespace, parent_app_name,
+                                                                  filter_namespace, exclude_namespace,
+                                                                  filter_app_name, exclude_app_name, namespace_match):
+            action(
+                url=entry.url,
+                pattern=pattern,
+                url_name=url_name,
+                target_attr=target_attr,
+            )
 
     @classmethod
     def get_url_name(cls, url, parent_namespace):
-        url_name = f"{parent_namespace}:{url.name or ''}"
-        url_name = url_name.strip(':')
-        return url_name
+        return get_url_name(url.name, parent_namespace)
 
     @classmethod
     def get_urls(cls, **kwargs):
@@ -802,18 +819,26 @@ class CollectMixin(object):
         if 'urls' not in kwargs:
             kwargs['urls'] = get_resolver()
 
-        # reset urls before collecting
-        setattr(cls, target_attr, None)
-        return cls.collect_urls(**kwargs)
+        def collect():
+            # reset urls before collecting
+            setattr(cls, target_attr, None)
+            return cls.collect_urls(**kwargs)
+
+        # urls are part of key by identity, other arguments are filters
+        key = tuple(sorted([(name, IdentityKey(value) if name == 'urls' else DiscoveryRegistry.make_key(value))
+                            for name, value in kwargs.items()], key=lambda item: item[0]))
+        return cls.get_discovered(target_attr, collect, key)
 
     @classmethod
     def collect_urls(cls, urls, parent_pattern='', parent_namespace='', parent_app_name='', filter_namespace=None,
-                     exclude_namespace=None, filter_app_name=None, exclude_app_name=None, target_attr='_urls'):
+                     exclude_namespace=None, filter_app_name=None, exclude_app_name=None, target_attr='_urls',
+                     namespace_match='contains'):
         if cls.attr_empty(target_attr):
             setattr(cls, target_attr, [])
 
         cls.crawl_urls_with_action(urls, cls.collect_url, parent_pattern, parent_namespace, parent_app_name,
-                                   filter_namespace, exclude_namespace, filter_app_name, exclude_app_name, target_attr)
+                                   filter_namespace, exclude_namespace, filter_app_name, exclude_app_name, target_attr,
+                                   namespace_match)
 
         return getattr(cls, target_attr)
 
@@ -828,37 +853,52 @@ class CollectMixin(object):
             return
 
         if target_attr != '_urls':
-            if not url_name or cls.skip_url(url_name):
+            if not url_name:
                 return
 
-            if url_name in cls.get_exclude_urls():
+            url_selector = cls.get_url_selector()
+
+            if url_selector.exclude_names is None:
+                url_selector.exclude_names = set(cls.get_exclude_urls())
+
+            if url_selector.get_skip_reason(url_name, exclude=True) is not None:
                 return
 
         getattr(cls, target_attr).append({'url': url, 'url_name': url_name, 'pattern': pattern})
 
     @classmethod
     def skip_url(cls, url_name):
-        if cls.RUN_ONLY_THESE_URL_NAMES and url_name not in cls.RUN_ONLY_THESE_URL_NAMES:
-            # print('SKIP')
-            return True
+        return cls.get_url_selector().get_skip_reason(url_name) is not None
 
-        if cls.RUN_ONLY_URL_NAMES_CONTAINING and not any(
-                (substr in url_name for substr in cls.RUN_ONLY_URL_NAMES_CONTAINING)):
-            # print('SKIP')
-            return True
+    @classmethod
+    def get_url_selector(cls):
+        '''
+        returns UrlSelector compiled from RUN_ONLY_THESE_URL_NAMES, RUN_ONLY_URL_NAMES_CONTAINING, IGNORE_URL_NAMES_CONTAINING
+        and urls of EXCLUDE_MODULES, selector is stored per class (not inherited by subclasses)
+        and compiled again only if rules, EXCLUDE_MODULES or urlconf changed
+        '''
+        rules = (tuple(cls.RUN_ONLY_THESE_URL_NAMES), tuple(cls.RUN_ONLY_URL_NAMES_CONTAINING), tuple(cls.IGNORE_URL_NAMES_CONTAINING))
+        key = rules + (tuple(cls.EXCLUDE_MODULES), get_resolver())
+        url_selector = cls.__dict__.get('_url_selector', None)
 
-        if cls.IGNORE_URL_NAMES_CONTAINING and any((substr in url_name for substr in cls.IGNORE_URL_NAMES_CONTAINING)):
-            # print('SKIP')
-            return True
+        if url_selector is None or url_selector[0] != key:
+            cls._url_selector = (key, UrlSelector(*rules))
 
-        return False
+        return cls._url_selector[1]
+
+    @classmethod
+    def get_skipped_urls(cls):
+        '''
+        returns {url name: rule} of urls skipped so far, printed by test_urls with PRINT_TEST_SUBJECT
+        '''
+        return cls.get_url_selector().get_skipped()
 
     @classmethod
     def get_exclude_urls(cls):
         if not cls.attr_empty('_exclude_urls'):
             return cls._exclude_urls
 
-        return cls.collect_exclude_urls()
+        return cls.get_discovered('_exclude_urls', cls.collect_exclude_urls)
 
     @classmethod
     def collect_exclude_urls(cls, target_attr='_exclude_urls'):
@@ -893,7 +933,7 @@ class CollectMixin(object):
         if not cls.attr_empty('_delete_urls'):
             return cls._delete_urls
 
-        return cls.collect_delete_urls()
+        return cls.get_discovered('_delete_urls', cls.collect_delete_urls)
 
     @classmethod
     def collect_delete_urls(cls, target_attr='_delete_urls'):
@@ -913,7 +953,7 @@ class CollectMixin(object):
         if not cls.attr_empty('_delete_urls_models'):
             return cls._delete_urls_models
 
-        return cls.collect_delete_urls_models()
+        return cls.get_discovered('_delete_urls_models', cls.collect_delete_urls_models)
 
     @classmethod
     def collect_delete_urls_models(cls, target_attr='_delete_urls_models'):
@@ -929,14 +969,8 @@ class CollectMixin(object):
 
     @classmethod
     def get_view_class(cls, url):
-        if hasattr(url.callback, 'view_class'):
-            return url.callback.view_class
-        elif hasattr(url.callback, 'cls'):
-            # rest api generated views
-            return url.callback.cls
-        else:
-            # api root
-            return None
+        # None for api root
+        return get_view_class(url)[0]
 
     @classmethod
     def get_view_model(cls, url_name, view_class):
@@ -947,27 +981,96 @@ class CollectMixin(object):
         elif getattr(view_class, 'queryset', None):
             view_model = view_class.queryset.model
         else:
-
-            matching_models = [model for model in cls.get_models() if
-                               url_name.split(':')[-1].startswith(model._meta.label_lower.split(".")[-1])]
+            matching_models = cls.get_model_name_index().lookup(url_name.split(':')[-1])
 
             if len(matching_models) == 1:
                 view_model = matching_models[0]
+            elif len(matching_models) > 1:
+                print(f'Ambiguous model of url {url_name}: {", ".join([model._meta.label for model in matching_models])}')
 
         return view_model
 
+    @classmethod
+    def get_model_name_index(cls):
+        '''
+        returns ModelNameIndex of collected models, built once per collected models
+        '''
+        models = cls.get_models()
+
+        if cls._model_name_index is None or cls._model_name_index[0] is not models:
+            cls._model_name_index = (models, ModelNameIndex(models))
+
+        return cls._model_name_index[1]
+
 
 class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
     objs = OrderedDict()
+    storage_override = None
+    _snapshot_key = None
+    _file_mock_contents = {}  # file path: content
+
+    @classmethod
+    def setUpClass(cls):
+        # objects generated by class are removed by rollback of class transaction
+        cls.tracking_savepoint = get_savepoint()
+
+        if cls.IN_MEMORY_STORAGE:
+            # files of generated objects (setUpTestData) and tests are stored in memory
+            cls.storage_override = override_settings(**cls.get_in_memory_storage_settings())
+            cls.storage_override.enable()
+
+        try:
+            super(GenericBaseMixin, cls).setUpClass()
+        except Exception:
+            if cls.storage_override is not None:
+                cls.storage_override.disable()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        super(GenericBaseMixin, cls).tearDownClass()
+        rollback_to_savepoint(cls.tracking_savepoint)
+
+        if cls.storage_override is not None:
+            cls.storage_override.disable()
+            cls.storage_override = None
+
+    @classmethod
+    def get_in_memory_storage_settings(cls):
+        '''
+        settings replacing default storage by in memory storage, fields with own storage are not affected
+        '''
+        try:
+            from django.core.files.storage import InMemoryStorage
+        except ImportError:
+            print('IN_MEMORY_STORAGE requires django 4.2 or newer, default storage is used')
+            return {}
+
+        storages = dict(getattr(settings, 'STORAGES', {}))
+        storages['default'] = {'BACKEND': 'django.core.files.storage.InMemoryStorage'}
+        return {'STORAGES': storages}
 
     @classmethod
     def setUpTestData(cls):
         super(GenericBaseMixin, cls).setUpTestData()
 
         cls.import_modules_if_needed()
-        cls.generate_objs()
+
+        if not cls.SNAPSHOT_OBJS or cls.get_snapshot_key() is None:
+            cls.generate_objs()
+        elif not cls.load_objs_snapshot():
+            created_rows.start(cls.get_snapshot_models())
+
+            try:
+                cls.generate_objs()
+            finally:
+                created_pks = created_rows.stop()
+
+            cls.save_objs_snapshot(created_pks)
 
     def setUp(self):
+        # changes of test are rolled back after cleanups
+        self.addCleanup(rollback_to_savepoint, get_savepoint())
         user = self.objs.get('superuser', self.get_generated_obj(self.user_model()))
         credentials = {'password': self.TEST_PASSWORD}
 
@@ -1068,7 +1171,7 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
 
         for name, field in form.fields.items():
             if name not in data and not isinstance(field, django_form_models.InlineForeignKeyField): # inline fk is is sued in inline formsets
-                value = cls.default_form_field_map()[field.__class__]
+                value = cls.get_form_field_map_resolver()[field.__class__]
                 data[name] = value(field) if callable(value) else value
 
         return data
@@ -1085,8 +1188,304 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
 
             generated_objs[model] = cls.generate_model_objs(model)
 
+            if model in cls.VOLUME_OBJS:
+                generated_objs[model] += cls.generate_volume_objs(model)
+
         return generated_objs
 
+    @classmethod
+    def get_volume_field_values(cls, model):
+        '''
+        returns iterator of field values of volume objects of model, VOLUME_OBJS[model] is number of objects
+        or {fk name: ratio} meaning ratio objects per every existing related object, related objects are assigned round robin,
+        their keys are read in chunks of VOLUME_BATCH_SIZE
+        '''
+        volume = cls.VOLUME_OBJS[model]
+
+        if isinstance(volume, int):
+            return ({} for i in range(volume))
+
+        counts = OrderedDict()
+
+        for field_name, ratio in volume.items():
+            field = model._meta.get_field(field_name)
+            counts[field_name] = field.related_model._base_manager.count()
+
+            if not counts[field_name]:
+                raise ValueError('No {} objects for field {} of volume objects of {}, VOLUME_OBJS[{}] is {}'.format(
+                    field.related_model._meta.label, field_name, model._meta.label, model._meta.label, volume))
+
+        def cycle_related_objs(field):
+            # related objects with other fields deferred, read again from start when all were assigned
+            attname = field.target_field.attname
+
+            while True:
+                values = field.related_model._base_manager.order_by('pk').values_list(attname, flat=True)
+
+                for value in values.iterator(chunk_size=cls.VOLUME_BATCH_SIZE):
+                    yield field.related_model.from_db(values.db, [attname], [value])
+
+        related_objs = OrderedDict((field_name, cycle_related_objs(model._meta.get_field(field_name))) for field_name in volume.keys())
+        count = max([ratio * counts[field_name] for field_name, ratio in volume.items()])
+        return ({field_name: next(objs) for field_name, objs in related_objs.items()} for i in range(count))
+
+    @classmethod
+    def generate_volume_objs(cls, model):
+        '''
+        generates unnamed objects of model by VOLUME_OBJS using default value producers, in batches of VOLUME_BATCH_SIZE
+        '''
+        objs_values = cls.get_volume_field_values(model)
+        bulk_create = cls.can_bulk_create(model)
+        new_objs = []
+
+        if not bulk_create:
+            print('Volume objects of {} are generated one by one by generate_obj, bulk_create is not possible '
+                  '(custom save, create or generate_obj, save receivers, relation to itself)'.format(model._meta.label))
+
+        while True:
+            batch = [(field_values, False) for field_values in itertools.islice(objs_values, cls.VOLUME_BATCH_SIZE)]
+
+            if not batch:
+                break
+
+            if bulk_create:
+                new_objs.extend(cls.bulk_generate_objs(model, batch))
+            else:
+                new_objs.extend([cls.generate_obj(model, field_values) for field_values, only_required in batch])
+
+        return new_objs
+
+    @classmethod
+    def get_snapshot_models(cls):
+        '''
+        models whose generated rows are saved in snapshot, in order of their dependency
+        '''
+        models = [model for model in cls.get_sorted_models_dependency(required_only=False).keys() if not model._meta.proxy]
+
+        if cls.user_model() not in models:
+            models.append(cls.user_model())
+
+        return models
+
+    @classmethod
+    def get_snapshot_key(cls):
+        '''
+        hash of migrations (names and sources), fixtures, kaskader version and generator configuration
+        (settings and sources of generating methods and of helpers they call),
+        snapshot is valid only for the same key, computed once per test class,
+        returns None (snapshot is not used) if sources of generating methods are not available
+        '''
+        if cls._snapshot_key is not None and cls._snapshot_key[0] is cls:
+            return cls._snapshot_key[1]
+
+        try:
+            sources = cls.get_generating_sources()
+        except (OSError, TypeError) as e:
+            # changes of methods defined without source (compiled, generated, ...) can't be detected
+            print('Snapshot of generated objects is disabled, sources of generating methods are not available: {}'.format(e))
+            cls._snapshot_key = (cls, None)
+            return None
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        migrations = []
+
+        for key, migration in sorted(loader.disk_migrations.items()):
+            with open(sys.modules[migration.__module__].__file__, 'rb') as file:
+                migrations.append([list(key), hashlib.sha1(file.read()).hexdigest()])
+
+        config = {
+            'version': kaskader.VERSION,
+            'migrations': migrations,
+            'fixtures': cls.get_fixture_hashes(),
+            'check_modules': cls.CHECK_MODULES,
+            'exclude_modules': cls.EXCLUDE_MODULES,
+            'ignore_model_fields': sorted([(model._meta.label, fields) for model, fields in cls.IGNORE_MODEL_FIELDS.items()]),
+            'models': [model._meta.label for model in cls.get_snapshot_models()],
+            'volume_objs': sorted([(model._meta.label, volume) for model, volume in cls.VOLUME_OBJS.items()], key=str),
+            'methods': sources,
+        }
+        cls._snapshot_key = (cls, hashlib.sha1(json.dumps(config, default=str).encode()).hexdigest())
+        return cls._snapshot_key[1]
+
+    @classmethod
+    def get_generating_sources(cls):
+        '''
+        sources of generating methods and of project methods and functions they call (cls.helper(), helper()),
+        helpers are found by ast transitively, helpers of kaskader are covered by its version,
+        raises OSError or TypeError if source is not available
+        '''
+        methods = ['model_field_values_map', 'default_field_name_map', 'default_field_map', 'manual_model_dependency',
+                   'generate_obj', 'generate_model_field_values', 'get_char_field_mock_value', 'get_num_field_mock_value']
+        sources = OrderedDict()  # qualified name of function: source
+        to_visit = [getattr(cls, method) for method in methods]
+
+        while to_visit:
+            value = to_visit.pop(0)
+            function = getattr(value, '__func__', value)
+            name = '{}.{}'.format(function.__module__, function.__qualname__)
+
+            if name in sources:
+                continue
+
+            sources[name] = inspect.getsource(function)
+
+            for node in ast.walk(ast.parse(textwrap.dedent(sources[name]))):
+                if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id in ['cls', 'self']:
+                    helper = getattr(cls, node.attr, None)
+                elif isinstance(node, ast.Name):
+                    helper = getattr(function, '__globals__', {}).get(node.id, None)
+                else:
+                    continue
+
+                helper_function = getattr(helper, '__func__', helper)
+
+                if inspect.isfunction(helper_function) and \
+                        helper_function.__module__.split('.')[0] not in ['kaskader', 'django', 'unittest']:
+                    to_visit.append(helper_function)
+
+        return list(sources.values())
+
+    @classmethod
+    def get_fixture_hashes(cls):
+        '''
+        [fixture label, hashes of fixture files] of fixtures loaded before generation, files are searched by label
+        in fixtures directories of apps and FIXTURE_DIRS like by loaddata
+        '''
+        fixture_dirs = [os.path.join(app_config.path, 'fixtures') for app_config in apps.get_app_configs()] + \
+            [str(fixture_dir) for fixture_dir in getattr(settings, 'FIXTURE_DIRS', [])] + ['']
+        hashes = []
+
+        for label in getattr(cls, 'fixtures', None) or []:
+            file_hashes = []
+
+            for fixture_dir in fixture_dirs:
+                for file_path in sorted(glob.glob(os.path.join(fixture_dir, label)) + glob.glob(os.path.join(fixture_dir, label + '.*'))):
+                    if os.path.isfile(file_path):
+                        with open(file_path, 'rb') as file:
+                            file_hashes.append(hashlib.sha1(file.read()).hexdigest())
+
+            hashes.append([label, file_hashes])
+
+        return hashes
+
+    @classmethod
+    def save_objs_snapshot(cls, created_pks):
+        '''
+        saves rows created by generate_objs (created_pks {model: pks} recorded by created_rows) and names of generated objects,
+        changes of rows existing before generation and files of file fields are not part of snapshot
+        '''
+        objects = []
+
+        for model, pks in created_pks.items():
+            pks = sorted(pks)
+
+            for start in range(0, len(pks), cls.VOLUME_BATCH_SIZE):
+                batch = model._base_manager.filter(pk__in=pks[start:start + cls.VOLUME_BATCH_SIZE]).order_by('pk')
+                objects.extend(json.loads(serializers.serialize('json', batch)))
+
+        objs = {obj_name: [obj._meta.label, obj.pk] for obj_name, obj in cls.objs.items()
+                if obj.pk in created_pks.get(obj._meta.concrete_model, set())}
+
+        snapshot = ObjsSnapshot.get(getattr(cls, 'CACHE_DIR', None))
+        snapshot.set_snapshot(cls.get_snapshot_name(), cls.get_snapshot_key(), objects, objs)
+        snapshot.save()
+
+    @classmethod
+    def load_objs_snapshot(cls):
+        '''
+        loads rows of generated objects from snapshot and rebuilds objs, returns False if there is no valid snapshot
+        '''
+        if cls.IN_MEMORY_STORAGE and any([isinstance(field, FileField) for model in cls.get_snapshot_models() for field in model._meta.fields]):
+            # files of snapshot are not stored in memory storage
+            return False
+
+        snapshot = ObjsSnapshot.get(getattr(cls, 'CACHE_DIR', None)).get_snapshot(cls.get_snapshot_name(), cls.get_snapshot_key())
+
+        if snapshot is None:
+            return False
+
+        try:
+            with transaction.atomic():
+                loaded_objs = OrderedDict()  # model: deserialized objects in order of snapshot
+
+                for deserialized_obj in serializers.deserialize('python', snapshot['objects']):
+                    loaded_objs.setdefault(deserialized_obj.object._meta.model, []).append(deserialized_obj)
+
+                for model, deserialized_objs in loaded_objs.items():
+                    cls.insert_snapshot_rows(model, deserialized_objs)
+
+                connection = connections[router.db_for_write(cls.user_model())]
+                sequence_sql = connection.ops.sequence_reset_sql(no_style(), list(loaded_objs.keys()))
+
+                if sequence_sql:
+                    with connection.cursor() as cursor:
+                        for sql in sequence_sql:
+                            cursor.execute(sql)
+        except (DeserializationError, DatabaseError) as e:
+            print('Failed to load snapshot of generated objects, generating them again: {}'.format(e))
+            return False
+
+        for model, deserialized_objs in loaded_objs.items():
+            # generated values of next objects must not collide with values of loaded rows
+            pks = [deserialized_obj.object.pk for deserialized_obj in deserialized_objs]
+            sequences.advance(model, max(pks, key=lambda pk: pk if isinstance(pk, int) else 0))
+            # rows are inserted without signals
+            row_counter.forget(model)
+
+        pks_by_model = OrderedDict()
+
+        for obj_name, (label, pk) in snapshot['objs'].items():
+            pks_by_model.setdefault(apps.get_model(label), []).append(pk)
+
+        objs_by_model = {model: model._base_manager.in_bulk(pks) for model, pks in pks_by_model.items()}
+
+        for obj_name, (label, pk) in snapshot['objs'].items():
+            obj = objs_by_model[apps.get_model(label)].get(pk, None)
+
+            if obj is not None:
+                cls.objs[obj_name] = obj
+                identity_map.mark_fresh(obj)
+
+        return True
+
+    @classmethod
+    def insert_snapshot_rows(cls, model, deserialized_objs):
+        '''
+        inserts deserialized rows of model by bulk_create and their m2m values by bulk_create per through table,
+        no signals are sent (same as raw save of loaddata), rows of multi-table inheritance children are inserted
+        only into table of child (rows of parents are part of snapshot)
+        '''
+        objs = [deserialized_obj.object for deserialized_obj in deserialized_objs]
+        manager = model._base_manager.db_manager(router.db_for_write(model))
+
+        for start in range(0, len(objs), cls.VOLUME_BATCH_SIZE):
+            batch = objs[start:start + cls.VOLUME_BATCH_SIZE]
+
+            if model._meta.parents:
+                # bulk_create doesn't support multi-table inheritance
+                manager.get_queryset()._insert(batch, model._meta.local_concrete_fields)
+            else:
+                manager.bulk_create(batch)
+
+        through_objs = OrderedDict()  # through model: through objs
+
+        for deserialized_obj in deserialized_objs:
+            for field_name, values in (deserialized_obj.m2m_data or {}).items():
+                # serializer includes only m2m fields with auto created through model
+                field = model._meta.get_field(field_name)
+                through = field.remote_field.through
+                source_attname = through._meta.get_field(field.m2m_field_name()).attname
+                target_attname = through._meta.get_field(field.m2m_reverse_field_name()).attname
+                source = getattr(deserialized_obj.object, field.m2m_target_field_name())
+                through_objs.setdefault(through, []).extend([through(**{source_attname: source, target_attname: value}) for value in values])
+
+        for through, objs in through_objs.items():
+            through._base_manager.db_manager(router.db_for_write(through)).bulk_create(objs, batch_size=cls.VOLUME_BATCH_SIZE)
+
+    @classmethod
+    def get_snapshot_name(cls):
+        return '{}.{}'.format(cls.__module__, cls.__qualname__)
+
     @classmethod
     def delete_ojbs(cls):
         models_hierarchy = cls.get_sorted_models_dependency(required_only=False, reverse=True)
@@ -1096,7 +1495,11 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
 
 
     @classmethod
-    def generate_model_field_values(cls, model, field_values=None, only_required=False):
+    def generate_model_field_values(cls, model, field_values=None, only_required=False, already_exists=None):
+        '''
+        returns field values and m2m values of new object of model, unique and one to one relations get new related object
+        if object of model already exists, already_exists is passed by bulk_create whose batch isn't in database yet
+        '''
         not_related_fields = cls.get_models_fields(model, related=False, required=only_required if only_required else None)
         related_fields = cls.get_models_fields(model, related=True, required=only_required if only_required else None)
         ignore_model_fields = cls.IGNORE_MODEL_FIELDS.get(model, [])
@@ -1109,10 +1512,10 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
                 field_value = field.default
 
                 if inspect.isclass(field.default) and issubclass(field.default, NOT_PROVIDED) or field.default is None or field_value in [list]:
-                    field_value = cls.default_field_name_map().get(field.name, None)
+                    field_value = cls.get_field_name_map().get(field.name, None)
 
                     if field_value is None:
-                        field_value = cls.default_field_map().get(field.__class__, None)
+                        field_value = cls.get_field_map_resolver().get(field.__class__, None)
 
                     if callable(field_value):
                         field_value = field_value(field)
@@ -1127,18 +1530,18 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
 
                 field_values[field.name] = field.to_python(field_value) # to save default lazy values correctly, should not be problem in any case
 
-        m2m_classes = (ManyToManyField, GM2MField) if 'gm2m' in getattr(settings, 'INSTALLED_APPS') else ManyToManyField
+        m2m_classes = get_m2m_field_classes()
 
         for field in related_fields:
             if isinstance(field, m2m_classes):
                 if field.name in field_values:
                     m2m_values[field.name] = field_values[field.name]
                     del field_values[field.name]
-            elif field.name not in ignore_model_fields and field.name not in field_values and field.related_model.objects.exists():
+            elif field.name not in ignore_model_fields and field.name not in field_values and row_counter.exists(field.related_model):
                 field_value = field.default
 
                 if inspect.isclass(field.default) and issubclass(field.default, NOT_PROVIDED) or field.default is None:
-                    field_value = cls.default_field_map().get(field.__class__, None)
+                    field_value = cls.get_field_map_resolver().get(field.__class__, None)
 
                     if callable(field_value):
                         field_value = field_value(field)
@@ -1147,10 +1550,9 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
                     if callable(field_value):
                         field_value = field_value()
 
-                unique = field.name in unique_fields or isinstance(field, OneToOneField)
-                already_exists = field.model._default_manager.exists()
+                unique = field.unique or field.name in unique_fields or isinstance(field, OneToOneField)
 
-                if already_exists and unique:
+                if unique and (row_counter.exists(field.model) if already_exists is None else already_exists):
                     field_value = cls.generate_obj(field.related_model, only_required=True)
                     # cls.objs[f'{cls.default_object_name(field.related_model)}_unique_{model}.{field.name}'] = field_value
 
@@ -1172,6 +1574,7 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
             model_obj_values_map[f'{cls.default_object_name(model)}_delete'] = {}
 
         new_objs = []
+        pending_objs = OrderedDict()  # obj_name: (obj_values, only_required)
 
         for obj_name, obj_values in model_obj_values_map.items():
             obj = cls.objs.get(obj_name, None)
@@ -1180,19 +1583,126 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
                 obj_name = model._meta.label_lower
                 obj = cls.objs.get(obj_name, None)
 
-            if obj:
+            if obj and not identity_map.is_fresh(obj):
                 try:
                     obj.refresh_from_db()
+                    identity_map.mark_fresh(obj)
                 except model.DoesNotExist:
                     obj = None
 
             if not obj:
-                obj = cls.generate_obj(model, obj_values, only_required=True if obj_name.endswith('_delete') else False)
-                new_objs.append(obj)
-                cls.objs[obj_name] = obj
+                pending_objs[obj_name] = (obj_values, True if obj_name.endswith('_delete') else False)
+
+        if cls.can_bulk_create(model):
+            objs = cls.bulk_generate_objs(model, list(pending_objs.values()))
+        else:
+            objs = [cls.generate_obj(model, obj_values, only_required=only_required) for obj_values, only_required in pending_objs.values()]
+
+        for obj_name, obj in zip(pending_objs.keys(), objs):
+            new_objs.append(obj)
+            cls.objs[obj_name] = obj
+            identity_map.mark_fresh(obj)
 
         return new_objs
 
+    @classmethod
+    def can_bulk_create(cls, model):
+        '''
+        objects of model can be inserted by bulk_create if saving them doesn't run any custom code
+        and values of one object don't depend on other objects of same model
+        '''
+        if not cls.BULK_CREATE_OBJS or model == cls.user_model() or model._meta.parents or model._meta.proxy:
+            return False
+
+        if cls.generate_obj.__func__ is not GenericBaseMixin.generate_obj.__func__:
+            # custom generation of single object
+            return False
+
+        if model.save is not Model.save or has_receivers(pre_save, model) or has_receivers(post_save, model):
+            return False
+
+        create = getattr(type(model._default_manager), 'create', None)
+
+        if getattr(create, '__wrapped__', create) is not QuerySet.create or model._default_manager._queryset_class.create is not QuerySet.create:
+            # custom manager or queryset create
+            return False
+
+        if any([field.related_model == model for field in cls.get_models_fields(model, related=True)]):
+            return False
+
+        # primary keys of created objects are needed
+        return connections[router.db_for_write(model)].features.can_return_rows_from_bulk_insert
+
+    @classmethod
+    def bulk_generate_objs(cls, model, objs_values):
+        '''
+        generates objects of model by single bulk_create and their m2m values by single bulk_create per through table,
+        objs_values is list of (field values, only_required), falls back to generate_obj for every object if bulk insert fails
+        '''
+        if not objs_values:
+            return []
+
+        prepared_objs = []
+        already_exists = row_counter.exists(model)
+
+        for field_values, only_required in objs_values:
+            field_values = field_values(cls) if callable(field_values) else field_values
+            # previous objects of batch are not counted yet, but they already use related objects of unique relations
+            field_values, m2m_values = cls.generate_model_field_values(model, field_values, only_required,
+                                                                       already_exists=already_exists or bool(prepared_objs))
+            post_save_actions = field_values.pop('post_save', [])
+            prepared_objs.append((model(**field_values), m2m_values, post_save_actions))
+            # reserve id used in values of prepared object, next object gets new unique values
+            sequences.advance(model)
+
+        try:
+            with transaction.atomic():
+                objs = model._default_manager.bulk_create([obj for obj, m2m_values, post_save_actions in prepared_objs])
+                cls.bulk_set_m2m(model, [(obj, m2m_values) for obj, (prepared_obj, m2m_values, post_save_actions) in zip(objs, prepared_objs)])
+        except DatabaseError as e:
+            # inserted rows are rolled back with atomic block
+            print('Bulk create of {} failed, generating objects one by one: {}'.format(model._meta.label, e))
+            return [cls.generate_obj(model, field_values, only_required=only_required) for field_values, only_required in objs_values]
+
+        sequences.advance(model, objs[-1].pk)
+        row_counter.add(model, len(objs))
+        created_rows.add(model, [obj.pk for obj in objs])
+
+        for obj, (prepared_obj, m2m_values, post_save_actions) in zip(objs, prepared_objs):
+            for action in post_save_actions:
+                action(obj)
+
+        return objs
+
+    @classmethod
+    def bulk_set_m2m(cls, model, objs_m2m_values):
+        '''
+        writes m2m values of objects directly into auto created through tables, one bulk_create per table,
+        m2m fields with custom through model, m2m_changed receivers or symmetrical relation are set one by one
+        '''
+        through_objs = OrderedDict()  # through model: {(source, target): through obj}
+
+        for obj, m2m_values in objs_m2m_values:
+            for m2m_attr, m2m_value in m2m_values.items():
+                field = model._meta.get_field(m2m_attr)
+                through = getattr(field.remote_field, 'through', None)
+
+                if not isinstance(field, ManyToManyField) or not through._meta.auto_created or has_receivers(m2m_changed, through) \
+                        or (field.remote_field.symmetrical and field.related_model == model):
+                    getattr(obj, m2m_attr).set(m2m_value)
+                    continue
+
+                source_attname = through._meta.get_field(field.m2m_field_name()).attname
+                target_attname = through._meta.get_field(field.m2m_reverse_field_name()).attname
+                source = getattr(obj, field.m2m_target_field_name())
+
+                for value in m2m_value:
+                    target = getattr(value, field.m2m_reverse_target_field_name()) if isinstance(value, Model) else value
+                    through_objs.setdefault(through, OrderedDict())[(source, target)] = through(**{source_attname: source, target_attname: target})
+
+        for through, objs in through_objs.items():
+            through._default_manager.bulk_create(list(objs.values()))
+
     @classmethod
     def generate_obj(cls, model, field_values=None, only_required=False, **kwargs):
         '''
@@ -1224,6 +1734,8 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
                 obj = model(**field_values)
                 obj.save()
 
+        sequences.advance(model, obj.pk)
+
         for m2m_attr, m2m_value in m2m_values.items():
             getattr(obj, m2m_attr).set(m2m_value)
 
@@ -1264,11 +1776,12 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
 
         obj = cls.objs.get(obj_name, None)
 
-        if obj:
+        if obj and not identity_map.is_fresh(obj):
             model = obj._meta.model
 
             try:
                 obj.refresh_from_db()
+                identity_map.mark_fresh(obj)
             except model.DoesNotExist:
                 obj = None
 
@@ -1294,10 +1807,10 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
     @classmethod
     def next_id(cls, model):
         '''
-        returns last existing id + 1
+        returns last existing id + 1, database is queried only once per model, then ids are advanced by generated objects,
+        for non integer primary keys number of rows + 1 is returned, see SequenceAllocator
         '''
-        last = model.objects.order_by('id').last()
-        return last.id + 1 if last else 0
+        return sequences.get(model)
 
     @classmethod
     def get_next_char_id(cls, model, max_length=5):
@@ -1305,13 +1818,23 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
         prefix = model._meta.label_lower.split('.')[1][:max_length - len(id)]
         return prefix + id
 
+    @classmethod
+    def get_file_mock_content(cls, file_path):
+        '''
+        returns content of file, every file is read only once, content is immutable and shared by all mocks
+        '''
+        if file_path not in cls._file_mock_contents:
+            with open(file_path, 'rb') as file:
+                cls._file_mock_contents[file_path] = file.read()
+
+        return cls._file_mock_contents[file_path]
+
     @classmethod
     def get_pdf_file_mock(cls, name='test.pdf'):
         file_path = os.path.join(os.path.dirname(__file__), 'blank.pdf')
-        file = open(file_path, 'rb')
         file_mock = SimpleUploadedFile(
             name,
-            file.read(),
+            cls.get_file_mock_content(file_path),
             content_type='application/pdf'
         )
         return file_mock
@@ -1320,10 +1843,9 @@ class GenericBaseMixin(InputMixin, CollectMixin, BaseMixin):
     def get_image_file_mock(cls, name='test.jpg', file_path=None):
         if file_path is None:
             file_path = os.path.join(os.path.dirname(__file__), 'blank.jpg')
-        file = open(file_path, 'rb')
         file_mock = SimpleUploadedFile(
             name,
-            file.read(),
+            cls.get_file_mock_content(file_path),
             content_type='image/png'
         )
         return file_mock
@@ -1411,10 +1933,7 @@ class QuerysetTestMixin(object):
 
             if not qs_class == QuerySet and not any([exclude_module in qs_class.__module__ for exclude_module in self.EXCLUDE_MODULES]):
                 qs_class_label = qs_class.__name__
-                queryset_methods = [(name, func) for name, func in qs_class.__dict__.items()
-                                    if not name.startswith('_')
-                                    and name != 'mro'
-                                    and inspect.isfunction(func)]
+                queryset_methods = IntrospectionIndex.get_class_functions(qs_class)
 
                 params_map = self.queryset_params_map.get(qs_class, {})
 
@@ -1488,11 +2007,7 @@ class FilterTestMixin(object):
 
         # get filter classes
         for module_name in module_names:
-            module = sys.modules[module_name]
-
-            filter_classes |= {
-                cls for cls in self.get_module_classes(module) if issubclass(cls, (FilterSet,))
-            }
+            filter_classes |= self.get_module_members(module_name).filtersets
 
         filter_classes = sorted(filter_classes, key=lambda x: x.__name__)
 
@@ -1567,8 +2082,8 @@ class FilterTestMixin(object):
 class UrlMixin(object):
     default_url_params = {}
 
-    def crawl_urls(self, urls, parent_pattern='', parent_namespace='', parent_app_name='', filter_namespace=None, exclude_namespace=None, filter_app_name=None, exclude_app_name=None):
-        return self.crawl_urls_with_action(urls, self.crawl_test_url, parent_pattern, parent_namespace, parent_app_name, filter_namespace, exclude_namespace, filter_app_name, exclude_app_name)
+    def crawl_urls(self, urls, parent_pattern='', parent_namespace='', parent_app_name='', filter_namespace=None, exclude_namespace=None, filter_app_name=None, exclude_app_name=None, namespace_match='contains'):
+        return self.crawl_urls_with_action(urls, self.crawl_test_url, parent_pattern, parent_namespace, parent_app_name, filter_namespace, exclude_namespace, filter_app_name, exclude_app_name, namespace_match=namespace_match)
 
     def crawl_test_url(self, **kwargs):
         url = kwargs['url']
@@ -1576,17 +2091,10 @@ class UrlMixin(object):
         pattern = kwargs['pattern']
 
         args = re.findall(r'<([:\w]+)>', pattern)
+        view_class, view_initkwargs = get_view_class(url)
 
-        if hasattr(url.callback, 'view_class'):
-            view_class = url.callback.view_class
-            view_initkwargs = url.callback.view_initkwargs
-        elif hasattr(url.callback, 'cls'):
-            # rest api generated views
-            view_class = url.callback.cls
-            view_initkwargs = {}
-        else:
+        if view_class is None:
             # api root
-            # print(f'{if_none(pattern)}:{if_none(url.name)}', url.callback.__dict__)
             return
 
         if not url_name or self.skip_url(url_name):
@@ -1650,7 +2158,7 @@ class UrlMixin(object):
                     self.failed.extend(fails)
                     continue
             else:
-                get_response = Response()
+                get_response = EmptyResponse()
 
             # POST url
             if hasattr(view_class, 'post') and url_name not in self.GET_ONLY_URLS and getattr(view_class, 'form_class', None):
@@ -1694,6 +2202,7 @@ class UrlMixin(object):
             params_map['parsed'] = []
             # parse args from path params
             view_model = self.get_view_model(path_name, view_class)
+            arg_index = UrlArgIndex.get(models, fields)
 
             for arg in args:
                 arg_type, arg_name = arg.split(':') if ':' in arg else ('int', arg)
@@ -1701,63 +2210,17 @@ class UrlMixin(object):
                 if arg_name in parsed_kwargs:
                     continue
 
-                matching_fields = []
-
-                if arg in ['int:pk', 'pk']:
-                    matching_fields = [('pk', view_model)]
-                else:
-                    if arg_type not in ['int', 'str', 'slug']:
-                        fails.append(OrderedDict({
-                            'location': 'URL ARG TYPE',
-                            'url name': path_name,
-                            'url pattern': url_pattern,
-                            'arg': arg,
-                            'traceback': 'Cant handle this arg type'
-                        }))
-                        continue
-
-                    if arg_name.endswith('_pk'):
-                        # model name
-                        matching_fields = [('pk', model) for model in models if
-                                           arg_name == '{}_pk'.format(model._meta.label_lower.split(".")[-1])]
-
-                        if len(matching_fields) != 1:
-                            # match field  model
-                            matching_fields = [('pk', model) for model in models if arg_name == '{}_pk'.format(
-                                model._meta.verbose_name.lower().replace(' ', '_'))]
+                if arg_type not in ['int', 'str', 'slug'] and arg not in ['int:pk', 'pk']:
+                    fails.append(OrderedDict({
+                        'location': 'URL ARG TYPE',
+                        'url name': path_name,
+                        'url pattern': url_pattern,
+                        'arg': arg,
+                        'traceback': 'Cant handle this arg type'
+                    }))
+                    continue
 
-                    else:
-                        # full name and type match
-                        matching_fields = [(field, model) for field, model in fields if
-                                           field.name == arg_name and isinstance(field, IntegerField if arg_type == 'int' else (
-                                           CharField, BooleanField))]
-
-                        if len(matching_fields) > 1:
-                            # match field  model
-                            matching_fields = [(field, model) for field, model in matching_fields if
-                                               model == view_model]
-
-                        elif not matching_fields:
-                            # full name match
-                            matching_fields = [(field, model) for field, model in fields if
-                                               field.name == arg_name and not model._meta.proxy]
-
-                            if not matching_fields:
-                                # match name in form model_field to model and field
-                                matching_fields = [(field, model) for field, model in fields if
-                                                   arg_name == '{}_{}'.format(model._meta.label_lower.split(".")[-1],
-                                                                          field.name)]
-
-                            if not matching_fields:
-                                # this might make problems as only partial match is made
-                                matching_fields = [(p[0], view_model) for p in
-                                                   inspect.getmembers(view_model, lambda o: isinstance(o, property)) if
-                                                   p[0].startswith(arg_name)]
-
-                            if not matching_fields:
-                                # name is contained in field.name of view model
-                                matching_fields = [(field, model) for field, model in fields if
-                                                   model == view_model and arg_name in field.name]
+                matching_fields = arg_index.resolve(arg, view_model)
 
                 if len(matching_fields) != 1 or matching_fields[0][1] is None:
                     fails.append(OrderedDict({
@@ -2099,13 +2562,16 @@ class UrlMixin(object):
 class UrlTestMixin(UrlMixin):
     def test_urls(self):
         self.models = self.get_models()
-        self.model_fields = [(f, model) for model in self.models for f in model._meta.get_fields() if f.concrete and not f.auto_created]
+        self.model_fields = UrlArgIndex.get(self.models).fields
         self.failed = []
         self.tested = []
 
         urls = get_resolver()
         self.crawl_urls(urls)
 
+        if self.PRINT_TEST_SUBJECT:
+            print('SKIPPED URLS: {}'.format(pformat(self.get_skipped_urls())))
+
         if self.failed:
             # append failed count at the end of error list
             self.failed.append('{}/{} urls FAILED: {}'.format(len(self.failed), len(self.tested), ', '.join([f['url name'] for f in self.failed])))
@@ -2169,14 +2635,16 @@ def generate_url_tests(test_case, num_tests, urls, **kwargs):
         def make_test(url_list):
             def test_urls(self):
                 self.models = self.get_models()
-                self.model_fields = [(f, model) for model in self.models for f in model._meta.get_fields() if
-                                     f.concrete and not f.auto_created]
+                self.model_fields = UrlArgIndex.get(self.models).fields
                 self.failed = []
                 self.tested = []
 
                 for url in url_list:
                     self.crawl_test_url(**url)
 
+                if self.PRINT_TEST_SUBJECT:
+                    print('SKIPPED URLS: {}'.format(pformat(self.get_skipped_urls())))
+
                 if self.failed:
                     # append failed count at the end of error list
                     self.failed.append('{}/{} urls FAILED: {}'.format(len(self.failed), len(self.tested), ', '.join(
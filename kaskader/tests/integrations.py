@@ -0,0 +1,279 @@
+import importlib
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.timezone import now
+
+
+class Integration(object):
+    '''
+    optional library providing its own field classes, modules of integration are imported only when its value producers
+    are needed for the first time, integration is skipped if app is not installed or its modules can't be imported,
+    every loader is skipped on its own, so failing form field map doesn't disable field map of the same library
+    '''
+    def __init__(self, name, app=None):
+        self.name = name
+        self.app = app  # required entry in INSTALLED_APPS, None if not needed
+        self.modules = []  # modules which have to be importable, checked on first use
+        self.field_map_loaders = []
+        self.form_field_map_loaders = []
+        self.failed_loaders = set()
+        self.available = None  # unknown until first use
+
+    def is_installed(self):
+        return self.app is None or self.app in getattr(settings, 'INSTALLED_APPS')
+
+    def is_available(self):
+        if self.available is None:
+            try:
+                for module_name in self.modules:
+                    importlib.import_module(module_name)
+            except (ImportError, ImproperlyConfigured):
+                self.available = False
+            else:
+                self.available = self.is_installed()
+
+        return self.available
+
+    def load(self, loaders, cls):
+        if not loaders or not self.is_available():
+            return {}
+
+        map = {}
+
+        for loader in loaders:
+            if loader in self.failed_loaders:
+                continue
+
+            try:
+                map.update(loader(cls))
+            except (ImportError, ImproperlyConfigured):
+                # library not installed or misconfigured (for example missing GDAL)
+                self.failed_loaders.add(loader)
+
+        return map
+
+
+class IntegrationRegistry(object):
+    '''
+    value producers of optional integrations for InputMixin.default_field_map and default_form_field_map
+    '''
+    def __init__(self):
+        self.integrations = {}
+
+    def get_integration(self, name, app=None):
+        if name not in self.integrations:
+            self.integrations[name] = Integration(name, app)
+
+        return self.integrations[name]
+
+    def register(self, name, app=None, modules=()):
+        '''
+        registers integration without value producers, available if app is installed and modules can be imported
+        '''
+        integration = self.get_integration(name, app)
+        integration.modules.extend(modules)
+        return integration
+
+    def register_field_map(self, name, app=None):
+        '''
+        decorator registering function returning {model field class: value} for integration
+        '''
+        def decorator(loader):
+            self.get_integration(name, app).field_map_loaders.append(loader)
+            return loader
+
+        return decorator
+
+    def register_form_field_map(self, name, app=None):
+        '''
+        decorator registering function returning {form field class: value} for integration
+        '''
+        def decorator(loader):
+            self.get_integration(name, app).form_field_map_loaders.append(loader)
+            return loader
+
+        return decorator
+
+    def get_field_map(self, cls):
+        map = {}
+
+        for integration in self.integrations.values():
+            map.update(integration.load(integration.field_map_loaders, cls))
+
+        return map
+
+    def get_form_field_map(self, cls):
+        map = {}
+
+        for integration in self.integrations.values():
+            map.update(integration.load(integration.form_field_map_loaders, cls))
+
+        return map
+
+    def is_available(self, name):
+        '''
+        imports integration modules if needed, returns False if integration can't be used
+        '''
+        integration = self.integrations.get(name, None)
+        return integration is not None and integration.is_available()
+
+
+registry = IntegrationRegistry()
+
+
+class FieldMapResolver(object):
+    '''
+    value producers of field map {field class: value} resolved for field class by nearest registered class in its mro,
+    so subclasses of registered fields (custom CharField, ...) get values of their parent, resolution is cached per field class,
+    subclasses of exact_classes (auto fields, ...) are resolved only by their own class
+    '''
+    def __init__(self, map, exact_classes=()):
+        self.map = map
+        self.exact_classes = exact_classes
+        self.resolved = {}  # field class: (found, value)
+
+    def resolve(self, field_class):
+        if field_class not in self.resolved:
+            if issubclass(field_class, self.exact_classes):
+                self.resolved[field_class] = (True, self.map[field_class]) if field_class in self.map else (False, None)
+            else:
+                self.resolved[field_class] = next(
+                    ((True, self.map[klass]) for klass in field_class.__mro__ if klass in self.map), (False, None))
+
+        return self.resolved[field_class]
+
+    def get(self, field_class, default=None):
+        found, value = self.resolve(field_class)
+        return value if found else default
+
+    def __getitem__(self, field_class):
+        found, value = self.resolve(field_class)
+
+        if not found:
+            raise KeyError(field_class)
+
+        return value
+
+    def __contains__(self, field_class):
+        return self.resolve(field_class)[0]
+
+
+def get_related_field_classes():
+    '''
+    model field classes handled as relations
+    '''
+    from django.db.models.fields.related import RelatedField
+
+    if registry.is_available('gm2m'):
+        from gm2m import GM2MField
+        return (RelatedField, GM2MField)
+
+    return (RelatedField,)
+
+
+def get_m2m_field_classes():
+    from django.db.models.fields.related import ManyToManyField
+
+    if registry.is_available('gm2m'):
+        from gm2m import GM2MField
+        return (ManyToManyField, GM2MField)
+
+    return (ManyToManyField,)
+
+
+@registry.register_field_map('gis')
+def gis_field_map(cls):
+    from django.contrib.gis.db import models as gis_models
+    from django.contrib.gis.geos import Point, MultiPoint
+
+    return {
+        gis_models.PointField: Point(0.1276, 51.5072),
+        gis_models.MultiPointField: MultiPoint(Point(0.1276, 51.5072), Point(0.1276, 51.5072)),
+    }
+
+
+@registry.register_form_field_map('gis')
+def gis_form_field_map(cls):
+    from django.contrib.gis import forms as gis_forms
+
+    return {
+        gis_forms.PointField: 'POINT (0.1276 51.5072)',
+    }
+
+
+@registry.register_field_map('postgres')
+def postgres_field_map(cls):
+    from django.contrib.postgres import fields as postgres_fields
+
+    return {
+        postgres_fields.DateTimeRangeField: lambda f: (now(), now() + timedelta(days=1)),
+        postgres_fields.DateRangeField: lambda f: (now().date(), now() + timedelta(days=1)),
+        postgres_fields.JSONField: lambda f: {'key': 'value'},
+        postgres_fields.HStoreField: lambda f: {'key': 'value'},
+        postgres_fields.ArrayField: lambda f: [cls.get_field_map_resolver()[f.base_field.__class__](f.base_field)],
+    }
+
+
+@registry.register_form_field_map('postgres')
+def postgres_form_field_map(cls):
+    from django.contrib.postgres import forms as postgres_forms
+
+    return {
+        postgres_forms.HStoreField: '',
+        postgres_forms.SimpleArrayField: lambda f: [cls.get_form_field_map_resolver()[f.base_field.__class__](f.base_field)],
+        postgres_forms.DateTimeRangeField: lambda f: [now().strftime(list(f.input_formats)[-1]) if hasattr(f, 'input_formats') else now(), now().strftime(list(f.input_formats)[-1]) if hasattr(f, 'input_formats') else now()],
+    }
+
+
+@registry.register_form_field_map('django_filters')
+def django_filters_form_field_map(cls):
+    from django_filters import fields as django_filter_fields
+
+    return {
+        django_filter_fields.ModelChoiceField: lambda f: f.queryset.first().id,
+        django_filter_fields.ModelMultipleChoiceField: lambda f: f.queryset.first().id,
+        django_filter_fields.MultipleChoiceField: lambda f: [list(f.choices)[-1][0]] if f.choices else ['{}'.format(f.label)],
+        django_filter_fields.ChoiceField: lambda f: list(f.choices)[-1][0],
+        django_filter_fields.RangeField: lambda f: [1, 100],
+        django_filter_fields.DateRangeField: lambda f: (now().date(), now() + timedelta(days=1)),
+    }
+
+
+@registry.register_field_map('internationalflavor', app='internationalflavor')
+def internationalflavor_field_map(cls):
+    from internationalflavor import iban as intflavor_iban, countries as intflavor_countries, vat_number as intflavor_vat
+
+    return {
+        intflavor_countries.CountryField: 'LU',
+        intflavor_iban.IBANField: 'LU28 0019 4006 4475 0000',
+        intflavor_vat.VATNumberField: lambda f: 'LU{}'.format(random.randint(10000000, 99999999)),  # 'GB904447273',
+    }
+
+
+@registry.register_form_field_map('internationalflavor', app='internationalflavor')
+def internationalflavor_form_field_map(cls):
+    from internationalflavor import iban as intflavor_iban, countries as intflavor_countries, vat_number as intflavor_vat
+
+    return {
+        intflavor_countries.CountryFormField: 'LU',  # random.choice(UN_RECOGNIZED_COUNTRIES),
+        intflavor_iban.IBANFormField: 'LU28 0019 4006 4475 0000',
+        intflavor_vat.VATNumberFormField: lambda f: 'LU{}'.format(random.randint(10000000, 99999999)),  # 'GB904447273',
+    }
+
+
+@registry.register_form_field_map('pragmatic', app='pragmatic')
+def pragmatic_form_field_map(cls):
+    from pragmatic import fields as pragmatic_fields
+
+    return {
+        pragmatic_fields.AlwaysValidChoiceField: lambda f: list(f.choices)[-1][0] if f.choices else '{}'.format(f.label),
+        pragmatic_fields.AlwaysValidMultipleChoiceField: lambda f: str(list(f.choices)[-1][0]) if f.choices else str(f.label),
+        pragmatic_fields.SliderField: lambda f: '{},{}'.format(f.min, f.max) if f.has_range else str(f.min),
+    }
+
+
+# no default values, m2m values are only set when provided
+registry.register('gm2m', app='gm2m', modules=['gm2m'])
@@ -1,17 +1,133 @@
-import importlib
-import inspect
+import hashlib
+import os
 import re
 import sys
 from pprint import pformat
 
 import django_filters
 
+from kaskader.tests.discovery import IntrospectionIndex, SourceScanner, AuditManifest, StaticModuleMembers, get_module_file, \
+    get_module_specs
 from kaskader.tests.generators import GenericBaseMixin
 
 
 class MissingTestMixin(GenericBaseMixin):
     CHECK_MODULES = []  # where to look for objects and methods that should be tested, override this, eg. [app.sub_app_1, app.sub_app_2]
     EXCLUDE_MODULES = ['migrations', 'commands', 'tests', 'settings']   # where not to look for objects and methods that should be tested
+    INCREMENTAL_AUDITS = False  # reuse audit results of modules which didn't change since last run, stored in CACHE_DIR/audits.json
+    STATIC_AUDITS = False  # find classes, functions and tests by ast without importing audited modules, see kaskader_audit command
+
+    _static_members = {}  # (module name, source hash): StaticModuleMembers
+
+    def get_source_scanner(self):
+        return SourceScanner.get(getattr(self, 'CACHE_DIR', None))
+
+    def get_module_audit(self, audit_name, module_name, extract, with_imports=False):
+        '''
+        returns json serializable extract(module_name), with INCREMENTAL_AUDITS it is reused from audit manifest
+        while module source doesn't change, raises ModuleNotFoundError if module doesn't exist,
+        with_imports result is computed again also when imported project modules change (eg. base classes)
+        '''
+        # check existence without importing
+        get_module_file(module_name)
+
+        if not self.INCREMENTAL_AUDITS:
+            return extract(module_name)
+
+        if self.STATIC_AUDITS:
+            # static results may differ from results of imported modules
+            audit_name = f'static_{audit_name}'
+
+        dependencies = self.get_imported_project_modules(module_name) if with_imports else []
+        return AuditManifest.get(getattr(self, 'CACHE_DIR', None)).get_result(audit_name, module_name, extract, dependencies)
+
+    def get_imported_project_modules(self, module_name):
+        '''
+        names of modules under CHECK_MODULES imported by module directly or through other project modules,
+        imports are found by ast so no module is imported
+        '''
+        modules = []
+        to_visit = [module_name]
+
+        while to_visit:
+            members = self.get_static_module_members(to_visit.pop(0))
+
+            for full_name in list(members.imports.values()) + members.star_modules:
+                if not any([full_name == parent or full_name.startswith(parent + '.') for parent in self.CHECK_MODULES]):
+                    continue
+
+                specs = get_module_specs(full_name)
+
+                if not specs or not specs[-1].has_location:
+                    continue
+
+                imported_module_name = specs[-1].name
+
+                if imported_module_name != module_name and imported_module_name not in modules:
+                    modules.append(imported_module_name)
+                    to_visit.append(imported_module_name)
+
+        return sorted(modules)
+
+    def save_audits(self):
+        AuditManifest.get(getattr(self, 'CACHE_DIR', None)).save()
+        self.get_source_scanner().save()
+
+    def get_test_names_by_module(self, parent_module_names=[], submodule_name='tests'):
+        '''
+        returns {(test module name, test method name)} of test classes
+        '''
+        if not parent_module_names:
+            parent_module_names = self.CHECK_MODULES
+
+        module_names = self.get_submodule_names(parent_module_names, submodule_name)
+        tests = set()
+
+        for module_name in module_names:
+            tests |= {(module_name, test_name) for test_name in self.get_module_audit('tests', module_name, self.extract_test_names)}
+
+        return tests
+
+    def extract_test_names(self, module_name):
+        if self.STATIC_AUDITS:
+            return sorted(self.get_static_module_members(module_name).tests.keys())
+
+        return sorted({test.__name__ for test in self.get_module_members(module_name).tests})
+
+    def extract_class_names(self, module_name):
+        if self.STATIC_AUDITS:
+            return sorted(self.get_static_module_members(module_name).classes.keys())
+
+        # only classes defined in module, not imported
+        return sorted({klass.__name__ for klass in self.get_module_members(module_name).classes})
+
+    def extract_function_names(self, module_name):
+        if self.STATIC_AUDITS:
+            return sorted(self.get_static_module_members(module_name).functions)
+
+        return sorted({function.__name__ for function in self.get_module_members(module_name).functions})
+
+    def get_module_source_scan(self, module_name):
+        '''
+        comments, string assignments, calls and attributes of module source, see SourceScanner.scan_file
+        '''
+        return self.get_source_scanner().scan_file(get_module_file(module_name))
+
+    def get_static_module_members(self, module_name):
+        '''
+        returns StaticModuleMembers of module, parsed again only if module source changed
+        '''
+        file_path = get_module_file(module_name)
+
+        with open(file_path, 'rb') as file:
+            source = file.read()
+
+        key = (module_name, hashlib.sha1(source).hexdigest())
+
+        if key not in self._static_members:
+            self._static_members[key] = StaticModuleMembers(source, module_name, os.path.basename(file_path) == '__init__.py')
+
+        return self._static_members[key]
 
     def get_tests_by_module(self, parent_module_names=[], submodule_name='tests'):
         # returns method names of test classes
@@ -22,42 +138,39 @@ class MissingTestMixin(GenericBaseMixin):
         tests = set()
 
         for module_name in module_names:
-            try:
-                if module_name not in sys.modules.keys():
-                    importlib.import_module(module_name)
-                module = sys.modules[module_name]
-            except:
-                print(module_name)
-                raise
-            else:
-                tests |= {method for method in self.get_module_class_methods(module) if
-                          method.__name__.startswith('test_')}
+            tests |= self.get_module_members(module_name).tests
 
         return tests
 
+    def extract_filters(self, module_name):
+        '''
+        returns {'filters': [class names], 'filtersets': {class name: [filter method names]}} of filters module
+        '''
+        if self.STATIC_AUDITS:
+            members = self.get_static_module_members(module_name)
+            return {'filters': sorted(members.filters), 'filtersets': members.filtersets}
+
+        members = self.get_module_members(module_name)
+        filter_classes = members.filtersets | members.filters | {
+            cls for cls in members.classes if
+                any([key.startswith('filter') for key, value in IntrospectionIndex.get_class_callables(cls)])
+        }
+
+        return {
+            'filters': sorted([cls.__name__ for cls in filter_classes if issubclass(cls, django_filters.Filter)]),
+            'filtersets': {
+                cls.__name__: sorted([key for key, value in cls.__dict__.items() if callable(value) and key.startswith('filter')])
+                for cls in filter_classes if issubclass(cls, django_filters.FilterSet)
+            },
+        }
+
     def test_for_missing_filters(self):
         module_names = self.get_submodule_names(self.CHECK_MODULES, 'filters', self.EXCLUDE_MODULES)
-        filter_classes = set()
+        filters = {module_name: self.get_module_audit('filters', module_name, self.extract_filters, with_imports=True) for module_name in sorted(module_names)}
         failed = []
 
-        # get filter classes
-        for module_name in module_names:
-            try:
-                if module_name not in sys.modules.keys():
-                    importlib.import_module(module_name)
-                module = sys.modules[module_name]
-            except:
-                print(module_name)
-                raise
-            else:
-                filter_classes |= {
-                    cls for cls in self.get_module_classes(module) if \
-                        issubclass(cls, (django_filters.FilterSet, django_filters.Filter)) or \
-                        any([key.startswith('filter') for key, value in cls.__dict__.items() if callable(value)])
-                }
-
         # get all filter tests names and divide to class/mothod tets subsets
-        test_names = {test.__name__[5:] for test in self.get_tests_by_module(submodule_name='tests.test_filters')}
+        test_names = {test_name[5:] for module_name, test_name in self.get_test_names_by_module(submodule_name='tests.test_filters')}
         filter_classes_tests = {name for name in test_names if name.endswith(('filter', 'filter_set', 'mixin'))}
         filter_methods_tests = test_names - filter_classes_tests
 
@@ -76,19 +189,22 @@ class MissingTestMixin(GenericBaseMixin):
 
             tested_method_names.add('.'.join([class_name, method_name]))
 
-        for cls in filter_classes:
+        for module_name, module_filters in filters.items():
             # test filter class test existence
-            if not cls.__name__ in tested_class_names and issubclass(cls, (django_filters.Filter)):
-                failed.append(f'{cls.__module__}.{cls.__name__} test missing')
+            for class_name in module_filters['filters']:
+                if not class_name in tested_class_names:
+                    failed.append(f'{module_name}.{class_name} test missing')
 
             # test filter class methods tests existence
-            if issubclass(cls, django_filters.FilterSet):
-                filter_methods_names = {f'{cls.__name__}.{key}' for key, value in cls.__dict__.items() if callable(value) and key.startswith('filter')}
+            for class_name, method_names in module_filters['filtersets'].items():
+                filter_methods_names = {f'{class_name}.{method_name}' for method_name in method_names}
                 not_tested_methods = filter_methods_names - tested_method_names
 
                 if not_tested_methods != set():
                     failed.append(not_tested_methods)
 
+        self.save_audits()
+
         if failed:
             # append failed count at the end of error list
             failed.append(f'{len(failed)} filter tests missing')
@@ -101,25 +217,17 @@ class MissingTestMixin(GenericBaseMixin):
 
         # get manager classes
         for module_name in module_names:
-            try:
-                if module_name not in sys.modules.keys():
-                    importlib.import_module(module_name)
-                module = sys.modules[module_name]
-            except:
-                print(module_name)
-                raise
-            else:
-                manager_classes |= self.get_module_classes(module)
+            manager_classes |= {(module_name, class_name) for class_name in self.get_module_audit('classes', module_name, self.extract_class_names)}
 
         # get all manager tests names
-        test_names = {test.__name__.replace('test_', '') for test in self.get_tests_by_module(submodule_name='tests.test_managers') if test.__name__.endswith(('manager', 'queryset', 'mixin'))}
+        test_names = {test_name.replace('test_', '') for module_name, test_name in self.get_test_names_by_module(submodule_name='tests.test_managers') if test_name.endswith(('manager', 'queryset', 'mixin'))}
 
         # get class/method names out of test names
         tested_class_names = {''.join([word.capitalize() for word in test.split('_')]).replace('Queryset', 'QuerySet') for test in test_names}
 
-        for cls in manager_classes:
+        for module_name, class_name in sorted(manager_classes):
             # test filter class test existence
-            self.assertTrue(cls.__name__ in tested_class_names, f'{cls.__module__}.{cls.__name__} test missing')
+            self.assertTrue(class_name in tested_class_names, f'{module_name}.{class_name} test missing')
 
         app_names = [app.name for app in self.apps_to_check()]
 
@@ -130,17 +238,14 @@ class MissingTestMixin(GenericBaseMixin):
                 module_name = '.'.join([app_name, dir_name])
 
                 try:
-                    importlib.import_module(module_name)
-                    module = sys.modules[module_name]
+                    # get only classes defined in the file, not imported
+                    managers_to_test |= set(self.get_module_audit('classes', module_name, self.extract_class_names))
                 except (ModuleNotFoundError, KeyError):
                     pass
-                else:
-                    # get only classes defined in the file, not imported
-                    managers_to_test |= {m[0] for m in inspect.getmembers(module, inspect.isclass) if m[1].__module__ == module.__name__}
 
             try:
                 # test modules may not be loaded, therefore import
-                importlib.import_module('.'.join([app_name, 'tests.test_managers']))
+                test_classes = self.get_module_audit('manager_tests', '.'.join([app_name, 'tests.test_managers']), self.extract_manager_tests)
             except ImportError:
                 if managers_to_test:
                     # mangers exist but tests not
@@ -152,17 +257,7 @@ class MissingTestMixin(GenericBaseMixin):
                     # self.fail(f'there is test_managers file without managers/querysets file in app{app_name}')
                 else:
                     # managers and tests exists
-                    # get test managers module
-                    module = sys.modules['.'.join([app_name, 'tests.test_managers'])]
-
-                    # get test manager classes, only classes defined in module, not imported
-                    test_classes = {m[1] for m in inspect.getmembers(module, inspect.isclass) if m[1].__module__ == module.__name__}
-
-                    for cls in test_classes:
-                        # get managers testing methods by name
-                        tests = [func for func in cls.__dict__.keys() if
-                                 callable(getattr(cls, func)) and func.startswith("test_") and func.endswith(('manager', 'mixin'))]
-
+                    for class_name, tests in test_classes.items():
                         # convert test methods names to manager/queryset clasess: test_name_of_manager -> NameOfManager, test_name_of_queryset -> NameOfQuerySet
                         tested_managers = {
                         ''.join([word.capitalize() for word in test.replace('test_', '').split('_')]).replace(
@@ -171,27 +266,36 @@ class MissingTestMixin(GenericBaseMixin):
                         missing_managers = managers_to_test - tested_managers
                         self.assertEqual(managers_to_test, tested_managers, f'Missing managers for app {app_name}: {missing_managers}')
 
+    def extract_manager_tests(self, module_name):
+        '''
+        returns {test class name: [managers testing method names]} of test managers module
+        '''
+        if self.STATIC_AUDITS:
+            return {class_name: [name for name in test_names if name.endswith(('manager', 'mixin'))]
+                    for class_name, test_names in self.get_static_module_members(module_name).class_tests.items()}
+
+        # get test manager classes, only classes defined in module, not imported
+        test_classes = self.get_module_members(module_name).classes
+
+        # get managers testing methods by name
+        return {cls.__name__: [func for func in cls.__dict__.keys() if
+                               callable(getattr(cls, func)) and func.startswith("test_") and func.endswith(('manager', 'mixin'))]
+                for cls in test_classes}
+
     def test_for_missing_signals(self):
         module_names = self.get_submodule_names(self.CHECK_MODULES, ['signals'], self.EXCLUDE_MODULES)
         signals = set()
 
         # get signal classes
         for module_name in module_names:
-            try:
-                if module_name not in sys.modules.keys():
-                    importlib.import_module(module_name)
-                module = sys.modules[module_name]
-            except:
-                print(module_name)
-                raise
-            else:
-                signals |= self.get_module_functions(module)
+            signals |= {(module_name, function_name) for function_name in self.get_module_audit('functions', module_name, self.extract_function_names)}
 
-        signal_names = {'.'.join((signal.__module__, signal.__name__)) for signal in signals}
+        signal_names = {'.'.join(signal) for signal in signals}
 
         # get all signal tests names
-        test_names = {'.'.join((test.__module__.replace('tests.test_signals', 'signals'), test.__name__.replace('test_', '', 1))) for test in
-                      self.get_tests_by_module(submodule_name='tests.test_signals')}
+        test_names = {'.'.join((module_name.replace('tests.test_signals', 'signals'), test_name.replace('test_', '', 1))) for module_name, test_name in
+                      self.get_test_names_by_module(submodule_name='tests.test_signals')}
+        self.save_audits()
 
         self.assertEqual(signal_names, test_names, f'Signals not matching: {sorted(signal_names ^ test_names)}')
 
@@ -202,26 +306,17 @@ class MissingTestMixin(GenericBaseMixin):
         commented_asserts = set()
 
         for module_name in module_names:
-            try:
-                if module_name not in sys.modules.keys():
-                    importlib.import_module(module_name)
-                module = sys.modules[module_name]
-
-                # code = inspect.getsource(module)
-                lines, start_index = inspect.getsourcelines(module)
-            except:
-                print(module_name)
-                raise
-
-            for i, line in enumerate(lines):
-                matches = re.finditer(r'\# ?self\.assert', line)
-                for match in matches:
-                    commented_asserts.add((line, module_name, f'line {i + start_index + 1}'))
+            commented_asserts |= {tuple(commented_assert) for commented_assert in self.get_module_audit('commented_asserts', module_name, self.extract_commented_asserts)}
 
+        self.save_audits()
         commented_asserts = sorted(commented_asserts, key=lambda x: x[0])
 
         self.assertEqual(commented_asserts, [], f'There are som commented asserts')
 
+    def extract_commented_asserts(self, module_name):
+        return [(line, module_name, f'line {line_number}') for line_number, comment, line in self.get_module_source_scan(module_name)['comments']
+                if re.search(r'\# ?self\.assert', comment)]
+
     def test_for_missing_permissions(self):
         '''
         permission is counted as tested if there is test which name contains path to file where permission is used and is containing line in this format "permission = 'app_name.permission_name'",
@@ -231,7 +326,9 @@ class MissingTestMixin(GenericBaseMixin):
             permission = 'accounts.user_change'
             permission = 'accounts.user_delete'
 
-        will see 'accounts.user_change' and 'accounts.user_delete' used anywhere in file 'path.to.file.containing.permission.py' as tested and will not mark them as missing
+        will see 'accounts.user_change' and 'accounts.user_delete' used anywhere in file 'path.to.file.containing.permission.py' as tested and will not mark them as missing,
+        permissions are used by has_perm('app_name.permission_name') calls and by statements assigning string to name ending
+        with permission (permission = ..., self.required_permission = ...), keyword arguments and commented lines are ignored
         '''
 
         explicit_permission_occurances = self.get_explicit_permissions_by_module(parent_module_names=self.CHECK_MODULES,
@@ -252,17 +349,20 @@ class MissingTestMixin(GenericBaseMixin):
 
             explicit_permissions[name][path].append(line)
 
-        tests = self.get_tests_by_module(submodule_name='tests.test_permissions')
+        test_module_names = self.get_submodule_names(self.CHECK_MODULES, 'tests.test_permissions')
+        tests = [(test_module_name, ) + tuple(test) for test_module_name in sorted(test_module_names)
+                 for test in self.get_module_audit('permission_tests', test_module_name, self.extract_permission_tests)]
+
+        # modules may not be imported when audit results are reused
+        known_module_names = set(sys.modules.keys()) | self.get_submodule_names(self.CHECK_MODULES, self.CHECK_MODULES)
 
         # get permission tests, derive location of tested permission occurance from test name and put into dict
-        for test in tests:
-            permission_names = re.findall(r'(?:[ \t]*\#*[ \t]*)permission = \'[a-z]+.[a-z_]+\'', inspect.getsource(test))
-            path = re.findall(r'permission_path = \'[a-z_.]+\'', inspect.getsource(test))
-            path = path[0].replace('permission_path = ', '')[1:-1] if path else None
-
-            if path not in sys.modules:
-                module_name = [m for m in self.CHECK_MODULES if m in test.__module__][0]
-                test_name = test.__name__.replace('test_', f'{module_name}.')
+        for test_module_name, test_name, permission_names, path in tests:
+            test_function_name = test_name
+
+            if path not in known_module_names:
+                module_name = [m for m in self.CHECK_MODULES if m in test_module_name][0]
+                test_name = test_function_name.replace('test_', f'{module_name}.')
                 path = test_name[:test_name.rfind('.')]
 
                 for i in range(1, test_name.count('_') + 2):
@@ -278,31 +378,27 @@ class MissingTestMixin(GenericBaseMixin):
                     alternative_path = alternative_path[:alternative_path.rfind('.')]
                     alternative_path = '_'.join(alternative_path.rsplit('.', 1))
 
-                    if new_path in sys.modules:
+                    if new_path in known_module_names:
                         path = new_path
-                    elif alternative_path in sys.modules:
+                    elif alternative_path in known_module_names:
                         path = alternative_path
                     else:
                         break
 
             for permission_name in permission_names:
-                if '#' in permission_name:
-                    # skip commented lines
-                    continue
-
-                permission_name = permission_name.lstrip().replace('permission = ', '')[1:-1]
-
                 if permission_name not in tested_permissions:
                     tested_permissions[permission_name] = {}
                     explicit_permissions[permission_name] = {}
 
                 if not any([exclude_name in path for exclude_name in self.EXCLUDE_MODULES]):
                     try:
-                        tested_permissions[permission_name][path].append(test.__name__)
+                        tested_permissions[permission_name][path].append(test_function_name)
                     except KeyError:
-                        raise KeyError(f'{permission_name} not found for test {test.__name__}')
+                        raise KeyError(f'{permission_name} not found for test {test_function_name}')
 
+        self.save_audits()
         failed = []
+        permission_name = None  # no permissions found
 
         for permission_name, locations in explicit_permissions.items():
             for path, lines in locations.items():
@@ -317,7 +413,7 @@ class MissingTestMixin(GenericBaseMixin):
                 del tested_permissions[permission_name][path]
 
         surplus_tests = []
-        for tests in tested_permissions[permission_name].values():
+        for tests in tested_permissions.get(permission_name, {}).values():
             surplus_tests.extend(tests)
 
         if surplus_tests:
@@ -331,39 +427,63 @@ class MissingTestMixin(GenericBaseMixin):
 
         self.assertEqual(len(failed), 0, msg=pformat(failed, indent=4))
 
+    def extract_permission_tests(self, module_name):
+        '''
+        returns [[test name, permission names, permission_path or None], ...] of test permissions module
+        '''
+        scan = self.get_module_source_scan(module_name)
+        tests = []
+
+        if self.STATIC_AUDITS:
+            test_lines = [(test_name, lines) for test_name, all_lines in sorted(self.get_static_module_members(module_name).tests.items())
+                          for lines in all_lines]
+        else:
+            test_lines = [(test.__name__, SourceScanner.get_function_lines(scan, test))
+                          for test in sorted(self.get_module_members(module_name).tests, key=lambda test: test.__name__)]
+
+        for test_name, lines in test_lines:
+            # string assignments in test function, commented lines are not tokenized as code
+            assignments = [(name, value) for line, name, value in scan['assignments'] if lines and lines[0] <= line <= lines[1]]
+            permission_names = [value for name, value in assignments if name.endswith('permission') and re.fullmatch(r'[a-z]+.[a-z_]+', value)]
+            path = [value for name, value in assignments if name == 'permission_path' and re.fullmatch(r'[a-z_.]+', value)]
+            tests.append([test_name, permission_names, path[0] if path else None])
+
+        return tests
+
     def get_explicit_permissions_by_module(self, parent_module_names, submodule_names, exclude):
         module_names = self.get_submodule_names(parent_module_names, submodule_names, exclude)
 
         permissions = set()
         for module_name in module_names:
-            try:
-                if module_name not in sys.modules.keys():
-                    importlib.import_module(module_name)
-                module = sys.modules[module_name]
-
-                # code = inspect.getsource(module)
-                lines, start_index = inspect.getsourcelines(module)
-            except:
-                print(module_name)
-                raise
-
-            for i, line in enumerate(lines):
-                matches = re.finditer(r'has_perm\(\'[a-z]+.[a-z_]+', line)
-                for match in matches:
-                    if re.match(r' +\#', line) is None:
-                        # not commented line
-                        permissions.add((match.group(0).replace("has_perm('", ""), module_name, f'line {i + start_index + 1}'))
-
-                matches = re.finditer(r'permission = \'[a-z]+.[a-z_]+', line)
-                for match in matches:
-                    if re.match(r' +\#', line) is None:
-                        # not commented line
-                        permissions.add((match.group(0).replace("permission = '", ""), module_name, f'line {i + start_index + 1}'))
-
-                matches = re.finditer(r'\.is_superuser', line)
-                for match in matches:
-                    if re.match(r' +\#', line) is None:
-                        # not commented line
-                        permissions.add(('is_superuser', module_name, f'line {i + start_index + 1}'))
+            permissions |= {tuple(permission) for permission in self.get_module_audit('permissions', module_name, self.extract_permissions)}
+
+        self.save_audits()
 
         return sorted(permissions, key=lambda x: x[0])
+
+    def extract_permissions(self, module_name):
+        '''
+        returns [(permission, module name, line), ...] used in module source
+        '''
+        permissions = set()
+
+        # tokenized source, commented lines are skipped
+        scan = self.get_module_source_scan(module_name)
+
+        for line, name, value in scan['calls']:
+            match = re.match(r'[a-z]+.[a-z_]+', value) if name == 'has_perm' and value is not None else None
+
+            if match is not None:
+                permissions.add((match.group(0), module_name, f'line {line}'))
+
+        for line, name, value in scan['assignments']:
+            match = re.match(r'[a-z]+.[a-z_]+', value) if name.endswith('permission') else None
+
+            if match is not None:
+                permissions.add((match.group(0), module_name, f'line {line}'))
+
+        for line, name in scan['attributes']:
+            if name == 'is_superuser':
+                permissions.add(('is_superuser', module_name, f'line {line}'))
+
+        return sorted(permissions)
@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from importlib.abc import MetaPathFinder
+
+
+class ProfilingLoader(object):
+    '''
+    wraps original loader of module and measures execution of module code
+    '''
+    def __init__(self, loader, profiler):
+        self.loader = loader
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # restore original loader, module should not keep reference to profiling wrapper
+        module.__loader__ = self.loader
+
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+
+        self.profiler.start(module.__name__)
+
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler.stop(module.__name__)
+
+
+class ProfilingFinder(MetaPathFinder):
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = ProfilingLoader(spec.loader, self.profiler)
+
+                return spec
+
+        return None
+
+
+class ImportProfiler(object):
+    '''
+    records time and memory growth of every module executed while profiler is active, similar to python -X importtime:
+    cumulative values include nested imports, self values exclude modules imported by module itself
+
+    with ImportProfiler() as profiler:
+        importlib.import_module('myapp.views')
+
+    print(profiler.report())
+    '''
+    def __init__(self):
+        self.records = OrderedDict()
+        self.stack = []
+        self.finder = ProfilingFinder(self)
+        self.started_tracemalloc = False
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+        sys.meta_path.insert(0, self.finder)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.finder in sys.meta_path:
+            sys.meta_path.remove(self.finder)
+
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+        return False
+
+    def start(self, module_name):
+        self.stack.append({
+            'module': module_name,
+            'parent': self.stack[-1]['module'] if self.stack else None,
+            'start': time.perf_counter(),
+            'memory': tracemalloc.get_traced_memory()[0],
+            'children_time': 0.0,
+            'children_memory': 0,
+        })
+
+    def stop(self, module_name):
+        entry = self.stack.pop()
+        cumulative_time = time.perf_counter() - entry['start']
+        cumulative_memory = tracemalloc.get_traced_memory()[0] - entry['memory']
+
+        if self.stack:
+            self.stack[-1]['children_time'] += cumulative_time
+            self.stack[-1]['children_memory'] += cumulative_memory
+
+        self.records[module_name] = {
+            'module': module_name,
+            'imported_by': entry['parent'],
+            'cumulative_time': cumulative_time,
+            'self_time': cumulative_time - entry['children_time'],
+            'cumulative_memory': cumulative_memory,
+            'self_memory': cumulative_memory - entry['children_memory'],
+        }
+
+    def get_records(self, key='cumulative_time'):
+        return sorted(self.records.values(), key=lambda record: record[key], reverse=True)
+
+    def report(self, limit=50, key='cumulative_time'):
+        lines = ['{:>12} {:>12} {:>12} {:>12}  {}'.format('cumul [ms]', 'self [ms]', 'cumul [kB]', 'self [kB]', 'module')]
+
+        for record in self.get_records(key)[:limit]:
+            lines.append('{:>12.1f} {:>12.1f} {:>12.1f} {:>12.1f}  {}'.format(
+                record['cumulative_time'] * 1000,
+                record['self_time'] * 1000,
+                record['cumulative_memory'] / 1024,
+                record['self_memory'] / 1024,
+                record['module'],
+            ))
+
+        return '\n'.join(lines)
+
+    def save(self, file_path, key='cumulative_time'):
+        directory = os.path.dirname(file_path)
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(file_path, 'w') as file:
+            json.dump(self.get_records(key), file, indent=4)
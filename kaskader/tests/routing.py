@@ -0,0 +1,602 @@
+import fnmatch
+import heapq
+import inspect
+import re
+from collections import namedtuple, OrderedDict
+
+from django.db.models import IntegerField, CharField, BooleanField
+from django.urls import URLResolver, URLPattern
+
+
+# single url pattern with its resolved position in urlconf
+UrlEntry = namedtuple('UrlEntry', [
+    'url',  # URLPattern
+    'pattern',  # full pattern including parent resolvers
+    'url_name',  # full name including namespaces, as used in reverse()
+    'namespace',  # namespaces chain as string, ':ns_1:ns_2', empty resolver namespace is kept as ':'
+    'app_name',  # app names chain as string, ':app_1:app_2'
+    'namespaces',  # tuple of resolver namespaces (None if resolver has no namespace)
+    'app_names',  # tuple of resolver app names
+    'view_class',
+    'view_initkwargs',
+])
+
+
+def get_url_name(url_name, namespace):
+    url_name = f"{namespace}:{url_name or ''}"
+    return url_name.strip(':')
+
+
+def get_view_class(url):
+    if hasattr(url.callback, 'view_class'):
+        return url.callback.view_class, getattr(url.callback, 'view_initkwargs', {})
+    elif hasattr(url.callback, 'cls'):
+        # rest api generated views
+        return url.callback.cls, {}
+
+    # api root
+    return None, {}
+
+
+def split_namespace(namespace):
+    '''
+    'ns_1:ns_2' -> ['ns_1', 'ns_2'], empty parts (resolvers without namespace) are skipped
+    '''
+    if not namespace:
+        return []
+
+    if isinstance(namespace, str):
+        namespace = namespace.split(':')
+
+    return [part for part in namespace if part]
+
+
+class NamespaceNode(object):
+    def __init__(self):
+        self.children = OrderedDict()
+        self.entries = []  # indexes of url entries directly in this namespace
+        self._subtree_entries = None
+
+    def subtree_entries(self):
+        '''
+        indexes of url entries in this namespace and all nested namespaces, in urlconf order
+        '''
+        if self._subtree_entries is None:
+            self._subtree_entries = list(heapq.merge(self.entries, *[child.subtree_entries() for child in self.children.values()]))
+
+        return self._subtree_entries
+
+
+class NamespaceIndex(object):
+    '''
+    tree of namespaces (or app names) of any depth, provides exact and prefix lookup of url entries
+    '''
+    def __init__(self, entries, attr='namespaces'):
+        self.root = NamespaceNode()
+
+        for index, entry in enumerate(entries):
+            node = self.root
+
+            for part in split_namespace(getattr(entry, attr)):
+                if part not in node.children:
+                    node.children[part] = NamespaceNode()
+
+                node = node.children[part]
+
+            node.entries.append(index)
+
+    def get_node(self, namespace):
+        node = self.root
+
+        for part in split_namespace(namespace):
+            node = node.children.get(part, None)
+
+            if node is None:
+                return None
+
+        return node
+
+    def lookup(self, namespace, exact=False):
+        '''
+        indexes of url entries in namespace 'ns_1:ns_2', with nested namespaces unless exact
+        '''
+        node = self.get_node(namespace)
+
+        if node is None:
+            return []
+
+        return list(node.entries) if exact else node.subtree_entries()
+
+    def get_namespaces(self):
+        '''
+        returns {namespace: node} of all namespaces including root ''
+        '''
+        namespaces = OrderedDict()
+        stack = [('', self.root)]
+
+        while stack:
+            namespace, node = stack.pop(0)
+            namespaces[namespace] = node
+            stack.extend([(f'{namespace}:{name}' if namespace else name, child) for name, child in node.children.items()])
+
+        return namespaces
+
+
+class UrlTable(object):
+    '''
+    flattened urlconf, resolver is traversed only once per process and all url collectors and crawlers filter its entries
+    '''
+    _tables = {}
+
+    def __init__(self, urls):
+        self.entries = self.flatten(urls)
+        self._namespace_index = None
+        self._app_name_index = None
+        self._namespace_chains = None
+        self._app_name_chains = None
+
+    @property
+    def namespace_index(self):
+        if self._namespace_index is None:
+            self._namespace_index = NamespaceIndex(self.entries, 'namespaces')
+
+        return self._namespace_index
+
+    @property
+    def app_name_index(self):
+        if self._app_name_index is None:
+            self._app_name_index = NamespaceIndex(self.entries, 'app_names')
+
+        return self._app_name_index
+
+    def get_entries(self, namespace=None, app_name=None, exact=False):
+        '''
+        url entries in namespace and/or app name given as full path 'parent:child', including nested unless exact
+        '''
+        indexes = None
+
+        if namespace is not None:
+            indexes = self.namespace_index.lookup(namespace, exact)
+
+        if app_name is not None:
+            app_name_indexes = self.app_name_index.lookup(app_name, exact)
+            indexes = app_name_indexes if indexes is None else sorted(set(indexes) & set(app_name_indexes))
+
+        if indexes is None:
+            return list(self.entries)
+
+        return [self.entries[index] for index in indexes]
+
+    @classmethod
+    def get(cls, urls):
+        '''
+        returns table for resolver or list of url patterns, cached by object identity
+        '''
+        key = id(urls)
+
+        if key not in cls._tables or cls._tables[key][0] is not urls:
+            # keep reference to urls so id can't be reused
+            cls._tables[key] = (urls, cls(urls))
+
+        return cls._tables[key][1]
+
+    @classmethod
+    def clear(cls):
+        cls._tables = {}
+
+    @classmethod
+    def flatten(cls, urls):
+        if isinstance(urls, URLResolver):
+            urls = urls.url_patterns
+
+        entries = []
+        # (urls, pattern parts, namespaces, app names), resolvers are expanded in original order
+        stack = [(iter(urls), (), (), ())]
+
+        while stack:
+            patterns, pattern_parts, namespaces, app_names = stack[-1]
+            url = next(patterns, None)
+
+            if url is None:
+                stack.pop()
+                continue
+
+            if isinstance(url, URLResolver):
+                stack.append((
+                    iter(url.url_patterns),
+                    pattern_parts + (str(url.pattern),),
+                    namespaces + (url.namespace,),
+                    app_names + (url.app_name,),
+                ))
+
+            elif isinstance(url, URLPattern):
+                namespace = ''.join([':' + (ns or '') for ns in namespaces])
+                view_class, view_initkwargs = get_view_class(url)
+                entries.append(UrlEntry(
+                    url=url,
+                    pattern=''.join(pattern_parts) + str(url.pattern),
+                    url_name=get_url_name(url.name, namespace.strip(':')),
+                    namespace=namespace,
+                    app_name=''.join([':' + (app_name or '') for app_name in app_names]),
+                    namespaces=namespaces,
+                    app_names=app_names,
+                    view_class=view_class,
+                    view_initkwargs=view_initkwargs,
+                ))
+
+        return entries
+
+    def filter(self, parent_pattern='', parent_namespace='', parent_app_name='', filter_namespace=None,
+               exclude_namespace=None, filter_app_name=None, exclude_app_name=None, namespace_match='contains'):
+        '''
+        yields (entry, pattern, url_name) of urls matching filters same as recursive crawl of resolver:
+        filter_namespace/filter_app_name is matched by namespace_match:
+            'contains' - text contained in namespaces/app names chain ':parent:child' of url
+            'subtree' - full path 'parent:child' of namespace including nested namespaces
+            'exact' - full path 'parent:child' of namespace without nested namespaces
+        urls under resolver with exclude_namespace/exclude_app_name are skipped
+        '''
+        if namespace_match == 'contains':
+            indexes = None
+
+            if filter_namespace is not None:
+                indexes = self.lookup_containing(self.namespace_chains, parent_namespace, filter_namespace)
+
+            if filter_app_name is not None:
+                app_name_indexes = self.lookup_containing(self.app_name_chains, parent_app_name, filter_app_name)
+                indexes = app_name_indexes if indexes is None else sorted(set(indexes) & set(app_name_indexes))
+
+            entries = self.entries if indexes is None else [self.entries[index] for index in indexes]
+
+        elif namespace_match in ['subtree', 'exact']:
+            namespace = self.get_relative_path(parent_namespace, filter_namespace)
+            app_name = self.get_relative_path(parent_app_name, filter_app_name)
+
+            if (filter_namespace is not None and namespace is None) or (filter_app_name is not None and app_name is None):
+                # filter is outside of parent resolver
+                entries = []
+            else:
+                entries = self.get_entries(namespace, app_name, exact=namespace_match == 'exact')
+
+        else:
+            raise ValueError(f'Unknown namespace_match {namespace_match!r}, use contains, subtree or exact')
+
+        for entry in entries:
+            if exclude_namespace is not None and exclude_namespace in entry.namespaces:
+                continue
+
+            if exclude_app_name is not None and exclude_app_name in entry.app_names:
+                continue
+
+            if parent_pattern or parent_namespace:
+                namespace = parent_namespace + entry.namespace
+                yield entry, parent_pattern + entry.pattern, get_url_name(entry.url.name, namespace.strip(':'))
+            else:
+                yield entry, entry.pattern, entry.url_name
+
+    @property
+    def namespace_chains(self):
+        if self._namespace_chains is None:
+            self._namespace_chains = self.group_by_chain('namespace')
+
+        return self._namespace_chains
+
+    @property
+    def app_name_chains(self):
+        if self._app_name_chains is None:
+            self._app_name_chains = self.group_by_chain('app_name')
+
+        return self._app_name_chains
+
+    def group_by_chain(self, attr):
+        '''
+        returns {chain string: indexes of url entries}, urlconf has only few distinct chains
+        '''
+        chains = OrderedDict()
+
+        for index, entry in enumerate(self.entries):
+            chains.setdefault(getattr(entry, attr), []).append(index)
+
+        return chains
+
+    @classmethod
+    def get_relative_path(cls, parent_chain, path):
+        '''
+        path 'root:cars' relative to parent chain ':root' -> 'cars', None if path is missing or outside of parent
+        '''
+        if path is None:
+            return None
+
+        parent_parts = split_namespace(parent_chain)
+        parts = split_namespace(path)
+
+        if parts[:len(parent_parts)] != parent_parts:
+            return None
+
+        return ':'.join(parts[len(parent_parts):])
+
+    @classmethod
+    def lookup_containing(cls, chains, parent_chain, text):
+        '''
+        indexes of url entries with text contained in chain, each distinct chain is checked only once
+        '''
+        return list(heapq.merge(*[indexes for chain, indexes in chains.items() if text in parent_chain + chain]))
+
+
+class UrlNameMatcher(object):
+    '''
+    compiled set of url name rules, rule can be:
+        'text' - url name contains text
+        'exact:name' - url name is equal
+        'glob:cars:*_delete' - shell style pattern matching whole url name
+        're:^cars:.*' or compiled regex - regex search in url name
+    match returns first matching rule or None
+    '''
+    def __init__(self, rules):
+        self.exact = {}
+        self.substrings = {}
+        self.substring_lengths = []
+        self.regex_rules = []
+        regex_parts = []
+
+        for rule in rules:
+            if isinstance(rule, re.Pattern):
+                regex_parts.append(rule.pattern)
+                self.regex_rules.append(rule)
+            elif rule.startswith('exact:'):
+                self.exact.setdefault(rule[len('exact:'):], rule)
+            elif rule.startswith('glob:'):
+                regex_parts.append(fnmatch.translate(rule[len('glob:'):]).join(['^(?:', ')']))
+                self.regex_rules.append(rule)
+            elif rule.startswith('re:'):
+                regex_parts.append(rule[len('re:'):])
+                self.regex_rules.append(rule)
+            else:
+                self.substrings.setdefault(rule, rule)
+
+        # substrings are matched by hash lookup of url name slices of relevant lengths, independent of number of rules
+        self.substring_lengths = sorted({len(substring) for substring in self.substrings})
+        self.regex = re.compile('|'.join(['(?P<r{}>{})'.format(index, part) for index, part in enumerate(regex_parts)])) if regex_parts else None
+
+    def __bool__(self):
+        return bool(self.exact or self.substrings or self.regex is not None)
+
+    def match(self, url_name):
+        if url_name in self.exact:
+            return self.exact[url_name]
+
+        for length in self.substring_lengths:
+            if length == 0:
+                return self.substrings['']
+
+            for start in range(len(url_name) - length + 1):
+                rule = self.substrings.get(url_name[start:start + length], None)
+
+                if rule is not None:
+                    return rule
+
+        if self.regex is not None:
+            match = self.regex.search(url_name)
+
+            if match is not None:
+                return self.regex_rules[int(match.lastgroup[1:])]
+
+        return None
+
+
+class UrlSelector(object):
+    '''
+    RUN_ONLY_THESE_URL_NAMES, RUN_ONLY_URL_NAMES_CONTAINING, IGNORE_URL_NAMES_CONTAINING and excluded url names
+    compiled once, get_skip_reason returns rule which excluded url or None if url should be tested, results are cached per url name
+    '''
+    def __init__(self, run_only_names=(), run_only_containing=(), ignore_containing=(), exclude_names=None):
+        self.run_only_names = set(run_only_names)
+        self.run_only = UrlNameMatcher(run_only_containing)
+        self.ignore = UrlNameMatcher(ignore_containing)
+        self.exclude_names = set(exclude_names) if exclude_names is not None else None  # None until excluded urls are collected
+        self.reasons = OrderedDict()  # (url name, exclude): reason
+
+    def get_skip_reason(self, url_name, exclude=False):
+        key = (url_name, exclude)
+
+        if key not in self.reasons:
+            self.reasons[key] = self.find_skip_reason(url_name, exclude)
+
+        return self.reasons[key]
+
+    def find_skip_reason(self, url_name, exclude=False):
+        if self.run_only_names and url_name not in self.run_only_names:
+            return 'RUN_ONLY_THESE_URL_NAMES'
+
+        if self.run_only and self.run_only.match(url_name) is None:
+            return 'RUN_ONLY_URL_NAMES_CONTAINING'
+
+        rule = self.ignore.match(url_name) if self.ignore else None
+
+        if rule is not None:
+            return 'IGNORE_URL_NAMES_CONTAINING: {}'.format(rule if isinstance(rule, str) else rule.pattern)
+
+        if exclude and self.exclude_names and url_name in self.exclude_names:
+            return 'EXCLUDE_MODULES'
+
+        return None
+
+    def get_skipped(self):
+        '''
+        returns {url name: reason} of all checked urls which were skipped
+        '''
+        return OrderedDict(((url_name, reason) for (url_name, exclude), reason in self.reasons.items() if reason is not None))
+
+
+class ModelNameIndex(object):
+    '''
+    trie of model names and verbose names (spaces replaced by underscores), longest model name which is prefix
+    of url name is found in time proportional to length of url name
+    '''
+    def __init__(self, models):
+        self.root = {}
+
+        for model in models:
+            names = {model._meta.model_name, str(model._meta.verbose_name).lower().replace(' ', '_')}
+
+            for name in names:
+                self.add(name, model)
+
+    def add(self, name, model):
+        node = self.root
+
+        for char in name:
+            node = node.setdefault(char, {})
+
+        # None key holds models with name ending in this node
+        models = node.setdefault(None, [])
+
+        if model not in models:
+            models.append(model)
+
+    def lookup(self, name):
+        '''
+        returns models with longest name which is prefix of name, more than one model if match is ambiguous
+        '''
+        node = self.root
+        models = []
+
+        for char in name:
+            node = node.get(char, None)
+
+            if node is None:
+                break
+
+            models = node.get(None, models)
+
+        return models
+
+
+class UrlArgIndex(object):
+    '''
+    model fields indexed by field name, <model>_<field> name, <model>_pk name and url arg type,
+    matching fields of url arg are resolved with hash lookups and cached per (arg, view model),
+    resolution doesn't depend on url pattern or url name, so all urls with same arg and view model share the result
+    '''
+    ARG_TYPE_FIELDS = {
+        'int': IntegerField,
+        'str': (CharField, BooleanField),  # also used for slug
+    }
+
+    _indexes = {}
+
+    def __init__(self, models, fields=None):
+        self.models = models
+        self.fields = fields if fields is not None else \
+            [(f, model) for model in models for f in model._meta.get_fields() if f.concrete and not f.auto_created]
+        self.by_name = {}  # field name: [(field, model)]
+        self.by_name_and_type = {}  # (field name, arg type): [(field, model)]
+        self.by_model_field = {}  # '<model>_<field>': [(field, model)]
+        self.by_model = {}  # model: [(field, model)]
+        self.by_pk_name = {}  # '<model>_pk': [model]
+        self.by_verbose_pk_name = {}  # '<verbose_name>_pk': [model]
+        self.properties = {}  # model: property names
+        self.resolved = {}  # (arg, view model): matching fields
+
+        for field, model in self.fields:
+            self.by_name.setdefault(field.name, []).append((field, model))
+            self.by_model_field.setdefault('{}_{}'.format(model._meta.model_name, field.name), []).append((field, model))
+            self.by_model.setdefault(model, []).append((field, model))
+
+            for arg_type, field_classes in self.ARG_TYPE_FIELDS.items():
+                if isinstance(field, field_classes):
+                    self.by_name_and_type.setdefault((field.name, arg_type), []).append((field, model))
+
+        for model in models:
+            self.by_pk_name.setdefault('{}_pk'.format(model._meta.model_name), []).append(model)
+            self.by_verbose_pk_name.setdefault('{}_pk'.format(str(model._meta.verbose_name).lower().replace(' ', '_')), []).append(model)
+
+    @classmethod
+    def get(cls, models, fields=None):
+        '''
+        returns index shared by all tests for collected models, cached by object identity of models,
+        index of custom fields list is cached also by its content, so equal lists share one index
+        '''
+        key = id(models)
+        index = cls._indexes.get(key, None)
+
+        if index is None or index.models is not models:
+            index = cls(models)
+            cls._indexes[key] = index
+
+        if fields is None or fields is index.fields:
+            return index
+
+        key = (key, tuple(fields))
+        index = cls._indexes.get(key, None)
+
+        if index is None or index.models is not models:
+            index = cls(models, list(fields))
+            cls._indexes[key] = index
+
+        return index
+
+    @classmethod
+    def clear(cls):
+        cls._indexes = {}
+
+    def get_properties(self, model):
+        if model not in self.properties:
+            self.properties[model] = [name for name, value in inspect.getmembers(model, lambda o: isinstance(o, property))]
+
+        return self.properties[model]
+
+    def resolve(self, arg, view_model):
+        '''
+        returns list of (field or attribute name, model) matching url arg 'type:name', exactly one is expected,
+        result is cached by (arg, view model) only as url pattern doesn't take part in resolution
+        '''
+        key = (arg, view_model)
+
+        if key not in self.resolved:
+            self.resolved[key] = self.find_matching_fields(arg, view_model)
+
+        return self.resolved[key]
+
+    def find_matching_fields(self, arg, view_model):
+        arg_type, arg_name = arg.split(':') if ':' in arg else ('int', arg)
+
+        if arg in ['int:pk', 'pk']:
+            return [('pk', view_model)]
+
+        if arg_name.endswith('_pk'):
+            # model name
+            matching_fields = [('pk', model) for model in self.by_pk_name.get(arg_name, [])]
+
+            if len(matching_fields) != 1:
+                # match field  model
+                matching_fields = [('pk', model) for model in self.by_verbose_pk_name.get(arg_name, [])]
+
+            return matching_fields
+
+        # full name and type match
+        matching_fields = list(self.by_name_and_type.get((arg_name, 'int' if arg_type == 'int' else 'str'), []))
+
+        if len(matching_fields) > 1:
+            # match field  model
+            return [(field, model) for field, model in matching_fields if model == view_model]
+
+        if matching_fields:
+            return matching_fields
+
+        # full name match
+        matching_fields = [(field, model) for field, model in self.by_name.get(arg_name, []) if not model._meta.proxy]
+
+        if not matching_fields:
+            # match name in form model_field to model and field
+            matching_fields = list(self.by_model_field.get(arg_name, []))
+
+        if not matching_fields and view_model is not None:
+            # this might make problems as only partial match is made
+            matching_fields = [(name, view_model) for name in self.get_properties(view_model) if name.startswith(arg_name)]
+
+        if not matching_fields:
+            # name is contained in field.name of view model
+            matching_fields = [(field, model) for field, model in self.by_model.get(view_model, []) if arg_name in field.name]
+
+        return matching_fields
@@ -0,0 +1,355 @@
+from collections import OrderedDict
+
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from kaskader.tests.discovery import PersistentCache
+
+
+class SequenceAllocator(object):
+    '''
+    next ids of models used for unique generated values, database high-water mark is read only once per model,
+    then ids are advanced in memory by generated objects, ids never go back, so values stay unique
+    even after rollback removed rows (and sqlite reuses their ids),
+    models with non integer primary keys (uuid, ...) start at number of rows + 1, which is not high-water mark,
+    if rows were deleted, generated values may equal values of existing rows
+    '''
+    def __init__(self):
+        self.next_ids = {}  # concrete model: next id
+
+    def read(self, model):
+        # default manager may hide rows
+        last = model._base_manager.order_by('pk').values_list('pk', flat=True).last()
+
+        if last is None:
+            return 0
+
+        # non integer primary keys (uuid, ...) can't be incremented, count of rows is used instead
+        return last + 1 if isinstance(last, int) else model._base_manager.count() + 1
+
+    def get(self, model):
+        '''
+        returns next id of model, same id is returned until model is advanced
+        '''
+        model = model._meta.concrete_model
+
+        if model not in self.next_ids:
+            self.next_ids[model] = self.read(model)
+
+        return self.next_ids[model]
+
+    def advance(self, model, pk=None):
+        '''
+        moves next id of model and its parents past generated object with given pk, or just by one if pk is not known yet
+        '''
+        model = model._meta.concrete_model
+
+        for advanced_model in [model] + model._meta.get_parent_list():
+            if advanced_model in self.next_ids:
+                next_id = self.next_ids[advanced_model] + 1
+                self.next_ids[advanced_model] = max(next_id, pk + 1) if isinstance(pk, int) else next_id
+
+    def clear(self, model=None):
+        if model is None:
+            self.next_ids.clear()
+        else:
+            self.next_ids.pop(model._meta.concrete_model, None)
+
+
+sequences = SequenceAllocator()
+
+
+def has_receivers(signal, sender):
+    '''
+    same as signal.has_listeners(sender) but receivers of kaskader trackers are ignored,
+    so they don't disable bulk inserts of generated objects
+    '''
+    sender_ids = {id(sender), id(None)}
+
+    for entry in signal.receivers:
+        receiver_key, sender_id = entry[0]
+
+        if sender_id in sender_ids and not (isinstance(receiver_key, str) and receiver_key.startswith('kaskader.')):
+            return True
+
+    return False
+
+
+class ModelTracker(object):
+    '''
+    base of trackers of database state fed by post_save and post_delete receivers of tracked models,
+    every change is stamped by counter, so changes done after savepoint can be forgotten when transaction is rolled back
+    '''
+    dispatch_uid = None
+
+    def __init__(self):
+        self.counter = 0
+        self.shared_models = {}  # concrete model: concrete models sharing its rows (multi-table inheritance)
+        self.tracked_models = set()
+
+    def get_shared_models(self, model):
+        model = model._meta.concrete_model
+
+        if model not in self.shared_models:
+            self.shared_models[model] = [model] + model._meta.get_parent_list() + [
+                child for child in apps.get_models() if child._meta.concrete_model is child and model in child._meta.get_parent_list()]
+
+        return self.shared_models[model]
+
+    def track(self, model):
+        '''
+        connects receivers to all models (proxies, parents, children) sharing rows of model
+        '''
+        model = model._meta.concrete_model
+
+        if model in self.tracked_models:
+            return
+
+        self.tracked_models.add(model)
+        shared_models = self.get_shared_models(model)
+
+        for sender in apps.get_models():
+            if sender._meta.concrete_model in shared_models:
+                post_save.connect(self.saved, sender=sender, weak=False, dispatch_uid=self.dispatch_uid)
+                post_delete.connect(self.deleted, sender=sender, weak=False, dispatch_uid=self.dispatch_uid)
+
+    def stamp(self):
+        self.counter += 1
+        return self.counter
+
+    def saved(self, sender, instance, **kwargs):
+        pass
+
+    def deleted(self, sender, instance, **kwargs):
+        pass
+
+    def savepoint(self):
+        return self.counter
+
+    def rollback(self, savepoint):
+        pass
+
+
+class IdentityMap(ModelTracker):
+    '''
+    freshness of generated objects, object is marked stale by post_save, post_delete and m2m_changed receivers
+    of its model and by rollback of test transaction, only stale objects need refresh_from_db,
+    changes bypassing signals (queryset update, bulk_create, bulk_update, raw sql) are not detected,
+    queryset delete is detected because connected post_delete receivers disable fast delete
+    '''
+    dispatch_uid = 'kaskader.identity_map'
+
+    def __init__(self):
+        super(IdentityMap, self).__init__()
+        self.fresh = {}  # (concrete model, pk): stamp of change which marked object fresh
+
+    def track(self, model):
+        '''
+        connects also m2m tables of model
+        '''
+        model = model._meta.concrete_model
+
+        if model in self.tracked_models:
+            return
+
+        super(IdentityMap, self).track(model)
+
+        for field in model._meta.get_fields(include_hidden=True):
+            through = getattr(field, 'through', None) or getattr(getattr(field, 'remote_field', None), 'through', None)
+
+            if field.many_to_many and through is not None and not isinstance(through, str):
+                m2m_changed.connect(self.m2m_changed, sender=through, weak=False, dispatch_uid=self.dispatch_uid)
+
+    def is_fresh(self, obj):
+        return obj.pk is not None and (obj._meta.concrete_model, obj.pk) in self.fresh
+
+    def mark_fresh(self, obj):
+        if obj.pk is None:
+            return
+
+        self.track(obj._meta.model)
+        self.fresh[(obj._meta.concrete_model, obj.pk)] = self.stamp()
+
+    def mark_stale(self, model, pk):
+        for shared_model in self.get_shared_models(model):
+            self.fresh.pop((shared_model, pk), None)
+
+    def saved(self, sender, instance, **kwargs):
+        self.mark_stale(sender, instance.pk)
+
+    def deleted(self, sender, instance, **kwargs):
+        self.mark_stale(sender, instance.pk)
+
+    def m2m_changed(self, sender, instance, action, model, pk_set, **kwargs):
+        if action.startswith('post_'):
+            self.mark_stale(type(instance), instance.pk)
+
+            for pk in pk_set or []:
+                self.mark_stale(model, pk)
+
+    def rollback(self, savepoint):
+        '''
+        objects marked fresh after savepoint may be changed or removed by rollback of transaction
+        '''
+        self.fresh = {key: value for key, value in self.fresh.items() if value <= savepoint}
+
+    def clear(self):
+        self.fresh.clear()
+
+
+class RowCounter(ModelTracker):
+    '''
+    numbers of rows of models, existence of rows is checked by database only once per model and rows are counted
+    only if exact number is needed, then counts are updated by generator (bulk inserts don't send signals)
+    and by post_save and post_delete receivers, counts changed after savepoint are read again after rollback of test transaction,
+    rows inserted by bulk_create of tests, raw sql or deleted by raw sql are not counted
+    '''
+    dispatch_uid = 'kaskader.row_counter'
+
+    def __init__(self):
+        super(RowCounter, self).__init__()
+        self.counts = {}  # concrete model: (number of rows, exact, stamp of last change), not exact number is lower bound
+
+    def get(self, model):
+        '''
+        returns exact number of rows, lower bound known from exists is replaced by count
+        '''
+        model = model._meta.concrete_model
+
+        if model not in self.counts or not self.counts[model][1]:
+            self.track(model)
+            self.counts[model] = (model._base_manager.count(), True, self.stamp())
+
+        return self.counts[model][0]
+
+    def exists(self, model):
+        model = model._meta.concrete_model
+
+        if model not in self.counts:
+            self.track(model)
+            self.counts[model] = (1 if model._base_manager.exists() else 0, False, self.stamp())
+
+        return self.counts[model][0] > 0
+
+    def add(self, model, count=1):
+        '''
+        rows of model are inserted together with rows of its parents
+        '''
+        model = model._meta.concrete_model
+
+        for added_model in [model] + model._meta.get_parent_list():
+            if added_model in self.counts:
+                number, exact, stamp = self.counts[added_model]
+                self.counts[added_model] = (max(number + count, 0), exact, self.stamp())
+
+    def forget(self, model):
+        '''
+        rows of model were inserted without signals (eg. loaded snapshot), existence is checked again
+        '''
+        self.counts.pop(model._meta.concrete_model, None)
+
+    def saved(self, sender, instance, created=False, **kwargs):
+        if created:
+            self.add(sender)
+
+    def deleted(self, sender, instance, **kwargs):
+        # deleted parents and children send their own signals
+        model = sender._meta.concrete_model
+
+        if model not in self.counts:
+            return
+
+        number, exact, stamp = self.counts[model]
+
+        if exact:
+            self.counts[model] = (max(number - 1, 0), True, self.stamp())
+        else:
+            # lower bound can't be decreased, existence is checked again
+            del self.counts[model]
+
+    def rollback(self, savepoint):
+        self.counts = {model: value for model, value in self.counts.items() if value[2] <= savepoint}
+
+    def clear(self):
+        self.counts.clear()
+
+
+class CreatedRows(ModelTracker):
+    '''
+    pks of rows created while recording, fed by post_save receivers and by generator for bulk inserts (no signals),
+    rows of parents (multi-table inheritance) are recorded with rows of children, used by snapshot of generated objects
+    '''
+    dispatch_uid = 'kaskader.created_rows'
+
+    def __init__(self):
+        super(CreatedRows, self).__init__()
+        self.pks = None  # concrete model: set of pks, None if not recording
+
+    def start(self, models):
+        for model in models:
+            self.track(model)
+
+        self.pks = OrderedDict((model._meta.concrete_model, set()) for model in models)
+
+    def stop(self):
+        pks, self.pks = self.pks, None
+        return pks
+
+    def add(self, model, pks):
+        if self.pks is None:
+            return
+
+        model = model._meta.concrete_model
+
+        for added_model in [model] + model._meta.get_parent_list():
+            if added_model in self.pks:
+                self.pks[added_model].update(pks)
+
+    def saved(self, sender, instance, created=False, **kwargs):
+        if created:
+            self.add(sender, [instance.pk])
+
+    def deleted(self, sender, instance, **kwargs):
+        if self.pks is not None:
+            self.pks.get(sender._meta.concrete_model, set()).discard(instance.pk)
+
+
+identity_map = IdentityMap()
+row_counter = RowCounter()
+created_rows = CreatedRows()
+trackers = [identity_map, row_counter]
+
+
+def get_savepoint():
+    return [tracker.savepoint() for tracker in trackers]
+
+
+def rollback_to_savepoint(savepoint):
+    '''
+    forgets state of database tracked after savepoint, used when test transaction is rolled back
+    '''
+    for tracker, tracker_savepoint in zip(trackers, savepoint):
+        tracker.rollback(tracker_savepoint)
+
+
+class ObjsSnapshot(PersistentCache):
+    '''
+    serialized rows of generated objects and names of generated objects keyed by test class,
+    snapshot is used while key (hash of migrations, fixtures, kaskader version and generator configuration) doesn't change
+    '''
+    FILE_NAME = 'snapshots.json'
+
+    def get_snapshot(self, name, key):
+        entry = self.data.get(name, None)
+
+        if entry is None or entry['key'] != key:
+            return None
+
+        return entry
+
+    def set_snapshot(self, name, key, objects, objs):
+        '''
+        objects are rows serialized by django json serializer, objs is {obj name: [model label, pk]}
+        '''
+        self.data[name] = {'key': key, 'objects': objects, 'objs': objs}
+        self.changed = True